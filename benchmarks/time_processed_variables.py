@@ -0,0 +1,36 @@
+import pybamm
+import numpy as np
+
+
+class TimeProcessVariables:
+    """
+    Time the processing of variables from a long cycling solution. The solution is
+    built from 1,000 copies of a one-cycle solution (each stored as a separate
+    sub-solution, as in an experiment), so that it has 100,000 time points.
+    """
+
+    param_names = ["variable"]
+    params = [
+        [
+            "Voltage [V]",
+            "Negative particle surface concentration [mol.m-3]",
+            "Electrolyte concentration [mol.m-3]",
+        ]
+    ]
+
+    def setup(self, variable):
+        model = pybamm.lithium_ion.SPMe()
+        sim = pybamm.Simulation(model)
+        t_eval = np.linspace(0, 3600, 100)
+        solution = sim.solve(t_eval)
+        period = t_eval[-1] + 1
+        self.all_ts = [solution.t + i * period for i in range(1000)]
+        self.all_ys = [solution.y] * 1000
+        self.all_models = [sim.built_model] * 1000
+        self.all_inputs = [solution.all_inputs[0]] * 1000
+
+    def time_process_variable(self, variable):
+        solution = pybamm.Solution(
+            self.all_ts, self.all_ys, self.all_models, self.all_inputs
+        )
+        solution[variable]
@@ -48,3 +48,50 @@ class TimeSimulation:
 
     def time_solve(self, experiment, parameters, model_class, solver_class):
         self.sim.solve()
+
+
+class StepTimer(pybamm.callbacks.Callback):
+    """Time the steps of each cycle, without the processing of the cycle"""
+
+    def on_cycle_start(self, logs):
+        self.timer = pybamm.Timer()
+
+    def on_step_end(self, logs):
+        self.steps_time = self.timer.time().value
+
+
+class TimeStepOverhead:
+    """
+    Short pulses of a small model, for which the cost of the experiment loop and of
+    stepping the solver can exceed the cost of integrating the model
+    """
+
+    number_of_steps = 400
+
+    def setup(self):
+        # a single cycle, so that the summary variables are only calculated once
+        self.exp = pybamm.Experiment(
+            [
+                ("Discharge at C/20 for 1 minute", "Rest for 1 minute")
+                * (self.number_of_steps // 2)
+            ],
+            period="20 seconds",
+        )
+        self.sim = pybamm.Simulation(
+            pybamm.lithium_ion.SPM(),
+            experiment=self.exp,
+            solver=pybamm.CasadiSolver(mode="fast"),
+        )
+        # build the models and set up the solvers
+        self.sim.solve(calc_esoh=False)
+
+    def time_solve(self):
+        self.sim.solve(calc_esoh=False)
+
+    def track_step_overhead(self):
+        step_timer = StepTimer()
+        solution = self.sim.solve(calc_esoh=False, callbacks=step_timer)
+        overhead = step_timer.steps_time - solution.integration_time.value
+        return 1000 * overhead / self.number_of_steps
+
+    track_step_overhead.unit = "ms"
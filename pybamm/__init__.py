@@ -45,9 +45,11 @@ from .util import (
 )
 from .util import (
     get_parameters_filepath,
+    get_cache_directory,
     have_jax,
     install_jax,
     is_jax_compatible,
+    have_numba,
     get_git_commit_info,
 )
 from .logger import logger, set_logging_level, get_new_logger
@@ -89,10 +91,13 @@ from .expression_tree.operations.evaluate_python import (
 
 from .expression_tree.operations.evaluate_python import EvaluatorJax
 from .expression_tree.operations.evaluate_python import JaxCooMatrix
+from .expression_tree.operations.evaluate_numba import to_numba, EvaluatorNumba
 
 from .expression_tree.operations.jacobian import Jacobian
 from .expression_tree.operations.convert_to_casadi import CasadiConverter
 from .expression_tree.operations.unpack_symbols import SymbolUnpacker
+from .expression_tree.operations.intern_symbols import SymbolInterner
+from .expression_tree.operations.optimise_symbols import SymbolOptimiser
 
 #
 # Model classes
@@ -203,6 +208,8 @@ from .spatial_methods.scikit_finite_element import ScikitFiniteElement
 from .solvers.solution import Solution, EmptySolution, make_cycle_solution
 from .solvers.processed_variable import ProcessedVariable
 from .solvers.base_solver import BaseSolver
+from .solvers.solver_pool import SolverPool
+from .solvers.solution_store import SolutionStore
 from .solvers.dummy_solver import DummySolver
 from .solvers.algebraic_solver import AlgebraicSolver
 from .solvers.casadi_solver import CasadiSolver
@@ -215,6 +222,7 @@ from .solvers.jax_solver import JaxSolver
 from .solvers.jax_bdf_solver import jax_bdf_integrate
 
 from .solvers.idaklu_solver import IDAKLUSolver, have_idaklu
+from .solvers.jit_cache import JitCache
 
 #
 # Experiments
@@ -237,6 +245,8 @@ from .plotting.dynamic_plot import dynamic_plot
 # Simulation
 #
 from .simulation import Simulation, load_sim, is_notebook
+from .build_cache import BuildCache
+from .checkpoint import Checkpoint
 
 #
 # Batch Study
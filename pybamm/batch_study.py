@@ -1,9 +1,77 @@
 #
 # BatchStudy class
 #
-import pybamm
+import copy
+import multiprocessing as mp
+import numbers
+from functools import lru_cache
 from itertools import product
 
+import pybamm
+from pybamm.build_cache import _digest
+
+
+def _solve_simulation(sim, repeats, args, kwargs):
+    """
+    Solve `sim` `repeats` times, storing the average solve and integration times in
+    its solution
+    """
+    solve_time = 0
+    integration_time = 0
+    for _ in range(repeats):
+        sol = sim.solve(*args, **kwargs)
+        solve_time += sol.solve_time
+        integration_time += sol.integration_time
+    sim.solution.solve_time = solve_time / repeats
+    sim.solution.integration_time = integration_time / repeats
+    return sim
+
+
+def _solve_in_worker(task):
+    index, sim, repeats, args, kwargs = task
+    return index, _solve_simulation(sim, repeats, args, kwargs)
+
+
+def _get_geometry_parameter_names(geometry):
+    """Return the names of the parameters that appear in `geometry`"""
+    names = set()
+    for value in geometry.values():
+        if isinstance(value, dict):
+            names.update(_get_geometry_parameter_names(value))
+        elif isinstance(value, pybamm.Symbol):
+            names.update(
+                symbol.name
+                for symbol in value.pre_order()
+                if isinstance(symbol, (pybamm.Parameter, pybamm.FunctionParameter))
+            )
+    return names
+
+
+def _get_member_simulation(sim, inputs):
+    """
+    Return a copy of the shared simulation `sim` for one of its runs, which shares
+    the built model and solver of `sim` but has the run's own parameter values
+    instead of the input parameters `inputs` (and its own solution). The values of
+    `inputs` are used by default when the copy is solved again.
+    """
+    member_sim = copy.copy(sim)
+    parameter_values = sim._unprocessed_parameter_values.copy()
+    parameter_values.update(inputs)
+    if sim.operating_mode == "without experiment" and getattr(sim, "C_rate", None):
+        # the current was derived from the capacity, which may be an input
+        parameter_values.update(
+            {
+                "Current function [A]": sim.C_rate
+                * parameter_values["Nominal cell capacity [A.h]"]
+            }
+        )
+    member_sim._unprocessed_parameter_values = parameter_values
+    member_sim.parameter_values = parameter_values
+    member_sim._default_inputs = {**sim._default_inputs, **inputs}
+    # the eSOH solver depends on the parameter values
+    member_sim.get_esoh_solver = lru_cache()(member_sim._get_esoh_solver)
+    return member_sim
+
 
 class BatchStudy:
     """
@@ -44,6 +112,12 @@ class BatchStudy:
         and second model with second solver, second experiment etc.
         If True runs a cartesian product of models, solvers and experiments.
         Default is False
+
+    Simulations that only differ in the values of numerical parameters (i.e. that
+    use the same model, experiment, geometry, mesh, spatial methods and solver) are
+    built once, with these parameters as input parameters, and then solved for the
+    values of each simulation. Parameters that appear in the geometry are never
+    made input parameters, as they change the mesh.
     """
 
     INPUT_LIST = [
@@ -107,13 +181,106 @@ class BatchStudy:
         calc_esoh=True,
         starting_solution=None,
         initial_soc=None,
+        nproc=None,
+        **kwargs,
+    ):
+        """
+        Solve all the simulations of the study, which are then stored in
+        `self.sims`. For more information on the parameters used in the solve,
+        See :meth:`pybamm.Simulation.solve`
+
+        Parameters
+        ----------
+        nproc : int, optional
+            Number of processes in which to build and solve the simulations (see
+            :meth:`BatchStudy.iter_solve`). If None (default) or 1, the simulations
+            are solved one after the other in this process.
+        """
+        self.sims = [None] * len(self._get_runs())
+        for index, sim in self.iter_solve(
+            t_eval,
+            solver,
+            check_model,
+            save_at_cycles,
+            calc_esoh,
+            starting_solution,
+            initial_soc,
+            nproc=nproc,
+            **kwargs,
+        ):
+            self.sims[index] = sim
+
+    def iter_solve(
+        self,
+        t_eval=None,
+        solver=None,
+        check_model=True,
+        save_at_cycles=None,
+        calc_esoh=True,
+        starting_solution=None,
+        initial_soc=None,
+        nproc=None,
         **kwargs,
     ):
         """
-        For more information on the parameters used in the solve,
+        Solve the simulations of the study, yielding each simulation as soon as it
+        has been solved. For more information on the parameters used in the solve,
         See :meth:`pybamm.Simulation.solve`
+
+        Parameters
+        ----------
+        nproc : int, optional
+            Number of processes in which to build and solve the simulations. If
+            greater than 1, the simulations are sent to a pool of processes and
+            yielded in the order in which they finish, so the simulations (including
+            their parameter values) must be picklable. Simulations that share a
+            built model are built in this process, and only solved in the pool. If
+            None (default) or 1, the simulations are solved one after the other in
+            this process.
+
+        Yields
+        ------
+        index : int
+            The position of the simulation in `self.sims`, i.e. in the order of the
+            models, experiments, etc. of the study
+        sim : :class:`pybamm.Simulation`
+            The solved simulation
+        """
+        args = (
+            t_eval,
+            solver,
+            check_model,
+            save_at_cycles,
+            calc_esoh,
+            starting_solution,
+            initial_soc,
+        )
+        user_inputs = kwargs.pop("inputs", None) or {}
+        tasks = []
+        for sim, members in self._get_simulations(check_model, initial_soc):
+            for index, inputs in members:
+                # the members of a group share the built model (and solver), but
+                # each has its own solution and parameter values
+                if len(members) > 1:
+                    member_sim = _get_member_simulation(sim, inputs)
+                else:
+                    member_sim = sim
+                member_kwargs = {**kwargs, "inputs": {**user_inputs, **inputs}}
+                tasks.append((index, member_sim, self.repeats, args, member_kwargs))
+
+        if nproc is not None and nproc > 1 and len(tasks) > 1:
+            with mp.Pool(processes=min(nproc, len(tasks))) as p:
+                yield from p.imap_unordered(_solve_in_worker, tasks)
+                p.close()
+                p.join()
+        else:
+            for task in tasks:
+                yield _solve_in_worker(task)
+
+    def _get_runs(self):
+        """
+        Return the arguments of the simulation of each run of the study, in order
         """
-        self.sims = []
         iter_func = product if self.permutations else zip
 
         # Instantiate items in INPUT_LIST based on the value of self.permutations
@@ -127,49 +294,128 @@ class BatchStudy:
                 inp_value = [None] * len(self.models)
             inp_values.append(inp_value)
 
-        for (
-            model,
-            experiment,
-            geometry,
-            parameter_value,
-            submesh_type,
-            var_pt,
-            spatial_method,
-            solver,
-            output_variable,
-            C_rate,
-        ) in iter_func(self.models.values(), *inp_values):
-            sim = pybamm.Simulation(
+        return [
+            {
+                "model": model,
+                "experiment": experiment,
+                "geometry": geometry,
+                "parameter_values": parameter_value,
+                "submesh_types": submesh_type,
+                "var_pts": var_pt,
+                "spatial_methods": spatial_method,
+                "solver": solver,
+                "output_variables": output_variable,
+                "C_rate": C_rate,
+            }
+            for (
                 model,
-                experiment=experiment,
-                geometry=geometry,
-                parameter_values=parameter_value,
-                submesh_types=submesh_type,
-                var_pts=var_pt,
-                spatial_methods=spatial_method,
-                solver=solver,
-                output_variables=output_variable,
-                C_rate=C_rate,
+                experiment,
+                geometry,
+                parameter_value,
+                submesh_type,
+                var_pt,
+                spatial_method,
+                solver,
+                output_variable,
+                C_rate,
+            ) in iter_func(self.models.values(), *inp_values)
+        ]
+
+    def _get_simulations(self, check_model, initial_soc):
+        """
+        Create the simulations of the study, sharing one built simulation between
+        the runs that only differ in the values of numerical parameters.
+
+        Returns
+        -------
+        list of tuple
+            Pairs of a simulation and its members, a list of (index, inputs) pairs
+            giving the position of each run in `self.sims` and the values of the
+            input parameters of the simulation for that run
+        """
+        groups = {}
+        memo = {}
+        for index, run in enumerate(self._get_runs()):
+            parameter_values = run["parameter_values"]
+            if parameter_values is None:
+                fixed = None
+                numbers_ = {}
+            else:
+                geometry = run["geometry"] or run["model"].default_geometry
+                geometry_names = _get_geometry_parameter_names(geometry)
+                fixed = []
+                numbers_ = {}
+                for name, value in parameter_values.items():
+                    if (
+                        isinstance(value, numbers.Number)
+                        and not isinstance(value, bool)
+                        and name not in geometry_names
+                    ):
+                        numbers_[name] = value
+                    else:
+                        fixed.append(f"{name}={_digest(value, memo)}")
+                fixed = tuple(sorted(fixed))
+            key = tuple(
+                id(value)
+                for name, value in run.items()
+                if name not in ["parameter_values", "C_rate"]
+            ) + (run["C_rate"], fixed, tuple(sorted(numbers_)))
+            groups.setdefault(key, []).append((index, run, numbers_))
+
+        simulations = []
+        for group in groups.values():
+            if len(group) > 1:
+                # the numerical parameters that differ between the runs of the group
+                # become input parameters
+                _, run, numbers_ = group[0]
+                names = [
+                    name
+                    for name, value in numbers_.items()
+                    if any(other[name] != value for _, _, other in group[1:])
+                ]
+                sim = self._build_shared_simulation(
+                    run, names, check_model, initial_soc
+                )
+                if sim is not None:
+                    simulations.append(
+                        (
+                            sim,
+                            [
+                                (index, {name: other[name] for name in names})
+                                for index, _, other in group
+                            ],
+                        )
+                    )
+                    continue
+            simulations.extend(
+                (pybamm.Simulation(**run), [(index, {})]) for index, run, _ in group
             )
-            # Repeat to get average solve time and integration time
-            solve_time = 0
-            integration_time = 0
-            for _ in range(self.repeats):
-                sol = sim.solve(
-                    t_eval,
-                    solver,
-                    check_model,
-                    save_at_cycles,
-                    calc_esoh,
-                    starting_solution,
-                    initial_soc,
-                    **kwargs,
+        simulations.sort(key=lambda simulation: simulation[1][0][0])
+        return simulations
+
+    def _build_shared_simulation(self, run, names, check_model, initial_soc):
+        """
+        Build the simulation of `run` with the parameters `names` as input
+        parameters, or return None if it cannot be built (e.g. if one of these
+        parameters must be known to build the model)
+        """
+        parameter_values = run["parameter_values"].copy()
+        parameter_values.update({name: "[input]" for name in names})
+        try:
+            sim = pybamm.Simulation(**{**run, "parameter_values": parameter_values})
+            if sim.operating_mode == "with experiment":
+                sim.build_for_experiment(
+                    check_model=check_model, initial_soc=initial_soc
                 )
-                solve_time += sol.solve_time
-                integration_time += sol.integration_time
-            sim.solution.solve_time = solve_time / self.repeats
-            sim.solution.integration_time = integration_time / self.repeats
-            self.sims.append(sim)
+            else:
+                sim.build(check_model=check_model, initial_soc=initial_soc)
+        except (ValueError, TypeError, pybamm.ModelError) as error:
+            pybamm.logger.info(
+                f"Could not build {run['model'].name} once for several values of "
+                f"{names} ({error}), building each simulation separately"
+            )
+            return None
+        return sim
 
     def plot(self, output_variables=None, **kwargs):
         """
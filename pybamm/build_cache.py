@@ -0,0 +1,265 @@
+#
+# On-disk cache of built models and set-up solvers
+#
+import hashlib
+import inspect
+import numbers
+import os
+import pickle
+import tempfile
+import types
+
+import casadi
+import numpy as np
+from scipy.sparse import issparse
+
+import pybamm
+
+# Attributes that only hold cached or run-time state, and so do not change what is
+# built from an object. The meshes are set on symbols when they are discretised, and
+# leaves can be shared between the unprocessed model and a built model
+_RUNTIME_ATTRIBUTES = {
+    "_id",
+    "_orphans",
+    "_print_name",
+    "_raw_print_name",
+    "_mesh",
+    "mesh",
+    "secondary_mesh",
+    "_model_set_up",
+    "_setup",
+    "pool",
+    "integrators",
+    "integrator_specs",
+    "y_sols",
+}
+
+
+class BuildCache:
+    """
+    A content-addressed cache, on disk, of built models and the solvers that have
+    set them up. Each entry is keyed by a hash of everything that determines the
+    built model: the equations and options of the model, the parameter values, the
+    geometry, the number of points, submesh types and spatial methods, and the
+    solver and its options, as well as the versions of PyBaMM and CasADi.
+
+    The cache can be passed to :class:`pybamm.Simulation` using the ``build_cache``
+    keyword argument. :meth:`pybamm.Simulation.build` then loads the built model,
+    mesh and set-up solver from the cache if a matching entry exists, which skips
+    parameter processing, discretisation and solver set-up (including the
+    generation of the CasADi functions and their Jacobians). Otherwise, the model
+    is built as usual and added to the cache once it has been set up by the solver,
+    i.e. after the first solve.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory in which to store the cache. It is created if it does not
+        exist, and must be owned by the current user and not be writable by other
+        users, since the entries are unpickled when they are loaded. If None
+        (default), a "build" directory in the user's PyBaMM cache directory is
+        used (see :func:`pybamm.get_cache_directory`).
+
+    For example:
+
+    .. code-block:: python
+
+        cache = pybamm.BuildCache("build_cache")
+        sim = pybamm.Simulation(model, build_cache=cache)
+        sim.solve([0, 3600])  # loaded from the cache if it was built before
+    """
+
+    def __init__(self, directory=None):
+        self.directory = pybamm.get_cache_directory("build", directory)
+
+    @staticmethod
+    def key(*objects):
+        """
+        Return a key (a hexadecimal string) that only depends on the contents of
+        `objects`, and not on their identity, so that the same key is obtained in a
+        different Python process. This does not depend on the contents of the
+        cache, so it can also be called on the class.
+
+        Parameters
+        ----------
+        *objects
+            The objects that determine the entry
+
+        Returns
+        -------
+        str
+            The key
+        """
+        memo = {}
+        digest = hashlib.sha256(
+            "".join(
+                [pybamm.__version__, casadi.__version__]
+                + [_digest(obj, memo) for obj in objects]
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def load(self, key):
+        """
+        Load the entry with key `key`.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry
+
+        Returns
+        -------
+        object or None
+            The entry, or None if there is no entry for this key (or it cannot be
+            read)
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            pybamm.logger.warning(
+                f"Could not load '{key}' from the build cache ({error}), rebuilding"
+            )
+            return None
+
+    def save(self, key, entry):
+        """
+        Save `entry` with key `key`. The entry is written to a temporary file that
+        is then renamed, so that processes sharing the cache never read a partly
+        written entry.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry
+        entry : object
+            The entry to save. Must be picklable.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def clear(self):
+        """Remove all the entries of the cache"""
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, filename))
+
+
+def _digest(obj, memo):
+    """
+    Return a string identifying the contents of `obj`. Digests are memoised by the
+    id of the object, as expression trees share many of their nodes.
+    """
+    if obj is None or isinstance(obj, (bool, numbers.Number, str, bytes)):
+        return f"{type(obj).__name__}:{obj!r}"
+    try:
+        return memo[id(obj)][0]
+    except KeyError:
+        pass
+
+    if isinstance(obj, np.ndarray):
+        contents = [
+            str(obj.dtype),
+            str(obj.shape),
+            hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest(),
+        ]
+    elif issparse(obj):
+        obj_csr = obj.tocsr()
+        contents = [
+            str(obj_csr.shape),
+            _digest(obj_csr.data, memo),
+            _digest(obj_csr.indices, memo),
+            _digest(obj_csr.indptr, memo),
+        ]
+    elif isinstance(obj, pybamm.ParameterValues):
+        # the order in which parameters were set does not matter
+        contents = sorted(
+            f"{name}={_digest(value, memo)}" for name, value in obj.items()
+        )
+    elif isinstance(obj, dict):
+        contents = [
+            f"{_digest(key, memo)}={_digest(value, memo)}" for key, value in obj.items()
+        ]
+    elif isinstance(obj, (list, tuple)):
+        contents = [_digest(item, memo) for item in obj]
+    elif isinstance(obj, (set, frozenset)):
+        contents = sorted(_digest(item, memo) for item in obj)
+    elif isinstance(obj, slice):
+        contents = [repr(obj)]
+    elif isinstance(obj, type):
+        contents = [obj.__module__, obj.__qualname__]
+    elif isinstance(obj, types.ModuleType):
+        contents = [obj.__name__]
+    elif isinstance(obj, types.FunctionType):
+        # functions can be recursive, so they are memoised by name until their
+        # digest is known
+        memo[id(obj)] = (f"function:{obj.__module__}.{obj.__qualname__}", obj)
+        try:
+            source = inspect.getsource(obj)
+        except (OSError, TypeError):
+            source = obj.__code__.co_code.hex()
+        closure = [cell.cell_contents for cell in obj.__closure__ or []]
+        # the globals that the function reads (e.g. module-level constants), which
+        # change what it returns without changing its source
+        global_values = {
+            name: obj.__globals__[name]
+            for name in sorted(_get_code_names(obj.__code__))
+            if name in obj.__globals__
+        }
+        contents = [
+            obj.__module__,
+            obj.__qualname__,
+            source,
+            _digest(obj.__defaults__, memo),
+            _digest(obj.__kwdefaults__, memo),
+            _digest(closure, memo),
+            _digest(global_values, memo),
+        ]
+    elif isinstance(obj, (types.BuiltinFunctionType, np.ufunc)):
+        contents = [getattr(obj, "__module__", None) or "", obj.__name__]
+    elif isinstance(obj, types.MethodType):
+        contents = [_digest(obj.__func__, memo), _digest(obj.__self__, memo)]
+    elif hasattr(obj, "__dict__"):
+        contents = [type(obj).__module__, type(obj).__qualname__] + [
+            f"{name}={_digest(value, memo)}"
+            for name, value in vars(obj).items()
+            if name not in _RUNTIME_ATTRIBUTES and not name.startswith("_saved")
+        ]
+    else:
+        # may contain the address of the object, in which case the cache is never
+        # hit, but a wrong entry is never loaded either
+        contents = [repr(obj)]
+
+    digest = hashlib.sha256(
+        "|".join([type(obj).__qualname__] + contents).encode()
+    ).hexdigest()
+    # keep a reference to the object so that its id is not reused
+    memo[id(obj)] = (digest, obj)
+    return digest
+
+
+def _get_code_names(code):
+    """
+    Return the names of the globals (and attributes) used by `code` and by the code
+    of the functions, lambdas and comprehensions defined in it
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _get_code_names(const)
+    return names
@@ -0,0 +1,111 @@
+#
+# Checkpoints of experiment simulations
+#
+import os
+import pickle
+import tempfile
+
+import pybamm
+
+
+class Checkpoint:
+    """
+    A checkpoint file for long experiment simulations. When passed to
+    :meth:`pybamm.Simulation.solve` using the ``checkpoint`` keyword argument, the
+    progress of the experiment is written to `filename` at the end of a cycle, every
+    `every_cycles` cycles and/or every `every_minutes` minutes. A checkpoint is
+    compact: it only contains the state at the end of the last cycle, the summary
+    variables and first states of the cycles simulated so far, and the position in
+    the experiment, but not the solutions of the cycles.
+
+    Calling :meth:`pybamm.Simulation.solve` with ``resume=True`` then continues the
+    experiment from the latest checkpoint, if there is one, so that the same script
+    can be run again after it has been interrupted.
+
+    Parameters
+    ----------
+    filename : str
+        The file in which to write the checkpoint
+    every_cycles : int, optional
+        Write a checkpoint every `every_cycles` cycles
+    every_minutes : float, optional
+        Write a checkpoint at the end of the first cycle that finishes at least
+        `every_minutes` minutes after the last checkpoint was written. If neither
+        `every_cycles` nor `every_minutes` is given, a checkpoint is written at the
+        end of every cycle.
+
+    For example:
+
+    .. code-block:: python
+
+        checkpoint = pybamm.Checkpoint("ageing.checkpoint", every_minutes=10)
+        solution = sim.solve(checkpoint=checkpoint, resume=True)
+    """
+
+    def __init__(self, filename, every_cycles=None, every_minutes=None):
+        self.filename = filename
+        self.every_cycles = every_cycles
+        self.every_minutes = every_minutes
+        self.reset()
+
+    def reset(self):
+        """Restart counting the cycles and time until the next checkpoint"""
+        self._cycles_since_save = 0
+        self._timer = pybamm.Timer()
+
+    def exists(self):
+        """Whether a checkpoint has been written to `filename`"""
+        return os.path.exists(self.filename)
+
+    def is_due(self):
+        """
+        Count the end of a cycle, and return whether a checkpoint should be written
+        """
+        self._cycles_since_save += 1
+        if self.every_cycles is None and self.every_minutes is None:
+            return True
+        if (
+            self.every_cycles is not None
+            and self._cycles_since_save >= self.every_cycles
+        ):
+            return True
+        if (
+            self.every_minutes is not None
+            and self._timer.time().value >= 60 * self.every_minutes
+        ):
+            return True
+        return False
+
+    def save(self, data):
+        """
+        Write `data` to the checkpoint file. The data is written to a temporary file
+        that then replaces the checkpoint, so that an interrupted write never
+        corrupts the previous checkpoint.
+
+        Parameters
+        ----------
+        data : dict
+            The data to write. Must be picklable.
+        """
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.filename)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.reset()
+
+    def load(self):
+        """
+        Read the data of the latest checkpoint
+
+        Returns
+        -------
+        dict
+            The data of the checkpoint
+        """
+        with open(self.filename, "rb") as f:
+            return pickle.load(f)
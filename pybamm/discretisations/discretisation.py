@@ -241,6 +241,13 @@ class Discretisation(object):
             model_disc
         )
 
+        # Optimise the expressions that are processed by the solver
+        pybamm.logger.verbose("Optimise expressions for {}".format(model.name))
+        pybamm.SymbolOptimiser().optimise_model(model_disc)
+
+        if pybamm.settings.intern_symbols:
+            pybamm.SymbolInterner().intern_model(model_disc)
+
         # Check that resulting model makes sense
         if check_model:
             pybamm.logger.verbose("Performing model checks for {}".format(model.name))
@@ -9,7 +9,9 @@ from scipy import special
 
 class CasadiConverter(object):
     def __init__(self, casadi_symbols=None):
-        self._casadi_symbols = casadi_symbols or {}
+        if casadi_symbols is None:
+            casadi_symbols = {}
+        self._casadi_symbols = casadi_symbols
 
         pybamm.citations.register("Andersson2019")
 
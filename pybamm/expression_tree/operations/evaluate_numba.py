@@ -0,0 +1,665 @@
+#
+# Write a symbol to a numba kernel
+#
+import hashlib
+import importlib.util
+import numbers
+import os
+import sys
+import tempfile
+
+import numpy as np
+import scipy.sparse
+
+import pybamm
+
+# Decorator of the generated kernels. With `cache=True`, numba stores the compiled
+# kernel next to its source file, so that it is only compiled once
+_KERNEL_HEADER = "import numpy as np\nimport numba\n\n\n@numba.njit(cache=True)\n"
+
+
+class _Pattern:
+    """
+    The sparsity pattern of a matrix in CSR format, with sorted column indices and no
+    duplicate entries. The values of sparse matrices are stored in the generated
+    kernels as 1D arrays of nonzero entries (the `data` array of the CSR format), and
+    their patterns are known when the kernel is generated.
+    """
+
+    def __init__(self, indptr, indices, shape):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.shape = shape
+
+    @classmethod
+    def from_keys(cls, keys, shape):
+        """The pattern of the entries with (sorted, unique) row-major indices `keys`"""
+        rows = keys // max(shape[1], 1)
+        counts = np.bincount(rows, minlength=shape[0])
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return cls(indptr, keys % max(shape[1], 1), shape)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    @property
+    def rows(self):
+        """The row of each nonzero entry"""
+        return np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+
+    @property
+    def keys(self):
+        """The row-major index of each nonzero entry"""
+        return self.rows * self.shape[1] + self.indices
+
+    def equals(self, other):
+        return (
+            self.shape == other.shape
+            and np.array_equal(self.indptr, other.indptr)
+            and np.array_equal(self.indices, other.indices)
+        )
+
+
+class _NumbaKernelWriter:
+    """
+    Writes the lines of a numba kernel that evaluates expression trees, in the same
+    order as :func:`pybamm.find_symbols` (children before their parents, and each
+    subtree only once).
+
+    Variables and constants are named by their position in the kernel rather than by
+    the ids of the symbols, so that the same expression tree always gives the same
+    kernel and the compiled kernel can be cached.
+    """
+
+    def __init__(self):
+        self.constants = []
+        self.input_names = []
+        self.lines = []
+        self._constant_names = {}
+        self._symbols = {}
+        self._n_variables = 0
+
+    def add_constant(self, value, key=None):
+        """Add a constant argument to the kernel, and return its name"""
+        if key is not None and key in self._constant_names:
+            return self._constant_names[key]
+        name = "c{}".format(len(self.constants))
+        self.constants.append(value)
+        if key is not None:
+            self._constant_names[key] = name
+        return name
+
+    def new_variable(self):
+        name = "v{}".format(self._n_variables)
+        self._n_variables += 1
+        return name
+
+    def write(self, symbol):
+        """
+        Write the lines that evaluate `symbol`, and return the name of the variable (or
+        constant, or the number) holding its value, and its sparsity pattern if its
+        value is a sparse matrix (None otherwise)
+        """
+        try:
+            return self._symbols[symbol.id]
+        except KeyError:
+            result = self._write(symbol)
+            self._symbols[symbol.id] = result
+            return result
+
+    def _write(self, symbol):
+        if symbol.is_constant():
+            return self._write_constant(symbol.evaluate(), symbol.id)
+
+        children = [self.write(child) for child in symbol.children]
+        if any(pattern is not None for _, pattern in children):
+            return self._write_sparse(symbol, children)
+
+        code = self._dense_code(symbol, [name for name, _ in children])
+        variable = self.new_variable()
+        self.lines.append("{} = {}".format(variable, code))
+        return variable, None
+
+    def _write_constant(self, value, key):
+        if isinstance(value, numbers.Number):
+            return _number_to_str(value), None
+        elif scipy.sparse.issparse(value):
+            value = scipy.sparse.csr_matrix(value, dtype=float, copy=True)
+            value.sum_duplicates()
+            pattern = _Pattern(value.indptr, value.indices, value.shape)
+            return self.add_constant(value.data, key), pattern
+        else:
+            return self.add_constant(value, key), None
+
+    def _dense_code(self, symbol, children):
+        """The code that evaluates a symbol whose value is a scalar or dense array"""
+        if isinstance(symbol, pybamm.BinaryOperator):
+            left, right = children
+            if isinstance(symbol, (pybamm.Multiplication, pybamm.Inner)):
+                return "{} * {}".format(left, right)
+            elif isinstance(symbol, pybamm.Minimum):
+                return "np.minimum({}, {})".format(left, right)
+            elif isinstance(symbol, pybamm.Maximum):
+                return "np.maximum({}, {})".format(left, right)
+            else:
+                return "{} {} {}".format(left, symbol.name, right)
+
+        elif isinstance(symbol, pybamm.UnaryOperator):
+            (child,) = children
+            if isinstance(symbol, pybamm.Index):
+                return "{}[{}:{}]".format(child, symbol.slice.start, symbol.slice.stop)
+            elif isinstance(symbol, pybamm.Negate):
+                return "-{}".format(child)
+            elif isinstance(symbol, pybamm.AbsoluteValue):
+                return "np.abs({})".format(child)
+            elif isinstance(symbol, pybamm.Sign):
+                return "np.sign({})".format(child)
+            elif isinstance(symbol, pybamm.Floor):
+                return "np.floor({})".format(child)
+            elif isinstance(symbol, pybamm.Ceiling):
+                return "np.ceil({})".format(child)
+            elif isinstance(symbol, pybamm.NotConstant):
+                return child
+
+        elif isinstance(symbol, pybamm.Function):
+            # only numpy functions can be called from numba
+            function = symbol.function
+            if function is np.min or function is np.max:
+                return "np.{}({})".format(
+                    "min" if function is np.min else "max", ", ".join(children)
+                )
+            elif (
+                isinstance(function, np.ufunc)
+                and getattr(np, function.__name__, None) is function
+            ):
+                return "np.{}({})".format(function.__name__, ", ".join(children))
+            raise NotImplementedError(
+                "Conversion to numba not implemented for function '{}'".format(
+                    symbol.name
+                )
+            )
+
+        elif isinstance(symbol, pybamm.NumpyConcatenation):
+            if len(children) == 1:
+                return children[0]
+            return "np.concatenate(({}))".format(", ".join(children))
+
+        elif isinstance(symbol, pybamm.DomainConcatenation):
+            # DomainConcatenation specifies a particular ordering for the
+            # concatenation, which we must follow
+            if len(children) == 1 and symbol.secondary_dimensions_npts == 1:
+                return children[0]
+            child_vectors = []
+            for i in range(symbol.secondary_dimensions_npts):
+                starts_and_vectors = []
+                for child, slices in zip(children, symbol._children_slices):
+                    for child_dom, child_slice in slices.items():
+                        starts_and_vectors.append(
+                            (
+                                symbol._slices[child_dom][i].start,
+                                "{}[{}:{}]".format(
+                                    child, child_slice[i].start, child_slice[i].stop
+                                ),
+                            )
+                        )
+                child_vectors.extend(v for _, v in sorted(starts_and_vectors))
+            return "np.concatenate(({}))".format(", ".join(child_vectors))
+
+        # Note: we assume that y is being passed as a column vector
+        elif isinstance(symbol, pybamm.StateVector):
+            indices = np.argwhere(symbol.evaluation_array).reshape(-1)
+            if len(indices) == 1 or np.all(np.diff(indices) == 1):
+                return "y[{}:{}]".format(indices[0], indices[-1] + 1)
+            indices_name = self.add_constant(
+                indices.astype(np.int64), ("state vector", symbol.id)
+            )
+            return "y[{}]".format(indices_name)
+
+        elif isinstance(symbol, pybamm.Time):
+            return "t"
+
+        elif isinstance(symbol, pybamm.InputParameter):
+            if symbol.name not in self.input_names:
+                self.input_names.append(symbol.name)
+            return "p{}".format(self.input_names.index(symbol.name))
+
+        raise _not_implemented(symbol)
+
+    def _write_sparse(self, symbol, children):
+        """
+        Write the lines that evaluate a symbol with at least one child whose value is a
+        sparse matrix, such as the Jacobian of an expression. The result is a sparse
+        matrix (and its data is computed from the data of the children, with index
+        arrays that are worked out here from their patterns), or a dense vector for
+        products of sparse matrices with dense vectors
+        """
+        if isinstance(symbol, pybamm.NotConstant) or (
+            isinstance(symbol, pybamm.SparseStack) and len(children) == 1
+        ):
+            return children[0]
+
+        variable = self.new_variable()
+        if isinstance(symbol, pybamm.BinaryOperator):
+            (left, left_pattern), (right, right_pattern) = children
+            if (
+                isinstance(symbol, (pybamm.Addition, pybamm.Subtraction))
+                and left_pattern is not None
+                and right_pattern is not None
+            ):
+                pattern = self._write_sum(
+                    variable, symbol.name, left, left_pattern, right, right_pattern
+                )
+            elif (
+                isinstance(symbol, (pybamm.Multiplication, pybamm.Inner))
+                and left_pattern is None
+            ):
+                pattern = self._write_scaling(
+                    variable, right, right_pattern, symbol.left, left, "*"
+                )
+            elif (
+                isinstance(
+                    symbol, (pybamm.Multiplication, pybamm.Inner, pybamm.Division)
+                )
+                and right_pattern is None
+            ):
+                operator = "/" if isinstance(symbol, pybamm.Division) else "*"
+                pattern = self._write_scaling(
+                    variable, left, left_pattern, symbol.right, right, operator
+                )
+            elif (
+                isinstance(symbol, pybamm.MatrixMultiplication)
+                and left_pattern is not None
+            ):
+                if right_pattern is None:
+                    self._write_matrix_vector_product(
+                        variable, left, left_pattern, right
+                    )
+                    return variable, None
+                pattern = self._write_matrix_matrix_product(
+                    variable, left, left_pattern, right, right_pattern
+                )
+            else:
+                raise _not_implemented(symbol)
+
+        elif isinstance(symbol, pybamm.Negate):
+            ((child, pattern),) = children
+            self.lines.append("{} = -{}".format(variable, child))
+
+        elif isinstance(symbol, pybamm.Index) and symbol.slice.step in [None, 1]:
+            # slice of the rows of a CSR matrix
+            ((child, child_pattern),) = children
+            start, stop = symbol.slice.start, symbol.slice.stop
+            first, last = child_pattern.indptr[start], child_pattern.indptr[stop]
+            pattern = _Pattern(
+                child_pattern.indptr[start : stop + 1] - first,
+                child_pattern.indices[first:last],
+                (stop - start, child_pattern.shape[1]),
+            )
+            self.lines.append("{} = {}[{}:{}]".format(variable, child, first, last))
+
+        elif isinstance(symbol, pybamm.SparseStack):
+            names, patterns = [], []
+            for child_symbol, (child, child_pattern) in zip(symbol.children, children):
+                if child_pattern is None:
+                    if not child_symbol.is_constant():
+                        raise _not_implemented(symbol)
+                    child, child_pattern = self._write_constant(
+                        scipy.sparse.csr_matrix(child_symbol.evaluate()),
+                        ("sparse", child_symbol.id),
+                    )
+                names.append(child)
+                patterns.append(child_pattern)
+            # stacking CSR matrices vertically concatenates their data
+            offsets = np.cumsum([0] + [p.nnz for p in patterns])
+            pattern = _Pattern(
+                np.concatenate(
+                    [[0]] + [p.indptr[1:] + o for p, o in zip(patterns, offsets)]
+                ),
+                np.concatenate([p.indices for p in patterns]),
+                (sum(p.shape[0] for p in patterns), patterns[0].shape[1]),
+            )
+            self.lines.append(
+                "{} = np.concatenate(({}))".format(variable, ", ".join(names))
+            )
+
+        else:
+            raise _not_implemented(symbol)
+
+        return variable, pattern
+
+    def _write_sum(self, variable, operator, left, left_pattern, right, right_pattern):
+        """Sum or difference of two sparse matrices"""
+        if left_pattern.shape != right_pattern.shape:
+            raise NotImplementedError(
+                "Conversion to numba not implemented for sums of sparse matrices "
+                "with different shapes"
+            )
+        keys = np.union1d(left_pattern.keys, right_pattern.keys)
+        pattern = _Pattern.from_keys(keys, left_pattern.shape)
+        if left_pattern.equals(pattern) and right_pattern.equals(pattern):
+            self.lines.append("{} = {} {} {}".format(variable, left, operator, right))
+            return pattern
+
+        # add the entries of each matrix to the entries of the sum
+        self.lines.append("{} = np.zeros({})".format(variable, pattern.nnz))
+        for child, child_pattern, child_operator in [
+            (left, left_pattern, "+"),
+            (right, right_pattern, operator),
+        ]:
+            positions = self.add_constant(np.searchsorted(keys, child_pattern.keys))
+            self.lines.extend(
+                [
+                    "for k in range({}):".format(child_pattern.nnz),
+                    "    {}[{}[k]] {}= {}[k]".format(
+                        variable, positions, child_operator, child
+                    ),
+                ]
+            )
+        return pattern
+
+    def _write_scaling(self, variable, matrix, pattern, vector_symbol, vector, op):
+        """
+        Elementwise product (or division, if `op` is "/") of a sparse matrix with a
+        scalar, or with a dense array, which is broadcast as in
+        :meth:`scipy.sparse.csr_matrix.multiply` (e.g. a column vector scales the rows
+        of the matrix)
+        """
+        shape = vector_symbol.evaluate_for_shape()
+        if isinstance(shape, numbers.Number):
+            self.lines.append("{} = {} {} {}".format(variable, matrix, op, vector))
+            return pattern
+        n_rows, n_cols = pattern.shape
+        if shape.shape == (1, 1):
+            self.lines.append(
+                "{} = {} {} {}[0, 0]".format(variable, matrix, op, vector)
+            )
+            return pattern
+        elif shape.shape == (n_rows, 1):
+            index = self.add_constant(pattern.rows, ("rows", id(pattern)))
+            entry = "{}[{}[k], 0]".format(vector, index)
+        elif shape.shape == (1, n_cols):
+            index = self.add_constant(pattern.indices, ("indices", id(pattern)))
+            entry = "{}[0, {}[k]]".format(vector, index)
+        elif shape.shape == (n_rows, n_cols):
+            rows = self.add_constant(pattern.rows, ("rows", id(pattern)))
+            cols = self.add_constant(pattern.indices, ("indices", id(pattern)))
+            entry = "{}[{}[k], {}[k]]".format(vector, rows, cols)
+        elif n_rows == 1 and shape.shape[1] == 1:
+            # a row times a column vector gives one scaled copy of the row per entry
+            # of the vector
+            n_copies = shape.shape[0]
+            self.lines.extend(
+                [
+                    "{} = np.empty({})".format(variable, n_copies * pattern.nnz),
+                    "for i in range({}):".format(n_copies),
+                    "    for k in range({}):".format(pattern.nnz),
+                    "        {}[i * {} + k] = {}[k] {} {}[i, 0]".format(
+                        variable, pattern.nnz, matrix, op, vector
+                    ),
+                ]
+            )
+            return _Pattern(
+                np.arange(n_copies + 1) * pattern.nnz,
+                np.tile(pattern.indices, n_copies),
+                (n_copies, n_cols),
+            )
+        else:
+            raise NotImplementedError(
+                "Conversion to numba not implemented for the elementwise product of "
+                "a sparse matrix of shape {} with an array of shape {}".format(
+                    pattern.shape, shape.shape
+                )
+            )
+        self.lines.extend(
+            [
+                "{} = np.empty({})".format(variable, pattern.nnz),
+                "for k in range({}):".format(pattern.nnz),
+                "    {}[k] = {}[k] {} {}".format(variable, matrix, op, entry),
+            ]
+        )
+        return pattern
+
+    def _write_matrix_vector_product(self, variable, matrix, pattern, vector):
+        """Product of a CSR matrix with a dense column vector, as a loop over rows"""
+        indptr = self.add_constant(pattern.indptr, ("indptr", id(pattern)))
+        indices = self.add_constant(pattern.indices, ("indices", id(pattern)))
+        self.lines.extend(
+            [
+                "{} = np.zeros(({}, 1))".format(variable, pattern.shape[0]),
+                "for i in range({}):".format(pattern.shape[0]),
+                "    for k in range({0}[i], {0}[i + 1]):".format(indptr),
+                "        {}[i, 0] += {}[k] * {}[{}[k], 0]".format(
+                    variable, matrix, vector, indices
+                ),
+            ]
+        )
+
+    def _write_matrix_matrix_product(
+        self, variable, left, left_pattern, right, right_pattern
+    ):
+        """
+        Product of two sparse matrices. Each entry of the left matrix in column j
+        multiplies each entry of the right matrix in row j, and these products are
+        worked out here, with the entry of the result that they add to
+        """
+        if left_pattern.shape[1] != right_pattern.shape[0]:
+            raise NotImplementedError(
+                "Conversion to numba not implemented for products of sparse matrices "
+                "with incompatible shapes"
+            )
+        counts = np.diff(right_pattern.indptr)[left_pattern.indices]
+        left_positions = np.repeat(np.arange(left_pattern.nnz), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        right_positions = (
+            np.repeat(right_pattern.indptr[left_pattern.indices], counts) + offsets
+        )
+        shape = (left_pattern.shape[0], right_pattern.shape[1])
+        keys = (
+            np.repeat(left_pattern.rows, counts) * shape[1]
+            + right_pattern.indices[right_positions]
+        )
+        product_keys = np.unique(keys)
+        pattern = _Pattern.from_keys(product_keys, shape)
+
+        left_index = self.add_constant(left_positions)
+        right_index = self.add_constant(right_positions)
+        positions = self.add_constant(np.searchsorted(product_keys, keys))
+        self.lines.extend(
+            [
+                "{} = np.zeros({})".format(variable, pattern.nnz),
+                "for k in range({}):".format(len(keys)),
+                "    {}[{}[k]] += {}[{}[k]] * {}[{}[k]]".format(
+                    variable, positions, left, left_index, right, right_index
+                ),
+            ]
+        )
+        return pattern
+
+
+def _number_to_str(value):
+    value = float(value)
+    if np.isnan(value):
+        return "np.nan"
+    elif np.isinf(value):
+        return "np.inf" if value > 0 else "(-np.inf)"
+    elif value < 0:
+        return "({!r})".format(value)
+    return repr(value)
+
+
+def _not_implemented(symbol):
+    return NotImplementedError(
+        "Conversion to numba not implemented for a symbol of type '{}'".format(
+            type(symbol)
+        )
+    )
+
+
+def to_numba(symbol):
+    """
+    This function converts an expression tree into the source code of a single python
+    function, which only uses numpy operations and loops that numba can compile, and
+    calculates the result of calling :func:`pybamm.Symbol.evaluate` on the tree.
+
+    The nodes are visited in the same order as in :func:`pybamm.to_python`. Products of
+    sparse matrices with vectors are written as loops over the rows of the matrix in
+    CSR format. Sparse matrices that depend on `y` (e.g. in a Jacobian) are stored in
+    the function as arrays of their nonzero entries: their sparsity patterns are
+    worked out when the function is generated, so that sums and products of these
+    matrices are loops over precomputed index arrays.
+
+    Parameters
+    ----------
+    symbol : :class:`pybamm.Symbol`
+        The symbol to convert to a numba function
+
+    Returns
+    -------
+    list
+        The constant values used by the function, which are its first arguments
+    list of str
+        The names of the input parameters, which are its last arguments
+    str
+        The source code of the function, ``evaluate(*constants, t, y, *inputs)``. If
+        `symbol` evaluates to a sparse matrix, the function returns the ``data``,
+        ``indices`` and ``indptr`` arrays of the matrix in CSR format.
+    """
+    writer = _NumbaKernelWriter()
+    result, pattern = writer.write(symbol)
+    if pattern is not None:
+        indices = writer.add_constant(pattern.indices, ("indices", id(pattern)))
+        indptr = writer.add_constant(pattern.indptr, ("indptr", id(pattern)))
+        result = "{}, {}, {}".format(result, indices, indptr)
+
+    args = (
+        ["c{}".format(i) for i in range(len(writer.constants))]
+        + ["t", "y"]
+        + ["p{}".format(i) for i in range(len(writer.input_names))]
+    )
+    lines = ["def evaluate({}):".format(", ".join(args))]
+    lines.extend("    " + line for line in writer.lines)
+    lines.append("    return {}".format(result))
+    return writer.constants, writer.input_names, "\n".join(lines)
+
+
+class EvaluatorNumba:
+    """
+    Converts a pybamm expression tree into a single function, compiled by numba, that
+    calculates the result of calling `evaluate(t, y)` on the given expression tree (see
+    :func:`pybamm.to_numba`). This avoids the overhead of the python interpreter in
+    :class:`pybamm.EvaluatorPython`, which calls one numpy or scipy function per node,
+    and is used for models with ``model.convert_to_format = "numba"``.
+
+    The source of the function is written to a file named by its hash, and numba caches
+    the compiled function next to it, so that a function is only compiled once, also
+    across processes. The function does not depend on the values of the constants
+    (e.g. matrices) in the tree, which are passed as arguments.
+
+    Parameters
+    ----------
+
+    symbol : :class:`pybamm.Symbol`
+        The symbol to convert to a numba function
+    cache_dir : str, optional
+        The directory in which to store the functions and their compiled versions. It
+        must be owned by the current user and not be writable by other users, since
+        the functions are imported from it. If None (default), a "numba" directory
+        in the user's PyBaMM cache directory is used (see
+        :func:`pybamm.get_cache_directory`).
+    """
+
+    def __init__(self, symbol, cache_dir=None):
+        if not pybamm.have_numba():  # pragma: no cover
+            raise ModuleNotFoundError(
+                "Numba is not installed, please install it with `pip install numba`"
+            )
+
+        constants, self._input_names, python_str = to_numba(symbol)
+        self._constants = tuple(constants)
+
+        shape = symbol.evaluate_for_shape()
+        if scipy.sparse.issparse(shape):
+            self._sparse_shape = shape.shape
+        else:
+            self._sparse_shape = None
+
+        self._cache_dir = cache_dir
+        self._python_str = python_str
+        self._evaluate = _load_kernel(python_str, cache_dir)
+
+    def __call__(self, t=None, y=None, inputs=None):
+        """
+        evaluate function
+        """
+        # generated code assumes y is a column vector
+        if y is not None:
+            y = np.ascontiguousarray(y, dtype=np.float64).reshape(-1, 1)
+        if t is not None:
+            t = float(t)
+        inputs = inputs or {}
+        input_values = []
+        for name in self._input_names:
+            try:
+                value = inputs[name]
+            except KeyError:
+                raise KeyError("Input parameter '{}' not found".format(name))
+            if isinstance(value, numbers.Number):
+                value = float(value)
+            else:
+                value = np.ascontiguousarray(value, dtype=np.float64)
+                if value.ndim == 1:
+                    value = value.reshape(-1, 1)
+            input_values.append(value)
+
+        result = self._evaluate(*self._constants, t, y, *input_values)
+
+        if self._sparse_shape is not None:
+            return scipy.sparse.csr_matrix(result, shape=self._sparse_shape)
+        return result
+
+    def __getstate__(self):
+        # The compiled function cannot be pickled, it is loaded again from the cache
+        state = self.__dict__.copy()
+        del state["_evaluate"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._evaluate = _load_kernel(self._python_str, self._cache_dir)
+
+
+def _load_kernel(python_str, cache_dir):
+    """
+    Write the source of a kernel to a file in `cache_dir` (if it is not there yet),
+    import it and return the kernel, compiled by numba the first time it is called
+    """
+    # the directory is checked every time, as evaluators can be unpickled in other
+    # processes
+    cache_dir = pybamm.get_cache_directory("numba", cache_dir)
+    source = _KERNEL_HEADER + python_str + "\n"
+    name = "pybamm_numba_" + hashlib.sha256(source.encode()).hexdigest()
+    path = os.path.join(cache_dir, name + ".py")
+    if not os.path.exists(path):
+        # write to a temporary file that is then renamed, so that processes sharing
+        # the cache never import a partly written file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(source)
+        os.replace(tmp_path, path)
+
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        # numba imports the module of a kernel by name when it loads the compiled
+        # kernel from its cache, so the module must be registered
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return module.evaluate
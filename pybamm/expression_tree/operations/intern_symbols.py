@@ -0,0 +1,175 @@
+#
+# Interning (hash-consing) of expression trees
+#
+import copy
+import weakref
+
+import pybamm
+
+# Canonical symbols shared by all interners, by key (see `SymbolInterner.intern`).
+# Symbols are only held as long as they are used somewhere else, e.g. in a model
+_interned_symbols = weakref.WeakValueDictionary()
+
+_MISSING = object()
+
+
+class SymbolInterner(object):
+    """
+    Helper class to intern (hash-cons) expression trees, i.e. to replace every
+    subtree by a canonical instance, so that structurally identical subtrees (which
+    are built again and again by submodels, parameter processing and
+    discretisation) are stored only once. Symbols that have not been seen before
+    become canonical instances.
+
+    Interning does not change the ids of the symbols, only which objects represent
+    them. Canonical instances are shared between expression trees and so must not
+    be modified in place (e.g. with :meth:`pybamm.Symbol.copy_domains`).
+
+    Models are interned automatically by :meth:`pybamm.ParameterValues.process_model`
+    and :meth:`pybamm.Discretisation.process_model` if
+    ``pybamm.settings.intern_symbols`` is True.
+
+    Parameters
+    ----------
+    interned_symbols : dict, optional
+        Canonical symbols, by key. If None (default), the canonical symbols are
+        shared by all interners (and kept as long as they are used).
+    """
+
+    def __init__(self, interned_symbols=None):
+        if interned_symbols is None:
+            interned_symbols = _interned_symbols
+        self._interned_symbols = interned_symbols
+        # symbols already interned by this interner, by object id
+        self._interned_by_object = {}
+
+    def intern(self, symbol):
+        """
+        Intern an expression tree.
+
+        Parameters
+        ----------
+        symbol : :class:`pybamm.Symbol`
+            The expression tree to intern
+
+        Returns
+        -------
+        :class:`pybamm.Symbol`
+            The canonical instance of `symbol`, whose subtrees are all canonical
+        """
+        try:
+            return self._interned_by_object[id(symbol)][1]
+        except KeyError:
+            pass
+
+        children = symbol.children
+        new_children = [self.intern(child) for child in children]
+
+        # The children are canonical, so two symbols are the same if their own
+        # attributes are the same and their children are the same objects
+        key = (symbol.id, self._get_attributes(symbol)) + tuple(
+            id(child) for child in new_children
+        )
+        canonical = self._interned_symbols.get(key)
+        if canonical is None:
+            if any(new is not old for new, old in zip(new_children, children)):
+                # Don't modify `symbol` in place, as it may be used elsewhere
+                canonical = self._with_children(symbol, new_children)
+            else:
+                canonical = symbol
+            self._interned_symbols[key] = canonical
+
+        # keep a reference to the symbol so that its object id is not reused
+        self._interned_by_object[id(symbol)] = (symbol, canonical)
+        return canonical
+
+    def intern_model(self, model):
+        """
+        Intern all the expressions of a model, in place.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model whose expressions to intern
+
+        Returns
+        -------
+        :class:`pybamm.BaseModel`
+            The model
+        """
+        intern = self.intern
+        model.rhs = {intern(var): intern(eqn) for var, eqn in model.rhs.items()}
+        model.algebraic = {
+            intern(var): intern(eqn) for var, eqn in model.algebraic.items()
+        }
+        model.initial_conditions = {
+            intern(var): intern(eqn) for var, eqn in model.initial_conditions.items()
+        }
+        model.boundary_conditions = {
+            intern(var): {
+                side: (intern(value), typ) for side, (value, typ) in bcs.items()
+            }
+            for var, bcs in model.boundary_conditions.items()
+        }
+        model.variables = {
+            name: intern(variable) for name, variable in model.variables.items()
+        }
+        model.events = [
+            pybamm.Event(event.name, intern(event.expression), event.event_type)
+            for event in model.events
+        ]
+        for name in [
+            "concatenated_rhs",
+            "concatenated_algebraic",
+            "concatenated_initial_conditions",
+        ]:
+            expression = getattr(model, name)
+            if isinstance(expression, pybamm.Symbol):
+                setattr(model, name, intern(expression))
+        return model
+
+    @staticmethod
+    def _get_attributes(symbol):
+        """
+        Return the attributes of `symbol` (but not of its children) that are not
+        part of its id, but that two symbols must share to be the same: some of
+        their domains (for arrays), their bounds (for variables), the Python
+        function they call (for functions, whose id only contains the name of the
+        function) and the meshes assigned by the discretisation. The class and name
+        are also included, to guard against (very unlikely) collisions of ids.
+        """
+        attributes = (
+            type(symbol),
+            symbol.name,
+            tuple((level, tuple(domain)) for level, domain in symbol.domains.items()),
+            id(getattr(symbol, "mesh", _MISSING)),
+            id(getattr(symbol, "secondary_mesh", _MISSING)),
+        )
+        if isinstance(symbol, pybamm.Interpolant):
+            attributes += (symbol.interpolator, symbol.extrapolate)
+        elif isinstance(symbol, pybamm.Function):
+            attributes += (
+                id(symbol.function),
+                symbol.derivative,
+                id(symbol.differentiated_function),
+            )
+        elif isinstance(symbol, pybamm.VariableBase):
+            attributes += tuple(bound.id for bound in symbol.bounds)
+        elif isinstance(symbol, pybamm.InputParameter):
+            attributes += (symbol._expected_size,)
+        return attributes
+
+    @staticmethod
+    def _with_children(symbol, children):
+        """
+        Return a copy of `symbol` with new `children`, which have the same ids as
+        the old ones, so that the copy has the same id as `symbol`
+        """
+        new_symbol = copy.copy(symbol)
+        new_symbol._children = children
+        new_symbol._orphans = children
+        if isinstance(symbol, pybamm.BinaryOperator):
+            new_symbol.left, new_symbol.right = children
+        elif isinstance(symbol, pybamm.UnaryOperator):
+            new_symbol.child = children[0]
+        return new_symbol
@@ -0,0 +1,202 @@
+#
+# Optimisation of discretised expression trees
+#
+import copy
+
+import numpy as np
+from scipy.sparse import issparse
+
+import pybamm
+
+
+class SymbolOptimiser(object):
+    """
+    Helper class to optimise the expression trees of a discretised model before they
+    are converted for the solver. Three optimisations are performed:
+
+    - common subexpressions are eliminated, i.e. all the subtrees that have the same
+      id (in all the expression trees optimised by the same optimiser) are replaced
+      by a single instance, so that they are only converted, evaluated and
+      differentiated once
+    - constant subtrees are folded into a single :class:`pybamm.Scalar`,
+      :class:`pybamm.Vector` or :class:`pybamm.Matrix`
+    - chains of sparse matrix multiplications such as ``A @ (B @ y)``, where ``A``
+      and ``B`` are matrices, are merged into ``(A @ B) @ y`` if the product has no
+      more nonzeros than ``A`` and ``B`` together
+
+    Models are optimised by :meth:`pybamm.Discretisation.process_model`.
+
+    Parameters
+    ----------
+    optimised_symbols : dict, optional
+        Symbols that have already been optimised, with their optimised version. Can
+        be shared between optimisers to eliminate common subexpressions in all the
+        expressions that they optimise. If None (default), an empty dictionary.
+    """
+
+    def __init__(self, optimised_symbols=None):
+        if optimised_symbols is None:
+            optimised_symbols = {}
+        self._optimised_symbols = optimised_symbols
+
+    def optimise(self, symbol):
+        """
+        Optimise an expression tree.
+
+        Parameters
+        ----------
+        symbol : :class:`pybamm.Symbol`
+            The expression tree to optimise
+
+        Returns
+        -------
+        :class:`pybamm.Symbol`
+            The optimised expression tree, which evaluates to the same value as
+            `symbol`. Subtrees of `symbol` that are not changed by the optimisation
+            are reused, but `symbol` itself is never modified.
+        """
+        try:
+            return self._optimised_symbols[symbol]
+        except KeyError:
+            optimised_symbol = self._optimise(symbol)
+            self._optimised_symbols[symbol] = optimised_symbol
+            return optimised_symbol
+
+    def _optimise(self, symbol):
+        """See :meth:`SymbolOptimiser.optimise()`."""
+        children = symbol.children
+        if len(children) == 0:
+            return symbol
+
+        new_children = [self.optimise(child) for child in children]
+
+        # Fold constant subtrees. The children have been folded already, so this is
+        # a single operation on arrays
+        if all(
+            isinstance(child, (pybamm.Scalar, pybamm.Array)) for child in new_children
+        ):
+            new_symbol = self._with_children(symbol, new_children)
+            if new_symbol.is_constant():
+                return pybamm.simplify_if_constant(new_symbol)
+
+        # Merge chains of matrix multiplications
+        if isinstance(symbol, pybamm.MatrixMultiplication):
+            left, right = new_children
+            if (
+                isinstance(left, pybamm.Matrix)
+                and isinstance(right, pybamm.MatrixMultiplication)
+                and isinstance(right.left, pybamm.Matrix)
+            ):
+                new_symbol = self._merge_matrix_multiplications(symbol, left, right)
+                if new_symbol is not None:
+                    return self.optimise(new_symbol)
+
+        return self._with_children(symbol, new_children)
+
+    def optimise_model(self, model):
+        """
+        Optimise the expressions of a discretised model that are processed by the
+        solver (the concatenated right-hand sides, algebraic equations and initial
+        conditions, and the events), in place. Common subexpressions are eliminated
+        across all these expressions.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The discretised model whose expressions to optimise
+
+        Returns
+        -------
+        :class:`pybamm.BaseModel`
+            The model
+        """
+        names = [
+            "concatenated_rhs",
+            "concatenated_algebraic",
+            "concatenated_initial_conditions",
+        ]
+        expressions = [getattr(model, name) for name in names] + [
+            event.expression for event in model.events
+        ]
+        n_nodes_before = count_nodes(*expressions)
+
+        for name in names:
+            setattr(model, name, self.optimise(getattr(model, name)))
+        model.events = [
+            pybamm.Event(event.name, self.optimise(event.expression), event.event_type)
+            for event in model.events
+        ]
+
+        expressions = [getattr(model, name) for name in names] + [
+            event.expression for event in model.events
+        ]
+        pybamm.logger.verbose(
+            "Optimised expressions of {}: {} nodes before, {} after".format(
+                model.name, n_nodes_before, count_nodes(*expressions)
+            )
+        )
+        return model
+
+    @staticmethod
+    def _merge_matrix_multiplications(symbol, left, right):
+        """
+        Return ``(A @ B) @ y`` for ``symbol = A @ (B @ y)``, or None if ``A @ B``
+        has more nonzeros than ``A`` and ``B``
+        """
+        a, b = left.entries, right.left.entries
+        product = a @ b
+        if _count_nonzero(product) > _count_nonzero(a) + _count_nonzero(b):
+            return None
+        new_left = pybamm.Matrix(product)
+        new_symbol = pybamm.MatrixMultiplication(new_left, right.right)
+        new_symbol.copy_domains(symbol)
+        return new_symbol
+
+    @staticmethod
+    def _with_children(symbol, children):
+        """
+        Return `symbol` if `children` are its children, and otherwise a copy of
+        `symbol` with new `children` (and a new id)
+        """
+        if all(new is old for new, old in zip(children, symbol.children)):
+            return symbol
+        new_symbol = copy.copy(symbol)
+        new_symbol._children = children
+        new_symbol._orphans = children
+        if isinstance(symbol, pybamm.BinaryOperator):
+            new_symbol.left, new_symbol.right = children
+        elif isinstance(symbol, pybamm.UnaryOperator):
+            new_symbol.child = children[0]
+        new_symbol.set_id()
+        return new_symbol
+
+
+def count_nodes(*symbols):
+    """
+    Count the distinct nodes (objects) of the expression trees `symbols`, counting
+    each node only once even if it appears in several places
+
+    Parameters
+    ----------
+    *symbols : :class:`pybamm.Symbol`
+        The expression trees
+
+    Returns
+    -------
+    int
+        The number of distinct nodes
+    """
+    seen = set()
+    stack = list(symbols)
+    while stack:
+        symbol = stack.pop()
+        if id(symbol) not in seen:
+            seen.add(id(symbol))
+            stack.extend(symbol.children)
+    return len(seen)
+
+
+def _count_nonzero(matrix):
+    if issparse(matrix):
+        return matrix.nnz
+    return np.count_nonzero(matrix)
@@ -82,6 +82,8 @@ class BaseModel:
         - None: keep PyBaMM expression tree structure.
         - "python": convert into pure python code that will calculate the result of \
         calling `evaluate(t, y)` on the given expression treeself.
+        - "numba": convert into a single function compiled by numba (see \
+        :class:`pybamm.EvaluatorNumba`), which is faster to evaluate than "python".
         - "casadi": convert into CasADi expression tree, which then uses CasADi's \
         algorithm to calculate the Jacobian.
 
@@ -2,6 +2,7 @@
 # A model to calculate electrode-specific SOH
 #
 import pybamm
+import casadi
 import numpy as np
 from functools import lru_cache
 import warnings
@@ -206,6 +207,11 @@ class ElectrodeSOHSolver:
         self._get_electrode_soh_sims_split = lru_cache()(
             self.__get_electrode_soh_sims_split
         )
+        self._get_ocv = lru_cache()(self.__get_ocv)
+        self._get_ocv_function = lru_cache()(self.__get_ocv_function)
+        self._Q_p = None
+        self._model_functions = {}
+        self._warm_start_y0 = None
 
     def __get_electrode_soh_sims_full(self):
         full_model = _ElectrodeSOH(param=self.param, known_value=self.known_value)
@@ -222,6 +228,82 @@ class ElectrodeSOHSolver:
         x0_sim = pybamm.Simulation(x0_model, parameter_values=self.parameter_values)
         return [x100_sim, x0_sim]
 
+    def __get_ocv(self, temperature):
+        """
+        Return the open-circuit voltage at the "ambient" or "reference" temperature,
+        as a function of the input parameters "x" and "y" (the stoichiometries). The
+        parameters are only processed once.
+        """
+        param = self.param
+        T = param.T_amb(0) if temperature == "ambient" else param.T_ref
+        x = pybamm.InputParameter("x")
+        y = pybamm.InputParameter("y")
+        return self.parameter_values.process_symbol(
+            param.p.prim.U(y, T) - param.n.prim.U(x, T)
+        )
+
+    def _evaluate_ocv(self, x, y, temperature="ambient"):
+        """
+        Evaluate the open-circuit voltage at the stoichiometries `x` and `y` (arrays
+        of the same shape), all at once
+        """
+        x = np.asarray(x, dtype=float)
+        # rows, so that the inputs are elementwise rather than vectors
+        inputs = {
+            "x": np.reshape(x, (1, -1)),
+            "y": np.reshape(np.asarray(y, dtype=float), (1, -1)),
+        }
+        values = self._get_ocv(temperature).evaluate(inputs=inputs)
+        if np.size(values) != x.size:
+            # interpolants evaluate their children as columns, so the result is not
+            # elementwise. Use the casadi function, which is evaluated once per
+            # column of the inputs
+            values = self._get_ocv_function(temperature)(inputs["x"], inputs["y"])
+        return np.reshape(values, x.shape)
+
+    def __get_ocv_function(self, temperature):
+        """
+        Return the open-circuit voltage at the "ambient" or "reference" temperature
+        as a casadi function of the stoichiometries x and y
+        """
+        x = casadi.MX.sym("x")
+        y = casadi.MX.sym("y")
+        ocv = self._get_ocv(temperature).to_casadi(inputs={"x": x, "y": y})
+        return _expand(casadi.Function("ocv", [x, y], [ocv]))
+
+    def theoretical_energy_integral(self, n_i, n_f, p_i, p_f, points=100):
+        """
+        Calculate maximum energy possible from a cell given initial and final
+        stoichiometries. See
+        :func:`pybamm.lithium_ion.electrode_soh.theoretical_energy_integral`.
+
+        Parameters
+        ----------
+        n_i, n_f, p_i, p_f : float or array-like
+            initial and final stoichiometries for the positive and negative
+            electrodes, respectively. If arrays are given, the energy of each set of
+            stoichiometries is calculated, in a single evaluation of the
+            open-circuit voltage.
+        points : int
+            The number of points at which to calculate voltage.
+
+        Returns
+        -------
+        E : float or :class:`numpy.array`
+            The total energy of the cell in Wh
+        """
+        if self._Q_p is None:
+            self._Q_p = self.parameter_values.evaluate(self.param.p.prim.Q_init)
+        n_vals = np.linspace(n_i, n_f, num=points)
+        p_vals = np.linspace(p_i, p_f, num=points)
+        # Calculate OCV at each stoichiometry
+        Vs = self._evaluate_ocv(n_vals, p_vals)
+        # Calculate dQ
+        dQ = self._Q_p * (np.asarray(p_f) - np.asarray(p_i)) / (points - 1)
+        # Integrate and convert to W-h
+        E = np.trapz(Vs, axis=0) * dQ
+        return E
+
     def solve(self, inputs):
         if "n_Li" in inputs:
             warnings.warn(
@@ -252,32 +334,172 @@ class ElectrodeSOHSolver:
                 "parameter is now used automatically.",
                 DeprecationWarning,
             )
-        ics = self._set_up_solve(inputs)
         try:
-            sol = self._solve_full(inputs, ics)
+            sol = self._solve_warm_start(inputs)
         except pybamm.SolverError:
-            # just in case solving one by one works better
+            # fall back to the initial guesses below
+            sol = None
+        if sol is None:
+            ics = self._set_up_solve(inputs)
             try:
-                sol = self._solve_split(inputs, ics)
-            except pybamm.SolverError as split_error:
-                # check if the error is due to the simulation not being feasible
-                self._check_esoh_feasible(inputs)
-                # if that didn't raise an error, raise the original error instead
-                raise split_error
-
-        sol_dict = {key: sol[key].data[0] for key in sol.all_models[0].variables.keys()}
+                sol = self._solve_full(inputs, ics)
+            except pybamm.SolverError:
+                # just in case solving one by one works better
+                try:
+                    sol = self._solve_split(inputs, ics)
+                except pybamm.SolverError as split_error:
+                    # check if the error is due to the simulation not being feasible
+                    self._check_esoh_feasible(inputs)
+                    # if that didn't raise an error, raise the original error instead
+                    raise split_error
+
+        sol_dict = self._get_variables(sol)
 
         # Calculate theoretical energy
         x_0 = sol_dict["x_0"]
         y_0 = sol_dict["y_0"]
         x_100 = sol_dict["x_100"]
         y_100 = sol_dict["y_100"]
-        energy = pybamm.lithium_ion.electrode_soh.theoretical_energy_integral(
-            self.parameter_values, x_100, x_0, y_100, y_0
-        )
+        energy = self.theoretical_energy_integral(x_100, x_0, y_100, y_0)
         sol_dict.update({"Maximum theoretical energy [W.h]": energy})
         return sol_dict
 
+    def solve_batch(self, inputs, tol=1e-10, max_iterations=50):
+        """
+        Solve the electrode SOH model for many cells at once, e.g. for estimates of
+        the capacities of a fleet of cells. The first cell is solved with
+        :meth:`ElectrodeSOHSolver.solve`, and its solution is the initial guess of a
+        damped Newton iteration that solves the equations of all the cells together:
+        the residuals and Jacobians of all the cells are evaluated in a single call
+        to a mapped casadi function, and the Newton steps are solved as a stack of
+        small linear systems. Any cell for which the iteration does not converge is
+        then solved on its own with :meth:`ElectrodeSOHSolver.solve`.
+
+        Parameters
+        ----------
+        inputs : dict
+            The inputs of the model ("Q_n", "Q_p", and "Q_Li" or "Q", depending on
+            `known_value`), as arrays of the same shape (or scalars)
+        tol : float, optional
+            The tolerance on the residuals of the equations. Default is 1e-10.
+        max_iterations : int, optional
+            The maximum number of Newton iterations. Default is 50.
+
+        Returns
+        -------
+        dict
+            The eSOH variables, as arrays of the same shape as the inputs
+        """
+        names = sorted(inputs.keys())
+        arrays = np.broadcast_arrays(
+            *[np.asarray(inputs[name], dtype=float) for name in names]
+        )
+        shape = arrays[0].shape
+        p = np.vstack([array.reshape(1, -1) for array in arrays])
+        n_cells = p.shape[1]
+
+        # solve the first cell as usual, which also builds the model
+        first_sol = self.solve({name: p[i, 0] for i, name in enumerate(names)})
+        sim = self._get_electrode_soh_sims_full()
+        model = sim.built_model
+        functions = self._get_model_functions(model)
+
+        # unknowns, in the order of the state vector, and their bounds
+        unknowns = sorted(
+            (slices[0].start, variable.name)
+            for variable, slices in model.y_slices.items()
+        )
+        unknowns = [name for _, name in unknowns]
+        n_y = len(unknowns)
+        bounds = self._get_batch_bounds(dict(zip(names, p)))
+        lower = np.vstack([bounds[name][0] for name in unknowns])
+        upper = np.vstack([bounds[name][1] for name in unknowns])
+
+        # the first cell is usually a good initial guess for the others
+        y = np.clip([[first_sol[name]] for name in unknowns], lower, upper)
+        residuals_and_jacobian = functions["residuals and jacobian"].map(n_cells)
+        residuals_function = functions["residuals"]
+
+        def residual_norm(y, p):
+            residuals = residuals_function.map(y.shape[1])(0, y, p).full()
+            norm = np.max(np.abs(residuals), axis=0)
+            # cells where the residuals cannot be evaluated have not converged
+            return np.where(np.isnan(norm), np.inf, norm)
+
+        norm = residual_norm(y, p)
+        for _ in range(max_iterations):
+            active = norm >= tol
+            if not np.any(active):
+                break
+            residuals, jacobian = residuals_and_jacobian(0, y, p)
+            residuals = residuals.full()[:, active]
+            # the Jacobians of the cells are side by side, (n_y, n_y * n_cells)
+            jacobian = (
+                jacobian.full().reshape(n_y, n_cells, n_y).transpose(1, 0, 2)[active]
+            )
+            with np.errstate(all="ignore"):
+                try:
+                    step = np.linalg.solve(jacobian, -residuals.T[..., np.newaxis])
+                except np.linalg.LinAlgError:
+                    step = np.linalg.pinv(jacobian) @ -residuals.T[..., np.newaxis]
+            step = step[..., 0].T
+
+            # halve the step until the residuals decrease, for each cell
+            y_active, p_active = y[:, active], p[:, active]
+            lower_active, upper_active = lower[:, active], upper[:, active]
+            norm_active = norm[active]
+            damping = np.ones(step.shape[1])
+            for _ in range(10):
+                y_new = np.clip(y_active + damping * step, lower_active, upper_active)
+                norm_new = residual_norm(y_new, p_active)
+                decreased = norm_new < norm_active
+                if np.all(decreased):
+                    break
+                damping = np.where(decreased, damping, damping / 2)
+            y_active = np.where(decreased, y_new, y_active)
+            y[:, active] = y_active
+            norm[active] = np.where(decreased, norm_new, norm_active)
+
+        # fall back to solving the remaining cells one by one
+        for i in np.flatnonzero(norm >= tol):
+            sol = self.solve({name: p[j, i] for j, name in enumerate(names)})
+            y[:, i] = [sol[name] for name in unknowns]
+
+        values = functions["variables"].map(n_cells)(0, y, p).full()
+        sol_dict = {
+            name: values[i].reshape(shape) for i, name in enumerate(model.variables)
+        }
+
+        # Calculate theoretical energy
+        sol_dict["Maximum theoretical energy [W.h]"] = self.theoretical_energy_integral(
+            sol_dict["x_100"], sol_dict["x_0"], sol_dict["y_100"], sol_dict["y_0"]
+        )
+        return sol_dict
+
+    def _get_batch_bounds(self, inputs):
+        """
+        Return the lower and upper bounds of each unknown of the full model, for
+        each cell in `inputs`, such that all the stoichiometries stay within the
+        limits of the open-circuit potentials (see
+        :meth:`ElectrodeSOHSolver._get_lims`)
+        """
+        x0_min, x100_max, y100_min, y0_max = self.lims_ocp
+        Q_n = inputs["Q_n"]
+        Q_p = inputs["Q_p"]
+        if self.known_value == "cyclable lithium capacity":
+            Q_Li = inputs["Q_Li"]
+            # y = (Q_Li - x * Q_n) / Q_p at both 0% and 100% SOC
+            x_min = np.maximum(x0_min, (Q_Li - y0_max * Q_p) / Q_n)
+            x_max = np.minimum(x100_max, (Q_Li - y100_min * Q_p) / Q_n)
+            return {"x_100": (x_min, x_max), "x_0": (x_min, x_max)}
+        elif self.known_value == "cell capacity":
+            Q = inputs["Q"]
+            ones = np.ones_like(Q)
+            return {
+                "x_100": (np.maximum(x0_min, x0_min + Q / Q_n), x100_max * ones),
+                "y_100": (y100_min * ones, np.minimum(y0_max, y0_max - Q / Q_p)),
+            }
+
     def _set_up_solve(self, inputs):
         # Try with full sim
         sim = self._get_electrode_soh_sims_full()
@@ -332,8 +554,81 @@ class ElectrodeSOHSolver:
         sim.build()
         sim.built_model.set_initial_conditions_from(ics)
         sol = sim.solve([0], inputs=inputs)
+        self._warm_start_y0 = sol.all_ys[-1][:, -1]
+        return sol
+
+    def _solve_warm_start(self, inputs):
+        """
+        Solve the full model with the solver that has already been set up, using the
+        last solution of the full model as the initial guess. This is much cheaper
+        than going through the simulation again when the inputs change slowly, e.g.
+        from one cycle to the next. Returns None if the full model has not been
+        solved yet.
+        """
+        if self._warm_start_y0 is None:
+            return None
+        sim = self._get_electrode_soh_sims_full()
+        # the initial guess of the algebraic solver is not recalculated as long as
+        # the initial conditions of the model are unchanged
+        sim.built_model.y0 = casadi.DM(self._warm_start_y0)
+        sol = sim.solver.solve(sim.built_model, [0], inputs=inputs)
+        self._warm_start_y0 = sol.all_ys[-1][:, -1]
         return sol
 
+    def _get_model_functions(self, model):
+        """
+        Return casadi functions of (t, y, inputs), where the (scalar) inputs are
+        stacked in alphabetical order, giving all the variables of `model`, its
+        algebraic residuals, and the residuals and their Jacobian with respect to y.
+        The functions are created once for each model.
+        """
+        if model not in self._model_functions:
+            t_MX = casadi.MX.sym("t")
+            y_MX = casadi.MX.sym("y", model.len_rhs_and_alg)
+            inputs_MX_dict = {
+                name: casadi.MX.sym(name)
+                for name in sorted(param.name for param in model.input_parameters)
+            }
+            inputs_MX = casadi.vertcat(*inputs_MX_dict.values())
+            variables_MX = casadi.vertcat(
+                *[
+                    variable.to_casadi(t_MX, y_MX, inputs=inputs_MX_dict)
+                    for variable in model.variables.values()
+                ]
+            )
+            residuals_MX = model.concatenated_algebraic.to_casadi(
+                t_MX, y_MX, inputs=inputs_MX_dict
+            )
+            functions = {
+                "variables": casadi.Function(
+                    "variables", [t_MX, y_MX, inputs_MX], [variables_MX]
+                ),
+                "residuals": casadi.Function(
+                    "residuals", [t_MX, y_MX, inputs_MX], [residuals_MX]
+                ),
+                "residuals and jacobian": casadi.Function(
+                    "residuals_and_jacobian",
+                    [t_MX, y_MX, inputs_MX],
+                    [residuals_MX, casadi.jacobian(residuals_MX, y_MX)],
+                ),
+            }
+            self._model_functions[model] = {
+                key: _expand(function) for key, function in functions.items()
+            }
+        return self._model_functions[model]
+
+    def _get_variables(self, sol):
+        """
+        Evaluate all the (scalar) variables of the model that `sol` was solved with,
+        using a single casadi function
+        """
+        model = sol.all_models[0]
+        variables_function = self._get_model_functions(model)["variables"]
+        values = variables_function(
+            sol.all_ts[0][0], sol.all_ys[0][:, 0], sol.all_inputs_casadi[0]
+        ).full()[:, 0]
+        return dict(zip(model.variables.keys(), values))
+
     def _solve_split(self, inputs, ics):
         x100_sim, x0_sim = self._get_electrode_soh_sims_split()
         x100_sim.build()
@@ -450,7 +745,7 @@ class ElectrodeSOHSolver:
                 )
             )
 
-    def get_initial_stoichiometries(self, initial_value):
+    def get_initial_stoichiometries(self, initial_value, inputs=None):
         """
         Calculate initial stoichiometries to start off the simulation at a particular
         state of charge, given voltage limits, open-circuit potentials, etc defined by
@@ -463,6 +758,12 @@ class ElectrodeSOHSolver:
             If integer, interpreted as SOC, must be between 0 and 1.
             If string e.g. "4 V", interpreted as voltage,
             must be between V_min and V_max.
+        inputs : dict, optional
+            The capacities of many cells, as arrays (see
+            :meth:`ElectrodeSOHSolver.solve_batch`). If given, the initial
+            stoichiometries of all the cells are calculated at once, and returned as
+            arrays. Otherwise, the capacities are calculated from the parameter
+            values.
 
         Returns
         -------
@@ -471,7 +772,11 @@ class ElectrodeSOHSolver:
         """
         parameter_values = self.parameter_values
         param = self.param
-        x_0, x_100, y_100, y_0 = self.get_min_max_stoichiometries()
+        if inputs is None:
+            x_0, x_100, y_100, y_0 = self.get_min_max_stoichiometries()
+        else:
+            sol = self.solve_batch(inputs)
+            x_0, x_100, y_100, y_0 = sol["x_0"], sol["x_100"], sol["y_100"], sol["y_0"]
 
         if isinstance(initial_value, str) and initial_value.endswith("V"):
             V_init = float(initial_value[:-1])
@@ -484,22 +789,40 @@ class ElectrodeSOHSolver:
                     f"({V_min}, {V_max})"
                 )
 
-            # Solve simple model for initial soc based on target voltage
-            soc_model = pybamm.BaseModel()
-            soc = pybamm.Variable("soc")
-            Up = param.p.prim.U
-            Un = param.n.prim.U
-            T_ref = parameter_values["Reference temperature [K]"]
-            x = x_0 + soc * (x_100 - x_0)
-            y = y_0 - soc * (y_0 - y_100)
-
-            soc_model.algebraic[soc] = Up(y, T_ref) - Un(x, T_ref) - V_init
-            # initial guess for soc linearly interpolates between 0 and 1
-            # based on V linearly interpolating between V_max and V_min
-            soc_model.initial_conditions[soc] = (V_init - V_min) / (V_max - V_min)
-            soc_model.variables["soc"] = soc
-            parameter_values.process_model(soc_model)
-            initial_soc = pybamm.AlgebraicSolver().solve(soc_model, [0])["soc"].data[0]
+            if inputs is None:
+                # Solve simple model for initial soc based on target voltage
+                soc_model = pybamm.BaseModel()
+                soc = pybamm.Variable("soc")
+                Up = param.p.prim.U
+                Un = param.n.prim.U
+                T_ref = parameter_values["Reference temperature [K]"]
+                x = x_0 + soc * (x_100 - x_0)
+                y = y_0 - soc * (y_0 - y_100)
+
+                soc_model.algebraic[soc] = Up(y, T_ref) - Un(x, T_ref) - V_init
+                # initial guess for soc linearly interpolates between 0 and 1
+                # based on V linearly interpolating between V_max and V_min
+                soc_model.initial_conditions[soc] = (V_init - V_min) / (V_max - V_min)
+                soc_model.variables["soc"] = soc
+                parameter_values.process_model(soc_model)
+                initial_soc = (
+                    pybamm.AlgebraicSolver().solve(soc_model, [0])["soc"].data[0]
+                )
+            else:
+                # The open-circuit voltage increases with the soc, so find the soc
+                # of all the cells at once by bisection
+                soc_min = np.zeros_like(x_0)
+                soc_max = np.ones_like(x_0)
+                for _ in range(50):
+                    soc = (soc_min + soc_max) / 2
+                    V = self._evaluate_ocv(
+                        x_0 + soc * (x_100 - x_0),
+                        y_0 - soc * (y_0 - y_100),
+                        temperature="reference",
+                    )
+                    soc_min = np.where(V < V_init, soc, soc_min)
+                    soc_max = np.where(V < V_init, soc_max, soc)
+                initial_soc = (soc_min + soc_max) / 2
         elif isinstance(initial_value, (int, float)):
             initial_soc = initial_value
             if not 0 <= initial_soc <= 1:
@@ -543,6 +866,18 @@ class ElectrodeSOHSolver:
         return [sol["x_0"], sol["x_100"], sol["y_100"], sol["y_0"]]
 
 
+def _expand(function):
+    """
+    Return the scalar (SX) version of the casadi `function`, which is much faster to
+    evaluate, or `function` itself if it cannot be expanded (e.g. if it contains
+    interpolants)
+    """
+    try:
+        return function.expand()
+    except RuntimeError:
+        return function
+
+
 def get_initial_stoichiometries(
     initial_value, parameter_values, param=None, known_value="cyclable lithium capacity"
 ):
@@ -607,34 +942,20 @@ def theoretical_energy_integral(parameter_values, n_i, n_f, p_i, p_f, points=100
     ----------
     parameter_values : :class:`pybamm.ParameterValues`
         The parameter values class that will be used for the simulation.
-    n_i, n_f, p_i, p_f : float
+    n_i, n_f, p_i, p_f : float or array-like
         initial and final stoichiometries for the positive and negative
-        electrodes, respectively
+        electrodes, respectively. If arrays are given, the energy is calculated
+        for each set of stoichiometries.
     points : int
         The number of points at which to calculate voltage.
 
     Returns
     -------
-    E
+    E : float or :class:`numpy.array`
         The total energy of the cell in Wh
     """
-    n_vals = np.linspace(n_i, n_f, num=points)
-    p_vals = np.linspace(p_i, p_f, num=points)
-    # Calculate OCV at each stoichiometry
-    param = pybamm.LithiumIonParameters()
-    T = param.T_amb(0)
-    Vs = np.empty(n_vals.shape)
-    for i in range(n_vals.size):
-        Vs[i] = (
-            parameter_values.evaluate(param.p.prim.U(p_vals[i], T)).item()
-            - parameter_values.evaluate(param.n.prim.U(n_vals[i], T)).item()
-        )
-    # Calculate dQ
-    Q_p = parameter_values.evaluate(param.p.prim.Q_init) * (p_f - p_i)
-    dQ = Q_p / (points - 1)
-    # Integrate and convert to W-h
-    E = np.trapz(Vs, dx=dQ)
-    return E
+    esoh_solver = ElectrodeSOHSolver(parameter_values)
+    return esoh_solver.theoretical_energy_integral(n_i, n_f, p_i, p_f, points=points)
 
 
 def calculate_theoretical_energy(
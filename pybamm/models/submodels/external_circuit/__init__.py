@@ -9,5 +9,6 @@ from .function_control_external_circuit import (
     VoltageFunctionControl,
     PowerFunctionControl,
     ResistanceFunctionControl,
+    SwitchedFunctionControl,
     CCCVFunctionControl,
 )
@@ -136,6 +136,35 @@ class ResistanceFunctionControl(FunctionControl):
             return -K_R * (R - R_applied)
 
 
+class SwitchedFunctionControl(FunctionControl):
+    """
+    External circuit whose control is switched between current, voltage and power by
+    the parameters "Current switch", "Voltage switch" and "Power switch", implemented
+    as an extra algebraic equation. Exactly one of the switches should be 1, and the
+    others 0. The applied current, voltage and power are given by the parameters
+    "Applied current function [A]", "Voltage function [V]" and "Power function [W]".
+
+    Setting the switches and applied values as input parameters allows a single model
+    to be used for all the steps of an experiment.
+    """
+
+    def __init__(self, param, options):
+        super().__init__(param, self.switched_control, options, control="algebraic")
+
+    def switched_control(self, variables):
+        I = variables["Current [A]"]
+        V = variables["Voltage [V]"]
+        inputs = {"Time [s]": pybamm.t}
+        I_applied = pybamm.FunctionParameter("Applied current function [A]", inputs)
+        V_applied = pybamm.FunctionParameter("Voltage function [V]", inputs)
+        P_applied = pybamm.FunctionParameter("Power function [W]", inputs)
+        return (
+            pybamm.Parameter("Current switch") * (I - I_applied)
+            + pybamm.Parameter("Voltage switch") * (V - V_applied)
+            + pybamm.Parameter("Power switch") * (V * I - P_applied)
+        )
+
+
 class CCCVFunctionControl(FunctionControl):
     """
     External circuit with constant-current constant-voltage control, as implemented in
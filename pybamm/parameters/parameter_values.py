@@ -394,6 +394,9 @@ class ParameterValues:
 
         model.events = new_events
 
+        if pybamm.settings.intern_symbols:
+            pybamm.SymbolInterner().intern_model(model)
+
         pybamm.logger.info("Finish setting parameters for {}".format(model.name))
 
         return model
@@ -6,6 +6,7 @@
 class Settings(object):
     _debug_mode = False
     _simplify = True
+    _intern_symbols = False
     _min_smoothing = "exact"
     _max_smoothing = "exact"
     _heaviside_smoothing = "exact"
@@ -42,6 +43,19 @@ class Settings(object):
         assert isinstance(value, bool)
         self._simplify = value
 
+    @property
+    def intern_symbols(self):
+        """
+        Whether to intern the expressions of models when their parameters are set
+        and when they are discretised (see :class:`pybamm.SymbolInterner`)
+        """
+        return self._intern_symbols
+
+    @intern_symbols.setter
+    def intern_symbols(self, value):
+        assert isinstance(value, bool)
+        self._intern_symbols = value
+
     def set_smoothing_parameters(self, k):
         "Helper function to set all smoothing parameters"
         self.min_smoothing = k
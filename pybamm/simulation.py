@@ -3,12 +3,15 @@
 #
 import pickle
 import pybamm
+import numbers
+import multiprocessing as mp
 import numpy as np
 import copy
 import warnings
 import sys
 from functools import lru_cache
 from datetime import timedelta
+from pybamm.solvers.lrudict import LRUDict
 import tqdm
 
 
@@ -30,6 +33,240 @@ def is_notebook():
         return False  # Probably standard Python interpreter
 
 
+def _build_experiment_model(disc, solver, model, inputs, check_model):
+    """
+    Discretise `model` and, if values are given for all of its inputs, set it up with
+    `solver`. Used to build the models of an experiment in separate processes (see
+    :meth:`Simulation.build_for_experiment`).
+    """
+    built_model = disc.process_model(model, inplace=True, check_model=check_model)
+    if all(param.name in inputs for param in built_model.input_parameters):
+        model_inputs = solver._set_up_model_inputs(built_model, inputs)
+        solver.set_up(built_model, model_inputs)
+        solver._model_set_up.update(
+            {
+                built_model: {
+                    "initial conditions": built_model.concatenated_initial_conditions
+                }
+            }
+        )
+    return built_model, solver
+
+
+def _get_final_time(solution):
+    """
+    Return the last time of `solution`, without concatenating the times of all of
+    its sub-solutions as `solution.t` does
+    """
+    if isinstance(solution, pybamm.EmptySolution):
+        return solution.t[-1]
+    return solution.all_ts[-1][-1]
+
+
+class _CycleSkipping:
+    """
+    Bookkeeping for the `cycle_skipping` option of :meth:`Simulation.solve`.
+
+    Once two consecutive, identical cycles have been simulated, the state at the end
+    of the last one is extrapolated linearly over the next cycles, which are
+    skipped. The number of cycles skipped is the largest for which the error of the
+    extrapolation, estimated from the curvature of the summary variables over the
+    last three simulated cycles, is within tolerance, and for which the extrapolated
+    capacity and minimum voltage do not reach the stopping conditions of the
+    experiment (which are only checked on simulated cycles). Once the cycle after a
+    jump has been simulated, the summary variables and first states of the skipped
+    cycles are interpolated.
+    """
+
+    default_options = {
+        "variables": None,
+        "rtol": 1e-3,
+        "atol": 1e-6,
+        "max skipped cycles": 100,
+    }
+
+    def __init__(self, options, model, experiment, cycle_offset, save_at_cycles):
+        self.options = {**self.default_options, **options}
+        self.variables = self.options["variables"] or model.summary_variables
+        self.cycle_offset = cycle_offset
+        self.save_at_cycles = save_at_cycles
+
+        # Two cycles can only be extrapolated across if they have the same steps,
+        # none of which start at a given time of day
+        self.cycle_keys = []
+        idx = 0
+        for cycle_length in experiment.cycle_lengths:
+            steps = experiment.operating_conditions_steps[idx : idx + cycle_length]
+            idx += cycle_length
+            if any(
+                step.start_time is not None or step.next_start_time is not None
+                for step in steps
+            ):
+                self.cycle_keys.append(None)
+            else:
+                self.cycle_keys.append(tuple(repr(step) for step in steps))
+
+        # (cycle number, summary variables, last state, first state) of the last
+        # three simulated cycles
+        self.history = []
+        # (number of cycles skipped, summary variables, first state) of the cycle
+        # before the last jump, until the cycle after it has been simulated
+        self.jump = None
+
+    def _same_cycle(self, cycle_num, other_cycle_num):
+        if other_cycle_num > len(self.cycle_keys):
+            return False
+        key = self.cycle_keys[cycle_num - 1]
+        return key is not None and key == self.cycle_keys[other_cycle_num - 1]
+
+    def _must_save(self, cycle_num):
+        cycle_num += self.cycle_offset
+        if isinstance(self.save_at_cycles, list):
+            return cycle_num in self.save_at_cycles
+        elif isinstance(self.save_at_cycles, int):
+            return cycle_num % self.save_at_cycles == 0
+        return False
+
+    def _max_skipped_cycles(self):
+        """
+        Largest number of cycles n such that the error of extrapolating the summary
+        variables linearly over n cycles, n * (n + 1) times their second divided
+        difference over the last three simulated cycles, is within tolerance
+        """
+        (c0, s0, _, _), (c1, s1, _, _), (c2, s2, _, _) = self.history
+        rtol, atol = self.options["rtol"], self.options["atol"]
+        n_max = self.options["max skipped cycles"]
+        for name in self.variables:
+            if name not in s2:
+                continue
+            divided_difference = abs(
+                ((s2[name] - s1[name]) / (c2 - c1) - (s1[name] - s0[name]) / (c1 - c0))
+                / (c2 - c0)
+            )
+            if divided_difference > 0:
+                tol = atol + rtol * abs(s2[name])
+                n = (np.sqrt(1 + 4 * tol / divided_difference) - 1) / 2
+                n_max = min(n_max, int(n))
+        return n_max
+
+    def _max_cycles_before_stop(self, stop_conditions):
+        """
+        Largest number of cycles n such that none of the summary variables in
+        `stop_conditions`, extrapolated linearly over the next n cycles from the last
+        two simulated cycles, reaches its stopping value, so that the experiment
+        stops at the latest on the cycle simulated after the jump
+        """
+        (c1, s1, _, _), (c2, s2, _, _) = self.history[1:]
+        n_max = np.inf
+        for name, stop in stop_conditions.items():
+            if stop is None or name not in s2:
+                continue
+            slope = (s2[name] - s1[name]) / (c2 - c1)
+            if slope < 0:
+                n = np.ceil((s2[name] - stop) / -slope) - 1
+                n_max = min(n_max, max(int(n), 0))
+        return n_max
+
+    def skip_cycles(
+        self, cycle_num, solution, summary_variables, first_state, stop_conditions
+    ):
+        """
+        Called at the end of each simulated cycle. Returns the number of cycles to
+        skip and the solution to carry on from. `stop_conditions` maps summary
+        variables to the values at or below which the experiment stops.
+        """
+        last_state = solution.last_state
+        self.history = self.history[-2:] + [
+            (cycle_num, summary_variables, last_state, first_state)
+        ]
+        if (
+            len(self.history) < 3
+            or self.history[1][0] != cycle_num - 1
+            or not all(
+                self._same_cycle(cycle_num, c) for c, _, _, _ in self.history[:2]
+            )
+        ):
+            return 0, solution
+
+        # Skip identical cycles that do not need to be saved, as long as the cycle
+        # after the jump is identical too
+        n_max = min(
+            self._max_skipped_cycles(), self._max_cycles_before_stop(stop_conditions)
+        )
+        n = 0
+        while (
+            n < n_max
+            and not self._must_save(cycle_num + n + 1)
+            and self._same_cycle(cycle_num, cycle_num + n + 2)
+        ):
+            n += 1
+        previous_state = self.history[1][2]
+        y = np.array(last_state.all_ys[0])[:, -1]
+        y_previous = np.array(previous_state.all_ys[0])[:, -1]
+        if n == 0 or y.shape != y_previous.shape:
+            return 0, solution
+
+        t = last_state.t[-1]
+        dt = t - previous_state.t[-1]
+        jump_solution = pybamm.Solution(
+            np.array([t + n * dt]),
+            (y + n * (y - y_previous))[:, np.newaxis],
+            last_state.all_models[-1],
+            last_state.all_inputs[-1],
+            None,
+            None,
+            # not "final time", so that consistent initial conditions are always
+            # calculated for the extrapolated state
+            "skipped cycles [experiment]",
+        )
+        self.jump = (n, summary_variables, first_state)
+        pybamm.logger.notice(
+            "Skipping cycles {} to {}".format(
+                cycle_num + self.cycle_offset + 1, cycle_num + self.cycle_offset + n
+            )
+        )
+        return n, jump_solution
+
+    def interpolate_skipped_cycles(self, summary_variables, first_state):
+        """
+        Called at the end of each simulated cycle, before it is stored. Returns the
+        summary variables and first states of the cycles skipped just before it.
+        """
+        if self.jump is None:
+            return [], []
+        n, start_summary_variables, start_first_state = self.jump
+        self.jump = None
+
+        all_summary_variables = []
+        all_first_states = []
+        t_start = start_first_state.t[0]
+        y_start = np.array(start_first_state.all_ys[0])[:, 0]
+        t_end = first_state.t[0]
+        y_end = np.array(first_state.all_ys[0])[:, 0]
+        for j in range(1, n + 1):
+            w = j / (n + 1)
+            all_summary_variables.append(
+                pybamm.FuzzyDict(
+                    {
+                        name: value + w * (summary_variables[name] - value)
+                        for name, value in start_summary_variables.items()
+                    }
+                )
+            )
+            all_first_states.append(
+                pybamm.Solution(
+                    np.array([t_start + w * (t_end - t_start)]),
+                    (y_start + w * (y_end - y_start))[:, np.newaxis],
+                    first_state.all_models[0],
+                    first_state.all_inputs[0],
+                    None,
+                    None,
+                    "final time",
+                )
+            )
+        return all_summary_variables, all_first_states
+
+
 class Simulation:
     """A Simulation class for easy building and running of PyBaMM simulations.
 
@@ -59,6 +296,22 @@ class Simulation:
         A list of variables to plot automatically
     C_rate: float (optional)
         The C-rate at which you would like to run a constant current (dis)charge.
+    single_experiment_model: bool (optional)
+        If True, all the steps of the experiment are simulated with a single model,
+        where the type of control (current, voltage or power), its value, the ambient
+        temperature and the cut-offs are input parameters (see
+        :class:`pybamm.external_circuit.SwitchedFunctionControl`). The model is then
+        built, and set up by the solver, only once, whatever the number of different
+        steps in the experiment. As the current is then always an algebraic variable,
+        the solver must be able to solve DAEs. Drive cycles still use their own model.
+        Default is False, in which case a model is built for each group of steps with
+        the same type of control and terminations.
+    build_cache: :class:`pybamm.BuildCache` (optional)
+        A cache of built models and set-up solvers. If given, :meth:`build` loads
+        the built model, the mesh and the set-up solver (which then replaces
+        `solver`) from the cache if they were cached before, and they are added to
+        the cache after the first solve otherwise. Not used for experiments or
+        models in the "python" format.
     """
 
     def __init__(
@@ -73,6 +326,8 @@ class Simulation:
         solver=None,
         output_variables=None,
         C_rate=None,
+        single_experiment_model=False,
+        build_cache=None,
     ):
         self.parameter_values = parameter_values or model.default_parameter_values
         self._unprocessed_parameter_values = self.parameter_values
@@ -112,6 +367,12 @@ class Simulation:
             self.operating_mode = "with experiment"
             # Save the experiment
             self.experiment = experiment.copy()
+        self.single_experiment_model = single_experiment_model
+        self.build_cache = build_cache
+        self._build_cache_key = None
+        # values of the input parameters used by `solve` and `step` unless others are
+        # given (set by BatchStudy for simulations that share a built model)
+        self._default_inputs = {}
 
         self._unprocessed_model = model
         self.model = model
@@ -202,25 +463,42 @@ class Simulation:
     def set_up_and_parameterise_model_for_experiment(self):
         """
         Set up self.model to be able to run the experiment (new version).
-        In this version, a new model is created for each step.
+        In this version, a new model is created for each group of steps that only
+        differ by the values of their control, ambient temperature and terminations
+        (e.g. discharges at different C-rates, and rests). These values are input
+        parameters of the model, whose values for each step are stored in
+        `self.experiment_unique_steps_to_inputs`, so that the steps of a group share
+        the same parameterised and discretised model, and the same solver.
 
         This increases set-up time since several models to be processed, but
-        reduces simulation time since the model formulation is efficient.
+        reduces simulation time since the model formulation is efficient. If
+        `self.single_experiment_model` is True, the type of control is also an input,
+        so that all the steps share a single model.
         """
         self.experiment_unique_steps_to_model = {}
+        self.experiment_unique_steps_to_inputs = {}
+        self._original_temperature = self.parameter_values["Ambient temperature [K]"]
+        models_by_group = {}
         for op_number, op in enumerate(self.experiment.unique_steps):
+            group, step_inputs = self.get_experiment_step_group(op)
+            self.experiment_unique_steps_to_inputs[repr(op)] = step_inputs
+            if group in models_by_group:
+                self.experiment_unique_steps_to_model[repr(op)] = models_by_group[group]
+                continue
+
             new_model = self.model.new_copy()
             new_parameter_values = self.parameter_values.copy()
-
-            if op.type != "current":
-                # Voltage or power control
+            if "Current switch" in step_inputs or op.type != "current":
+                # Switched, voltage or power control
                 # Create a new model where the current density is now a variable
                 # To do so, we replace all instances of the current density in the
                 # model with a current density variable, which is obtained from the
                 # FunctionControl submodel
                 # check which kind of external circuit model we need (differential
                 # or algebraic)
-                if op.type == "voltage":
+                if "Current switch" in step_inputs:
+                    submodel_class = pybamm.external_circuit.SwitchedFunctionControl
+                elif op.type == "voltage":
                     submodel_class = pybamm.external_circuit.VoltageFunctionControl
                 elif op.type == "power":
                     submodel_class = pybamm.external_circuit.PowerFunctionControl
@@ -243,12 +521,20 @@ class Simulation:
                 new_parameter_values["Current function [A]"] = submodel.variables[
                     "Current [A]"
                 ]
-            self.update_new_model_events(new_model, op)
+            self.update_new_model_events(new_model, op, inputs=step_inputs)
             # Update parameter values
-            self._original_temperature = new_parameter_values["Ambient temperature [K]"]
             experiment_parameter_values = self.get_experiment_parameter_values(
                 op, op_number
             )
+            if "Current switch" in step_inputs:
+                # The control is set by the inputs of the switched submodel
+                del experiment_parameter_values[
+                    f"{op.type.capitalize()} function {op.unit}"
+                ]
+            # Values that differ between the steps of the group are input parameters
+            experiment_parameter_values.update(
+                {name: "[input]" for name in step_inputs}
+            )
             new_parameter_values.update(
                 experiment_parameter_values, check_already_exists=False
             )
@@ -256,13 +542,26 @@ class Simulation:
                 new_model, inplace=False
             )
             self.experiment_unique_steps_to_model[repr(op)] = parameterised_model
+            models_by_group[group] = parameterised_model
 
         # Set up rest model if experiment has start times
-        if self.experiment.initial_start_time:
+        self.experiment_unique_steps_to_inputs["Rest for padding"] = {}
+        if self.experiment.initial_start_time and self.single_experiment_model:
+            group, step_inputs = self.get_experiment_step_group(pybamm.step.rest())
+            if group in models_by_group and "Ambient temperature [K]" in step_inputs:
+                # The ambient temperature is set when stepping
+                del step_inputs["Ambient temperature [K]"]
+                self.experiment_unique_steps_to_inputs["Rest for padding"] = step_inputs
+                self.experiment_unique_steps_to_model[
+                    "Rest for padding"
+                ] = models_by_group[group]
+        if (
+            self.experiment.initial_start_time
+            and "Rest for padding" not in self.experiment_unique_steps_to_model
+        ):
             new_model = self.model.new_copy()
             # Update parameter values
             new_parameter_values = self.parameter_values.copy()
-            self._original_temperature = new_parameter_values["Ambient temperature [K]"]
             new_parameter_values.update(
                 {"Current function [A]": 0, "Ambient temperature [K]": "[input]"},
                 check_already_exists=False,
@@ -274,13 +573,128 @@ class Simulation:
                 "Rest for padding"
             ] = parameterised_model
 
-    def update_new_model_events(self, new_model, op):
+    def get_experiment_step_group(self, op):
+        """
+        Find the group of steps that can share a model with `op`, and the values of
+        `op` that are passed to this model as input parameters.
+
+        Steps are grouped by the type of control, the type (and for voltage
+        terminations, the direction) of each termination and whether the ambient
+        temperature is an input. If `self.single_experiment_model` is True, the type
+        of control and terminations are also inputs, so that current, voltage and
+        power steps are all in the same group. Drive cycles, and steps with several
+        terminations of the same type, are not grouped with any other step.
+
+        Parameters
+        ----------
+        op : :class:`pybamm.step._Step`
+            The experiment step
+
+        Returns
+        -------
+        group : hashable
+            Key identifying the group of steps
+        inputs : dict
+            The values of the inputs of the model for this step
+        """
+        term_types = [term["type"] for term in op.termination]
+        if not isinstance(op.value, numbers.Number) or len(set(term_types)) < len(
+            term_types
+        ):
+            return repr(op), {}
+
+        single_model = self.single_experiment_model and op.type in [
+            "current",
+            "voltage",
+            "power",
+        ]
+        if single_model:
+            inputs = {
+                "Current switch": float(op.type == "current"),
+                "Voltage switch": float(op.type == "voltage"),
+                "Power switch": float(op.type == "power"),
+                "Applied current function [A]": 0,
+                "Voltage function [V]": 0,
+                "Power function [W]": 0,
+                "Current cut-off switch": 0,
+                "Current cut-off [A]": 0,
+                "Voltage cut-off direction": 0,
+                "Voltage cut-off [V]": 0,
+            }
+            if op.type == "current":
+                inputs["Applied current function [A]"] = op.value
+            else:
+                inputs[f"{op.type.capitalize()} function {op.unit}"] = op.value
+        else:
+            inputs = {f"{op.type.capitalize()} function {op.unit}": op.value}
+        if op.temperature is not None or isinstance(
+            self._original_temperature, numbers.Number
+        ):
+            inputs["Ambient temperature [K]"] = (
+                op.temperature or self._original_temperature
+            )
+        terminations = []
         for term in op.termination:
             if term["type"] == "current":
+                inputs["Current cut-off [A]"] = term["value"]
+                terminations.append("current")
+                if single_model:
+                    inputs["Current cut-off switch"] = 1
+            elif term["type"] == "voltage":
+                inputs["Voltage cut-off [V]"] = term["value"]
+                terminations.append(("voltage", int(np.sign(op.value))))
+                if single_model:
+                    inputs["Voltage cut-off direction"] = float(np.sign(op.value))
+        if single_model:
+            group = ("single model", tuple(inputs))
+        else:
+            group = (op.type, tuple(sorted(terminations, key=str)), tuple(inputs))
+        return group, inputs
+
+    def update_new_model_events(self, new_model, op, inputs=None):
+        inputs = inputs or {}
+        if "Voltage cut-off direction" in inputs:
+            # Single model: the cut-offs are switched on and off by the inputs, and
+            # evaluate to 1 when they are off
+            current_switch = pybamm.InputParameter("Current cut-off switch")
+            direction = pybamm.InputParameter("Voltage cut-off direction")
+            new_model.events.extend(
+                [
+                    pybamm.Event(
+                        "Current cut-off [A] [experiment]",
+                        current_switch
+                        * (
+                            abs(new_model.variables["Current [A]"])
+                            - pybamm.InputParameter("Current cut-off [A]")
+                        )
+                        + 1
+                        - current_switch,
+                    ),
+                    pybamm.Event(
+                        "Voltage cut-off [V] [experiment]",
+                        direction
+                        * (
+                            new_model.variables["Battery voltage [V]"]
+                            - pybamm.InputParameter("Voltage cut-off [V]")
+                        )
+                        + 1
+                        - abs(direction),
+                    ),
+                ]
+            )
+            terminations = []
+        else:
+            terminations = op.termination
+        for term in terminations:
+            if term["type"] == "current":
+                if "Current cut-off [A]" in inputs:
+                    value = pybamm.InputParameter("Current cut-off [A]")
+                else:
+                    value = term["value"]
                 new_model.events.append(
                     pybamm.Event(
                         "Current cut-off [A] [experiment]",
-                        abs(new_model.variables["Current [A]"]) - term["value"],
+                        abs(new_model.variables["Current [A]"]) - value,
                     )
                 )
 
@@ -299,17 +713,17 @@ class Simulation:
                     name = "Discharge"
                 else:
                     name = "Charge"
+                if "Voltage cut-off [V]" in inputs:
+                    value = pybamm.InputParameter("Voltage cut-off [V]")
+                else:
+                    value = term["value"]
                 if sign != 0:
                     # Event should be positive at initial conditions for both
                     # charge and discharge
                     new_model.events.append(
                         pybamm.Event(
                             f"{name} voltage cut-off [V] [experiment]",
-                            sign
-                            * (
-                                new_model.variables["Battery voltage [V]"]
-                                - term["value"]
-                            ),
+                            sign * (new_model.variables["Battery voltage [V]"] - value),
                         )
                     )
 
@@ -404,6 +818,18 @@ class Simulation:
             self._model_with_set_params = self.model
             self._built_model = self.model
         else:
+            if (
+                self.build_cache is not None
+                and self.model.convert_to_format != "python"
+            ):
+                self._build_cache_key = None
+                self._build_cache_key = self.get_build_cache_key()
+                cached = self.build_cache.load(self._build_cache_key)
+                if cached is not None:
+                    pybamm.logger.info(f"Loaded {self.model.name} from build cache")
+                    self._built_model, self._mesh, self._solver = cached
+                    self._model_with_set_params = self._built_model
+                    return
             self.set_parameters()
             self._mesh = pybamm.Mesh(self._geometry, self._submesh_types, self._var_pts)
             self._disc = pybamm.Discretisation(self._mesh, self._spatial_methods)
@@ -413,10 +839,72 @@ class Simulation:
             # rebuilt model so clear solver setup
             self._solver._model_set_up = {}
 
-    def build_for_experiment(self, check_model=True, initial_soc=None):
+    def get_build_cache_key(self):
+        """
+        Return the key of this simulation's built model in `self.build_cache`. The
+        key depends on the equations and options of the model, the parameter values,
+        the geometry, the number of points, the submesh types, the spatial methods
+        and the solver. Once the model has been built, the key it was built with is
+        returned.
+        """
+        if self._build_cache_key is not None:
+            return self._build_cache_key
+        return pybamm.BuildCache.key(*self._get_build_settings(), self._solver)
+
+    def _get_build_settings(self):
+        """
+        The objects that determine the built model, apart from the solver: the
+        model's equations and options, the parameter values and the mesh settings
+        """
+        model = self._unprocessed_model
+        return (
+            type(model),
+            model.name,
+            getattr(model, "options", None),
+            model.rhs,
+            model.algebraic,
+            model.initial_conditions,
+            model.boundary_conditions,
+            model.variables,
+            model.events,
+            model.convert_to_format,
+            model.use_jacobian,
+            self._parameter_values,
+            self._geometry,
+            self._var_pts,
+            self._submesh_types,
+            self._spatial_methods,
+        )
+
+    def build_for_experiment(
+        self, check_model=True, initial_soc=None, nproc=None, inputs=None
+    ):
         """
         Similar to :meth:`Simulation.build`, but for the case of simulating an
         experiment, where there may be several models and solvers to build.
+
+        Parameters
+        ----------
+        check_model : bool, optional
+            If True, model checks are performed after discretisation (see
+            :meth:`pybamm.Discretisation.process_model`). Default is True.
+        initial_soc : float, optional
+            Initial State of Charge (SOC) for the simulation. Must be between 0 and 1.
+            If given, overwrites the initial concentrations provided in the parameter
+            set.
+        nproc : int, optional
+            Number of processes to use to build the models of the experiment. If
+            greater than 1, each model is discretised, checked and set up by its
+            solver (including the generation of the CasADi functions) in a separate
+            process, and the built models and solvers are sent back to this process.
+            Parameters are still set in this process, as parameter values may
+            contain functions that cannot be pickled. If None (default) or 1, the
+            models are discretised one after the other, and set up by their solver
+            when they are first solved.
+        inputs : dict, optional
+            Values of the user-defined input parameters, used to set up the models
+            when `nproc` is greater than 1. Models with input parameters that are not
+            given are set up when they are first solved.
         """
         if initial_soc is not None:
             self.set_initial_soc(initial_soc)
@@ -433,18 +921,59 @@ class Simulation:
             self._mesh = pybamm.Mesh(self._geometry, self._submesh_types, self._var_pts)
             self._disc = pybamm.Discretisation(self._mesh, self._spatial_methods)
             # Process all the different models
+            # Steps of the same group share their model, which is only discretised
+            # (and later set up by the solver) once
+            models_with_set_params = {}
+            for (
+                op_cond,
+                model_with_set_params,
+            ) in self.experiment_unique_steps_to_model.items():
+                if model_with_set_params not in models_with_set_params:
+                    models_with_set_params[model_with_set_params] = {
+                        **(inputs or {}),
+                        **self.experiment_unique_steps_to_inputs[op_cond],
+                        "start time": 0,
+                    }
+
+            if nproc is not None and nproc > 1 and len(models_with_set_params) > 1:
+                with mp.Pool(processes=min(nproc, len(models_with_set_params))) as p:
+                    built = p.starmap(
+                        _build_experiment_model,
+                        [
+                            (
+                                self._disc,
+                                self.solver.copy(),
+                                model,
+                                model_inputs,
+                                check_model,
+                            )
+                            for model, model_inputs in models_with_set_params.items()
+                        ],
+                    )
+                    p.close()
+                    p.join()
+            else:
+                # It's ok to modify the models with set parameters in place as they
+                # are not returned anywhere
+                built = [
+                    (
+                        self._disc.process_model(
+                            model, inplace=True, check_model=check_model
+                        ),
+                        self.solver.copy(),
+                    )
+                    for model in models_with_set_params
+                ]
+            built_models_and_solvers = dict(zip(models_with_set_params, built))
+
             self.op_conds_to_built_models = {}
             self.op_conds_to_built_solvers = {}
             for (
                 op_cond,
                 model_with_set_params,
             ) in self.experiment_unique_steps_to_model.items():
-                # It's ok to modify the model with set parameters in place as it's
-                # not returned anywhere
-                built_model = self._disc.process_model(
-                    model_with_set_params, inplace=True, check_model=check_model
-                )
-                solver = self.solver.copy()
+                built_model, solver = built_models_and_solvers[model_with_set_params]
+                self.experiment_unique_steps_to_model[op_cond] = built_model
                 self.op_conds_to_built_solvers[op_cond] = solver
                 self.op_conds_to_built_models[op_cond] = built_model
 
@@ -459,6 +988,10 @@ class Simulation:
         initial_soc=None,
         callbacks=None,
         showprogress=False,
+        solution_store=None,
+        cycle_skipping=None,
+        checkpoint=None,
+        resume=False,
         **kwargs,
     ):
         """
@@ -510,13 +1043,63 @@ class Simulation:
             Whether to show a progress bar for cycling. If true, shows a progress bar
             for cycles. Has no effect when not used with an experiment.
             Default is False.
+        solution_store : :class:`pybamm.SolutionStore`, optional
+            If given, the times and states of the solution are written to this store
+            and read back from disk when needed, instead of being held in memory.
+            When using an experiment, each step is written to the store as soon as
+            it has been solved (steps of cycles that are not saved, see
+            `save_at_cycles`, are not stored). Default is None.
+        cycle_skipping : dict, optional
+            If given, cycles of an experiment are skipped to speed up long ageing
+            simulations. Once two consecutive, identical cycles have been simulated,
+            the state at the end of the next identical cycles is extrapolated
+            linearly from its change over the last cycle, and the simulation carries
+            on from the extrapolated state. The number of cycles skipped is adapted
+            from the error in the summary variables predicted for the cycle
+            simulated after each jump. Skipped cycles are not stored, and their
+            summary variables are interpolated between the simulated cycles. Cycles
+            in `save_at_cycles` are never skipped, and cycles are not skipped past
+            the capacity and voltage stopping conditions of the experiment. The
+            dictionary can be empty, or contain the following options:
+
+                - "variables": list of str
+                    The summary variables used to control the error. Default is
+                    the `summary_variables` of the model.
+                - "rtol": float
+                    Relative tolerance on the predicted summary variables.
+                    Default is 1e-3.
+                - "atol": float
+                    Absolute tolerance on the predicted summary variables.
+                    Default is 1e-6.
+                - "max skipped cycles": int
+                    Maximum number of cycles skipped at once. Default is 100.
+
+            Default is None, in which case every cycle is simulated.
+        checkpoint : :class:`pybamm.Checkpoint`, optional
+            If given, the progress of the experiment (the state at the end of the
+            last cycle, the summary variables and first states of the cycles, and
+            the number of cycles simulated) is written to this checkpoint at the
+            end of cycles, as set by the checkpoint. Cannot be used with
+            `starting_solution`. Default is None.
+        resume : bool, optional
+            If True and `checkpoint` has been written, continue the experiment
+            from the latest checkpoint instead of starting it again. The
+            solutions of the cycles simulated before the checkpoint are not
+            restored (their entries in `solution.cycles` are None), but their
+            summary variables are. The checkpoint must have been written by a
+            simulation with the same experiment, model, parameter values and mesh,
+            otherwise a ValueError is raised. Default is False.
         **kwargs
             Additional key-word arguments passed to `solver.solve`.
-            See :meth:`pybamm.BaseSolver.solve`.
+            See :meth:`pybamm.BaseSolver.solve`. When using an experiment, `nproc` is
+            instead the number of processes used to build the models of the
+            experiment (see :meth:`Simulation.build_for_experiment`).
         """
         # Setup
         if solver is None:
             solver = self.solver
+        if self._default_inputs:
+            kwargs["inputs"] = {**self._default_inputs, **(kwargs.get("inputs") or {})}
 
         callbacks = pybamm.callbacks.setup_callbacks(callbacks)
         logs = {}
@@ -528,6 +1111,15 @@ class Simulation:
                     "'save_at_cycles' option can only be used if simulating an "
                     "Experiment "
                 )
+            if cycle_skipping is not None:
+                raise ValueError(
+                    "'cycle_skipping' option can only be used if simulating an "
+                    "Experiment"
+                )
+            if checkpoint is not None:
+                raise ValueError(
+                    "'checkpoint' option can only be used if simulating an Experiment"
+                )
             if starting_solution is not None:
                 raise ValueError(
                     "starting_solution can only be provided if simulating an Experiment"
@@ -594,10 +1186,39 @@ class Simulation:
                         )
 
             self._solution = solver.solve(self.built_model, t_eval, **kwargs)
+            if (
+                self._build_cache_key is not None
+                and solver is self._solver
+                and self._build_cache_key not in self.build_cache
+            ):
+                # The integrators are not cached: they are much larger than the
+                # set-up model, and are quicker to create again than to load
+                solver = solver.copy()
+                if isinstance(solver, pybamm.CasadiSolver):
+                    solver.integrators = LRUDict(maxsize=solver.integrators_maxcount)
+                    solver.integrator_specs = LRUDict(
+                        maxsize=solver.integrators_maxcount
+                    )
+                    solver.y_sols = {}
+                solver._model_set_up = self._solver._model_set_up
+                self.build_cache.save(
+                    self._build_cache_key, (self.built_model, self._mesh, solver)
+                )
+            if solution_store is not None:
+                if isinstance(self._solution, list):
+                    for solution in self._solution:
+                        solution_store.append(solution)
+                else:
+                    solution_store.append(self._solution)
 
         elif self.operating_mode == "with experiment":
             callbacks.on_experiment_start(logs)
-            self.build_for_experiment(check_model=check_model, initial_soc=initial_soc)
+            self.build_for_experiment(
+                check_model=check_model,
+                initial_soc=initial_soc,
+                nproc=kwargs.pop("nproc", None),
+                inputs=kwargs.get("inputs"),
+            )
             if t_eval is not None:
                 pybamm.logger.warning(
                     "Ignoring t_eval as solution times are specified by the experiment"
@@ -644,9 +1265,61 @@ class Simulation:
             all_first_states = starting_solution_first_states
             current_solution = starting_solution or pybamm.EmptySolution()
 
+            if checkpoint is not None and starting_solution is not None:
+                raise ValueError(
+                    "'checkpoint' cannot be used together with 'starting_solution'"
+                )
+            number_of_resumed_cycles = 0
+            if checkpoint is not None:
+                checkpoint_key = self._get_experiment_checkpoint_key()
+            if checkpoint is not None and resume and checkpoint.exists():
+                data = checkpoint.load()
+                if data["experiment"]["steps"] != checkpoint_key["steps"]:
+                    raise ValueError(
+                        "The checkpoint was written for a different experiment"
+                    )
+                if data["experiment"]["model"] != checkpoint_key["model"]:
+                    raise ValueError(
+                        "The checkpoint was written for a different model, "
+                        "parameter values or mesh"
+                    )
+                pybamm.logger.notice(
+                    "Resuming from checkpoint after cycle {}".format(
+                        data["number of cycles"]
+                    )
+                )
+                number_of_resumed_cycles = data["number of cycles"]
+                all_summary_variables = data["summary variables"]
+                all_first_states = [
+                    self._get_solution_from_checkpoint(state)
+                    for state in data["first states"]
+                ]
+                all_cycle_solutions = [None] * len(all_summary_variables)
+                current_solution = self._get_solution_from_checkpoint(
+                    data["last state"]
+                )
+                self._solution = current_solution
+            if checkpoint is not None:
+                checkpoint.reset()
+
+            if cycle_skipping is not None:
+                cycle_skipping = _CycleSkipping(
+                    cycle_skipping,
+                    self.model,
+                    self.experiment,
+                    cycle_offset,
+                    save_at_cycles,
+                )
+            # resumed cycles are skipped too
+            number_of_cycles_to_skip = number_of_resumed_cycles
+
             voltage_stop = self.experiment.termination.get("voltage")
             logs["stopping conditions"] = {"voltage": voltage_stop}
 
+            # Steps are repeated many times in long experiments, so everything that
+            # does not depend on the current state is looked up once per step
+            step_plan = {}
+
             idx = 0
             num_cycles = len(self.experiment.cycle_lengths)
             feasible = True  # simulation will stop if experiment is infeasible
@@ -659,6 +1332,11 @@ class Simulation:
                 ),
                 start=1,
             ):
+                if number_of_cycles_to_skip > 0:
+                    number_of_cycles_to_skip -= 1
+                    idx += cycle_length
+                    continue
+
                 logs["cycle number"] = (
                     cycle_num + cycle_offset,
                     num_cycles + cycle_offset,
@@ -673,7 +1351,7 @@ class Simulation:
                 save_this_cycle = (
                     # always save cycle 1
                     cycle_num == 1
-                    # None: save all cycles
+                    # None: save all cycles (that are simulated)
                     or save_at_cycles is None
                     # list: save all cycles in the list
                     or (
@@ -690,8 +1368,15 @@ class Simulation:
                     # Use 1-indexing for printing cycle number as it is more
                     # human-intuitive
                     op_conds = self.experiment.operating_conditions_steps[idx]
+                    if id(op_conds) not in step_plan:
+                        step_plan[id(op_conds)] = self._get_step_plan(
+                            op_conds, user_inputs
+                        )
+                    op_conds_str, model, solver, step_inputs, npts = step_plan[
+                        id(op_conds)
+                    ]
 
-                    start_time = current_solution.t[-1]
+                    start_time = _get_final_time(current_solution)
 
                     # If step has an end time, dt must take that into account
                     if op_conds.end_time:
@@ -705,22 +1390,16 @@ class Simulation:
                                 )
                             ).total_seconds(),
                         )
+                        # Make sure we take at least 2 timesteps
+                        npts = max(int(round(dt / op_conds.period)) + 1, 2)
                     else:
                         dt = op_conds.duration
-                    op_conds_str = str(op_conds)
-                    model = self.op_conds_to_built_models[repr(op_conds)]
-                    solver = self.op_conds_to_built_solvers[repr(op_conds)]
 
                     logs["step number"] = (step_num, cycle_length)
                     logs["step operating conditions"] = op_conds_str
                     callbacks.on_step_start(logs)
 
-                    kwargs["inputs"] = {
-                        **user_inputs,
-                        "start time": start_time,
-                    }
-                    # Make sure we take at least 2 timesteps
-                    npts = max(int(round(dt / op_conds.period)) + 1, 2)
+                    kwargs["inputs"] = {**step_inputs, "start time": start_time}
                     try:
                         step_solution = solver.step(
                             current_solution,
@@ -756,11 +1435,13 @@ class Simulation:
                             op_conds.next_start_time
                             - (
                                 self.experiment.initial_start_time
-                                + timedelta(seconds=float(step_solution.t[-1]))
+                                + timedelta(
+                                    seconds=float(_get_final_time(step_solution))
+                                )
                             )
                         ).total_seconds()
                         if rest_time > pybamm.settings.step_start_offset:
-                            start_time = step_solution.t[-1]
+                            start_time = _get_final_time(step_solution)
                             # Let me know if you have a better name
                             op_conds_str = "Rest for padding"
                             model = self.op_conds_to_built_models[op_conds_str]
@@ -775,6 +1456,7 @@ class Simulation:
                             )
                             kwargs["inputs"] = {
                                 **user_inputs,
+                                **self.experiment_unique_steps_to_inputs[op_conds_str],
                                 "Ambient temperature [K]": ambient_temp,
                                 "start time": start_time,
                             }
@@ -793,6 +1475,9 @@ class Simulation:
                             )
                             step_solution += step_solution_with_rest
 
+                    if solution_store is not None and save_this_cycle:
+                        solution_store.append(step_solution)
+
                     steps.append(step_solution)
 
                     cycle_solution = cycle_solution + step_solution
@@ -845,6 +1530,16 @@ class Simulation:
                         steps, esoh_solver=esoh_solver, save_this_cycle=save_this_cycle
                     )
                     cycle_solution, cycle_sum_vars, cycle_first_state = cycle_sol
+                    if cycle_skipping is not None:
+                        (
+                            skipped_sum_vars,
+                            skipped_first_states,
+                        ) = cycle_skipping.interpolate_skipped_cycles(
+                            cycle_sum_vars, cycle_first_state
+                        )
+                        all_cycle_solutions.extend([None] * len(skipped_sum_vars))
+                        all_summary_variables.extend(skipped_sum_vars)
+                        all_first_states.extend(skipped_first_states)
                     all_cycle_solutions.append(cycle_solution)
                     all_summary_variables.append(cycle_sum_vars)
                     all_first_states.append(cycle_first_state)
@@ -852,7 +1547,7 @@ class Simulation:
                     logs["summary variables"] = cycle_sum_vars
 
                 # Calculate capacity_start using the first cycle
-                if cycle_num == 1:
+                if cycle_num == number_of_resumed_cycles + 1:
                     # Note capacity_start could be defined as
                     # self.parameter_values["Nominal cell capacity [A.h]"] instead
                     if "capacity" in self.experiment.termination:
@@ -886,6 +1581,42 @@ class Simulation:
                 if feasible is False:
                     break
 
+                if checkpoint is not None and checkpoint.is_due():
+                    pybamm.logger.verbose(
+                        "Writing checkpoint after cycle {}".format(cycle_num)
+                    )
+                    checkpoint.save(
+                        {
+                            "experiment": checkpoint_key,
+                            "number of cycles": cycle_num,
+                            "last state": self._get_checkpoint_state(
+                                current_solution.last_state
+                            ),
+                            "summary variables": all_summary_variables,
+                            "first states": [
+                                self._get_checkpoint_state(first_state)
+                                for first_state in all_first_states
+                            ],
+                        }
+                    )
+
+                if cycle_skipping is not None:
+                    (
+                        number_of_cycles_to_skip,
+                        current_solution,
+                    ) = cycle_skipping.skip_cycles(
+                        cycle_num,
+                        current_solution,
+                        cycle_sum_vars,
+                        cycle_first_state,
+                        {
+                            "Capacity [A.h]": capacity_stop,
+                            "Minimum voltage [V]": voltage_stop[0]
+                            if voltage_stop is not None
+                            else None,
+                        },
+                    )
+
             if self.solution is not None and len(all_cycle_solutions) > 0:
                 self.solution.cycles = all_cycle_solutions
                 self.solution.set_summary_variables(all_summary_variables)
@@ -895,6 +1626,82 @@ class Simulation:
 
         return self.solution
 
+    def _get_step_plan(self, op_conds, user_inputs):
+        """
+        Return what is needed to solve the step `op_conds` of the experiment, and does
+        not change between cycles: the name of the step, its built model and solver,
+        its inputs (except the start time) and, if the step has no end time, the
+        number of points at which to return the solution
+        """
+        step_inputs = {
+            **user_inputs,
+            **self.experiment_unique_steps_to_inputs[repr(op_conds)],
+        }
+        if op_conds.end_time:
+            # depends on the start time of the step
+            npts = None
+        else:
+            # Make sure we take at least 2 timesteps
+            npts = max(int(round(op_conds.duration / op_conds.period)) + 1, 2)
+        return (
+            str(op_conds),
+            self.op_conds_to_built_models[repr(op_conds)],
+            self.op_conds_to_built_solvers[repr(op_conds)],
+            step_inputs,
+            npts,
+        )
+
+    def _get_experiment_checkpoint_key(self):
+        """
+        The steps of each cycle of the experiment and a digest of the model, the
+        parameter values and the mesh settings, to check checkpoints against, so
+        that a simulation is never resumed from an incompatible state
+        """
+        return {
+            "steps": [
+                [repr(step) for step in cycle]
+                for cycle in self.experiment.operating_conditions_cycles
+            ],
+            "model": pybamm.BuildCache.key(*self._get_build_settings()),
+        }
+
+    def _get_checkpoint_state(self, solution):
+        """
+        Return the first state of `solution` in the compact form written to
+        checkpoints: its time, state, the step whose model it was solved with, its
+        inputs and its termination
+        """
+        model = solution.all_models[0]
+        op_conds_str = next(
+            key
+            for key, built_model in self.op_conds_to_built_models.items()
+            if built_model is model
+        )
+        return (
+            solution.all_ts[0][0],
+            np.array(solution.all_ys[0])[:, 0],
+            op_conds_str,
+            solution.all_inputs[0],
+            solution.termination,
+        )
+
+    def _get_solution_from_checkpoint(self, state):
+        """Inverse of :meth:`Simulation._get_checkpoint_state`"""
+        t, y, op_conds_str, inputs, termination = state
+        solution = pybamm.Solution(
+            np.array([t]),
+            y[:, np.newaxis],
+            self.op_conds_to_built_models[op_conds_str],
+            inputs,
+            None,
+            None,
+            termination,
+        )
+        solution.solve_time = 0
+        solution.integration_time = 0
+        solution.set_up_time = 0
+        return solution
+
     def step(
         self, dt, solver=None, npts=2, save=True, starting_solution=None, **kwargs
     ):
@@ -928,6 +1735,8 @@ class Simulation:
 
         if starting_solution is None:
             starting_solution = self._solution
+        if self._default_inputs:
+            kwargs["inputs"] = {**self._default_inputs, **(kwargs.get("inputs") or {})}
 
         self._solution = solver.step(
             starting_solution, self.built_model, dt, npts=npts, save=save, **kwargs
@@ -56,6 +56,9 @@ class BaseSolver(object):
         self.root_method = root_method
         self.extrap_tol = extrap_tol or -1e-10
         self._model_set_up = {}
+        self.pool = None
+        self.output_mode = "t_eval"
+        self.output_tolerances = None
 
         # Defaults, can be overwritten by specific solver
         self.name = "Base solver"
@@ -211,6 +214,30 @@ class BaseSolver(object):
         model.rhs_algebraic_eval = rhs_algebraic
 
         model.terminate_events_eval = terminate_events
+        if model.convert_to_format == "casadi":
+            model.rhs_algebraic_events_eval = self._get_fused_function(
+                model, vars_for_processing
+            )
+        else:
+            model.rhs_algebraic_events_eval = None
+        if model.convert_to_format == "casadi" and len(terminate_events) > 0:
+            # all the termination events in one function, so that checking whether
+            # any of them has been crossed only takes one call
+            t_casadi, y_casadi, p_casadi = terminate_events[0].mx_in()
+            model.terminate_events_concatenated_eval = casadi.Function(
+                "terminate_events",
+                [t_casadi, y_casadi, p_casadi],
+                [
+                    casadi.vertcat(
+                        *[
+                            event(t_casadi, y_casadi, p_casadi)
+                            for event in terminate_events
+                        ]
+                    )
+                ],
+            )
+        else:
+            model.terminate_events_concatenated_eval = None
         model.discontinuity_events_eval = discontinuity_events
         model.interpolant_extrapolation_events_eval = interpolant_extrapolation_events
 
@@ -252,6 +279,41 @@ class BaseSolver(object):
 
         pybamm.logger.info("Finish solver set-up")
 
+    def _get_fused_function(self, model, vars_for_processing):
+        """
+        Return a single CasADi function of `t`, `y` and `p` whose outputs are the
+        right-hand sides and algebraic equations ("rhs_algebraic"), the termination
+        events ("events") and, if the model uses the Jacobian, the Jacobian of the
+        right-hand sides and algebraic equations ("jac_rhs_algebraic"). All the
+        outputs are built from the same CasADi graph, so that the intermediate nodes
+        that they have in common are only evaluated once when several outputs are
+        requested, and functions derived from it (e.g. by inlining it) share these
+        nodes.
+        """
+        casadi_expressions = vars_for_processing["casadi_expressions"]
+        rhs_algebraic, jac_rhs_algebraic = casadi_expressions["rhs_algebraic"]
+        events = [
+            casadi_expressions[f"event_{n}"][0]
+            for n, event in enumerate(model.events)
+            if event.event_type == pybamm.EventType.TERMINATION
+        ]
+        outputs = [rhs_algebraic, casadi.densify(casadi.vertcat(*events))]
+        output_names = ["rhs_algebraic", "events"]
+        if jac_rhs_algebraic is not None:
+            outputs.append(jac_rhs_algebraic)
+            output_names.append("jac_rhs_algebraic")
+        return casadi.Function(
+            "rhs_algebraic_events",
+            [
+                vars_for_processing["t_casadi"],
+                vars_for_processing["y_and_S"],
+                vars_for_processing["p_casadi_stacked"],
+            ],
+            outputs,
+            ["t", "y", "p"],
+            output_names,
+        )
+
     def _check_and_prepare_model_inplace(self, model, inputs, ics_only):
         """
         Performs checks on the model and prepares it for solving.
@@ -342,6 +404,12 @@ class BaseSolver(object):
                     "y_casadi": y_casadi,
                     "p_casadi": p_casadi,
                     "p_casadi_stacked": p_casadi_stacked,
+                    # converted symbols, shared by all the expressions of the model
+                    # so that common subexpressions are only converted once
+                    "casadi_symbols": {},
+                    # converted expressions and their Jacobians, by name, from which
+                    # the fused function is built
+                    "casadi_expressions": {},
                 }
             )
             # sensitivity vectors
@@ -650,6 +718,7 @@ class BaseSolver(object):
         initial_conditions=None,
         nproc=None,
         calculate_sensitivities=False,
+        pool=None,
     ):
         """
         Execute the solver setup and calculate the solution of the model at
@@ -677,6 +746,11 @@ class BaseSolver(object):
             If true, solver calculates sensitivities of all input parameters.
             If only a subset of sensitivities are required, can also pass a
             list of input parameter names
+        pool : :class:`pybamm.SolverPool`, optional
+            A persistent pool of worker processes to use when solving for more than
+            one set of input parameters. If None (default), `self.pool` is used if
+            it has been set, otherwise a new pool of `nproc` processes is created
+            for each call.
 
         Returns
         -------
@@ -730,6 +804,8 @@ class BaseSolver(object):
                     "initial time and tf is the final time, but has been provided "
                     "as a list of length {}.".format(len(t_eval))
                 )
+            elif self.output_mode == "solver steps":
+                t_eval = np.array(t_eval, dtype=float)
             else:
                 t_eval = np.linspace(t_eval[0], t_eval[-1], 100)
 
@@ -744,6 +820,7 @@ class BaseSolver(object):
         # with variable "input_list", which is a list of dictionaries.
         # If "inputs" is a single dict, "inputs_list" is a list of only one dict.
         inputs_list = inputs if isinstance(inputs, list) else [inputs]
+        pool = pool or self.pool
         model_inputs_list = [
             self._set_up_model_inputs(model, inputs) for inputs in inputs_list
         ]
@@ -863,18 +940,16 @@ class BaseSolver(object):
                     model_inputs_list[0],
                 )
                 new_solutions = [new_solution]
+            elif pool is not None:
+                new_solutions = pool.integrate(
+                    self, model, t_eval[start_index:end_index], model_inputs_list
+                )
             else:
-                with mp.Pool(processes=nproc) as p:
-                    new_solutions = p.starmap(
-                        self._integrate,
-                        zip(
-                            [model] * ninputs,
-                            [t_eval[start_index:end_index]] * ninputs,
-                            model_inputs_list,
-                        ),
-                    )
-                    p.close()
-                    p.join()
+                new_solutions = self._integrate_batch(
+                    model, t_eval[start_index:end_index], model_inputs_list, nproc
+                )
+            if self.output_tolerances is not None:
+                new_solutions = [self._thin_solution(sol) for sol in new_solutions]
             # Setting the solve time for each segment.
             # pybamm.Solution.__add__ assumes attribute solve_time.
             solve_time = timer.time()
@@ -891,7 +966,11 @@ class BaseSolver(object):
 
             if end_index != len(t_eval):
                 # setup for next integration subsection
-                last_state = solutions[0].y[:, -1]
+                if solutions[0].output_variables is None:
+                    last_state = solutions[0].y[:, -1]
+                else:
+                    # only the output variables were stored at each time point
+                    last_state = solutions[0].y_event[:, -1]
                 # update y0 (for DAE solvers, this updates the initial guess for the
                 # rootfinder)
                 model.y0 = last_state
@@ -960,6 +1039,106 @@ class BaseSolver(object):
         else:
             return solutions
 
+    def _integrate_batch(self, model, t_eval, inputs_list, nproc=None):
+        """
+        Integrate `model` for each set of inputs in `inputs_list`, using a new pool
+        of `nproc` processes. Solvers that can solve for several sets of inputs
+        natively should override this method.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model whose solution to calculate.
+        t_eval : numeric type
+            The times at which to compute the solution
+        inputs_list : list of dict
+            The input parameters to pass to the model, one dictionary per solve
+        nproc : int, optional
+            Number of processes to use. If None, uses the number of CPUs
+
+        Returns
+        -------
+        list of :class:`pybamm.Solution`
+            The solutions, in the same order as `inputs_list`
+        """
+        ninputs = len(inputs_list)
+        with mp.Pool(processes=nproc) as p:
+            solutions = p.starmap(
+                self._integrate,
+                zip([model] * ninputs, [t_eval] * ninputs, inputs_list),
+            )
+            p.close()
+            p.join()
+        return solutions
+
+    def _thin_solution(self, solution):
+        """
+        Drop the points of `solution` that are not needed to resolve the variables
+        in `self.output_tolerances` (a dictionary of {variable name: absolute
+        tolerance} pairs). A point is kept if any of these variables has changed by
+        more than its tolerance since the last point that was kept. The first and
+        last points of each sub-solution are always kept.
+
+        Parameters
+        ----------
+        solution : :class:`pybamm.Solution`
+            The solution to thin, as returned by `_integrate`
+
+        Returns
+        -------
+        :class:`pybamm.Solution`
+            The thinned solution
+        """
+        if solution.sensitivities:
+            raise pybamm.SolverError(
+                "output_tolerances cannot be used when calculating sensitivities"
+            )
+        n_t = len(solution.t)
+        scaled_values = np.vstack(
+            [
+                np.reshape(solution[name].entries, (-1, n_t)) / tol
+                for name, tol in self.output_tolerances.items()
+            ]
+        )
+
+        # always keep the first and last points of each sub-solution
+        keep = np.zeros(n_t, dtype=bool)
+        ends = np.cumsum([len(ts) for ts in solution.all_ts])
+        keep[0] = True
+        keep[ends - 1] = True
+        keep[ends[:-1]] = True
+
+        last_kept = scaled_values[:, 0]
+        for idx in range(1, n_t):
+            if keep[idx] or np.max(np.abs(scaled_values[:, idx] - last_kept)) > 1:
+                keep[idx] = True
+                last_kept = scaled_values[:, idx]
+
+        all_ts = []
+        all_ys = []
+        for ts, ys, start, end in zip(
+            solution.all_ts, solution.all_ys, np.concatenate([[0], ends]), ends
+        ):
+            idx = np.flatnonzero(keep[start:end]).tolist()
+            all_ts.append(ts[idx])
+            all_ys.append(ys[:, idx])
+
+        new_solution = pybamm.Solution(
+            all_ts,
+            all_ys,
+            solution.all_models,
+            solution.all_inputs,
+            solution.t_event,
+            solution.y_event,
+            solution.termination,
+            check_solution=False,
+            output_variables=solution.output_variables,
+        )
+        new_solution.closest_event_idx = solution.closest_event_idx
+        new_solution.dense_output = solution.dense_output
+        new_solution.integration_time = solution.integration_time
+        return new_solution
+
     def _get_discontinuity_start_end_indices(self, model, inputs, t_eval):
         if model.discontinuity_events_eval == []:
             pybamm.logger.verbose("No discontinuity events found")
@@ -1028,12 +1207,19 @@ class BaseSolver(object):
 
         if model.convert_to_format == "casadi":
             inputs = casadi.vertcat(*[x for x in inputs_dict.values()])
+            if model.terminate_events_concatenated_eval is not None:
+                # quick check, before finding which events are non-positive
+                events_eval = model.terminate_events_concatenated_eval(
+                    t_eval[0], model.y0, inputs
+                )
+                if np.all(events_eval.full() >= 0):
+                    return
 
         events_eval = [None] * num_terminate_events
         for idx, event in enumerate(model.terminate_events_eval):
             if model.convert_to_format == "casadi":
                 event_eval = event(t_eval[0], model.y0, inputs)
-            elif model.convert_to_format in ["python", "jax"]:
+            elif model.convert_to_format in ["python", "jax", "numba"]:
                 event_eval = event(t=t_eval[0], y=model.y0, inputs=inputs_dict)
             events_eval[idx] = event_eval
 
@@ -1075,6 +1261,7 @@ class BaseSolver(object):
         npts : int, optional
             The number of points at which the solution will be returned during
             the step dt. default is 2 (returns the solution at t0 and t0 + dt).
+            Ignored if the solver's `output_mode` is "solver steps".
         inputs : dict, optional
             Any input parameters to pass to the model when solving
         save : bool
@@ -1113,9 +1300,16 @@ class BaseSolver(object):
                 f"Step time must be at least {pybamm.TimerTime(step_start_offset)}"
             )
 
-        t_start = old_solution.t[-1]
+        if isinstance(old_solution, pybamm.EmptySolution):
+            t_start = old_solution.t[-1]
+        else:
+            # avoid concatenating the times of all the sub-solutions
+            t_start = old_solution.all_ts[-1][-1]
         t_end = t_start + dt
         # Calculate t_eval
+        if self.output_mode == "solver steps":
+            # the solution is returned at the solver's own steps
+            npts = 2
         t_eval = np.linspace(t_start, t_end, npts)
 
         if t_start == 0:
@@ -1157,6 +1351,7 @@ class BaseSolver(object):
                 "Start stepping {} with {}".format(model.name, self.name)
             )
 
+        continuing = False
         if isinstance(old_solution, pybamm.EmptySolution):
             if not first_step_this_model:
                 # reset y0 to original initial conditions
@@ -1164,7 +1359,12 @@ class BaseSolver(object):
         else:
             if old_solution.all_models[-1] == model:
                 # initialize with old solution
-                model.y0 = old_solution.all_ys[-1][:, -1]
+                model.y0 = old_solution.last_state.all_ys[0][:, -1]
+                # if the inputs are also unchanged, the state is already consistent
+                # and no event was triggered at the end of the previous step
+                continuing = old_solution.termination == "final time" and (
+                    _inputs_equal(old_solution.all_inputs[-1], model_inputs)
+                )
             else:
                 _, concatenated_initial_conditions = model.set_initial_conditions_from(
                     old_solution, return_type="ics"
@@ -1175,20 +1375,23 @@ class BaseSolver(object):
 
         set_up_time = timer.time()
 
-        # (Re-)calculate consistent initial conditions
-        self._set_initial_conditions(
-            model, t_start_shifted, model_inputs, update_rhs=False
-        )
+        if not continuing:
+            # (Re-)calculate consistent initial conditions
+            self._set_initial_conditions(
+                model, t_start_shifted, model_inputs, update_rhs=False
+            )
 
-        # Check initial conditions don't violate events
-        self._check_events_with_initial_conditions(t_eval, model, model_inputs)
+            # Check initial conditions don't violate events
+            self._check_events_with_initial_conditions(t_eval, model, model_inputs)
 
         # Step
-        pybamm.logger.verbose(
-            "Stepping for {:.0f} < t < {:.0f}".format(t_start_shifted, t_end)
-        )
+        # messages are only formatted if they are logged, as stepping is often
+        # repeated many times
+        pybamm.logger.verbose("Stepping for %.0f < t < %.0f", t_start_shifted, t_end)
         timer.reset()
         solution = self._integrate(model, t_eval, model_inputs)
+        if self.output_tolerances is not None:
+            solution = self._thin_solution(solution)
         solution.solve_time = timer.time()
 
         # Check if extrapolation occurred
@@ -1202,17 +1405,14 @@ class BaseSolver(object):
         solution.set_up_time = set_up_time
 
         # Report times
-        pybamm.logger.verbose("Finish stepping {} ({})".format(model.name, termination))
+        pybamm.logger.verbose("Finish stepping %s (%s)", model.name, termination)
         pybamm.logger.verbose(
-            (
-                "Set-up time: {}, Step time: {} (of which integration time: {}), "
-                "Total time: {}"
-            ).format(
-                solution.set_up_time,
-                solution.solve_time,
-                solution.integration_time,
-                solution.total_time,
-            )
+            "Set-up time: %s, Step time: %s (of which integration time: %s), "
+            "Total time: %s",
+            solution.set_up_time,
+            solution.solve_time,
+            solution.integration_time,
+            solution.total_time,
         )
 
         # Return solution
@@ -1365,6 +1565,14 @@ class BaseSolver(object):
         return ordered_inputs
 
 
+def _inputs_equal(inputs_1, inputs_2):
+    """Check whether two dictionaries of inputs have the same values"""
+    return inputs_1.keys() == inputs_2.keys() and all(
+        np.array_equal(np.ravel(inputs_1[key]), np.ravel(inputs_2[key]))
+        for key in inputs_1
+    )
+
+
 def process(symbol, name, vars_for_processing, use_jacobian=None):
     """
     Parameters
@@ -1379,17 +1587,20 @@ def process(symbol, name, vars_for_processing, use_jacobian=None):
     Returns
     -------
     func: :class:`pybamm.EvaluatorPython` or
+            :class:`pybamm.EvaluatorNumba` or
             :class:`pybamm.EvaluatorJax` or
             :class:`casadi.Function`
         evaluator for the function $f(y, t, p)$ given by `symbol`
 
     jac: :class:`pybamm.EvaluatorPython` or
+            :class:`pybamm.EvaluatorNumba` or
             :class:`pybamm.EvaluatorJaxJacobian` or
             :class:`casadi.Function`
         evaluator for the Jacobian $\frac{\partial f}{\partial y}$
         of the function given by `symbol`
 
     jacp: :class:`pybamm.EvaluatorPython` or
+            :class:`pybamm.EvaluatorNumba` or
             :class:`pybamm.EvaluatorJaxSensitivities` or
             :class:`casadi.Function`
         evaluator for the parameter sensitivities
@@ -1437,7 +1648,13 @@ def process(symbol, name, vars_for_processing, use_jacobian=None):
         y = vars_for_processing["y"]
         jacobian = vars_for_processing["jacobian"]
         # Process with pybamm functions, converting
-        # to python evaluator
+        # to python (or numba) evaluator
+        if model.convert_to_format == "numba":
+            language = "numba"
+            Evaluator = pybamm.EvaluatorNumba
+        else:
+            language = "python"
+            Evaluator = pybamm.EvaluatorPython
         if model.calculate_sensitivities:
             report(
                 (
@@ -1450,10 +1667,8 @@ def process(symbol, name, vars_for_processing, use_jacobian=None):
                 for p in model.calculate_sensitivities
             }
 
-            report(f"Converting sensitivities for {name} to python")
-            jacp_dict = {
-                p: pybamm.EvaluatorPython(jacp) for p, jacp in jacp_dict.items()
-            }
+            report(f"Converting sensitivities for {name} to {language}")
+            jacp_dict = {p: Evaluator(jacp) for p, jacp in jacp_dict.items()}
 
             # jacp should be a function that returns a dict of sensitivities
             def jacp(*args, **kwargs):
@@ -1465,16 +1680,16 @@ def process(symbol, name, vars_for_processing, use_jacobian=None):
         if use_jacobian:
             report(f"Calculating jacobian for {name}")
             jac = jacobian.jac(symbol, y)
-            report(f"Converting jacobian for {name} to python")
-            jac = pybamm.EvaluatorPython(jac)
+            report(f"Converting jacobian for {name} to {language}")
+            jac = Evaluator(jac)
             # cannot do jacobian action efficiently for now
             jac_action = None
         else:
             jac = None
             jac_action = None
 
-        report(f"Converting {name} to python")
-        func = pybamm.EvaluatorPython(symbol)
+        report(f"Converting {name} to {language}")
+        func = Evaluator(symbol)
 
     else:
         t_casadi = vars_for_processing["t_casadi"]
@@ -1487,7 +1702,12 @@ def process(symbol, name, vars_for_processing, use_jacobian=None):
         ]
         # Process with CasADi
         report(f"Converting {name} to CasADi")
-        casadi_expression = symbol.to_casadi(t_casadi, y_casadi, inputs=p_casadi)
+        casadi_expression = symbol.to_casadi(
+            t_casadi,
+            y_casadi,
+            inputs=p_casadi,
+            casadi_symbols=vars_for_processing["casadi_symbols"],
+        )
         # Add sensitivity vectors to the rhs and algebraic equations
         jacp = None
         if calculate_sensitivities_explicit:
@@ -1586,9 +1806,14 @@ def process(symbol, name, vars_for_processing, use_jacobian=None):
                 [jac_action_casadi],
             )
         else:
+            jac_casadi = None
             jac = None
             jac_action = None
 
+        vars_for_processing["casadi_expressions"][name] = (
+            casadi_expression,
+            jac_casadi,
+        )
         func = casadi.Function(
             name, [t_casadi, y_and_S, p_casadi_stacked], [casadi_expression]
         )
@@ -47,9 +47,15 @@ PYBIND11_MODULE(idaklu, m)
         py::arg("jac_bandwidth_lower"), py::arg("jac_bandwidth_upper"),
         py::arg("jac_action"), py::arg("mass_action"), py::arg("sens"),
         py::arg("events"), py::arg("number_of_events"), py::arg("rhs_alg_id"),
-        py::arg("atol"), py::arg("rtol"), py::arg("inputs"), py::arg("options"),
+        py::arg("atol"), py::arg("rtol"), py::arg("inputs"),
+        py::arg("var_casadi_fcns"), py::arg("options"),
         py::return_value_policy::take_ownership);
 
+  m.def("solve_casadi_batch", &solve_casadi_batch,
+        "Solve for many sets of inputs, using one thread per solver",
+        py::arg("solvers"), py::arg("t"), py::arg("y0"), py::arg("yp0"),
+        py::arg("inputs"));
+
   m.def("generate_function", &generate_function, "Generate a casadi function",
         py::arg("string"), py::return_value_policy::take_ownership);
 
@@ -59,5 +65,9 @@ PYBIND11_MODULE(idaklu, m)
       .def_readwrite("t", &Solution::t)
       .def_readwrite("y", &Solution::y)
       .def_readwrite("yS", &Solution::yS)
+      .def_readwrite("y_term", &Solution::y_term)
+      .def_readwrite("t_dense", &Solution::t_dense)
+      .def_readwrite("y_dense", &Solution::y_dense)
+      .def_readwrite("yp_dense", &Solution::yp_dense)
       .def_readwrite("flag", &Solution::flag);
 }
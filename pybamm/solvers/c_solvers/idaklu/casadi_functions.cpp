@@ -31,6 +31,8 @@ void CasadiFunction::operator()()
   m_func.release(mem);
 }
 
+casadi_int CasadiFunction::nnz_out() { return m_func.nnz_out(0); }
+
 CasadiFunctions::CasadiFunctions(
     const Function &rhs_alg, const Function &jac_times_cjmass,
     const int jac_times_cjmass_nnz,
@@ -39,7 +41,8 @@ CasadiFunctions::CasadiFunctions(
     const np_array_int &jac_times_cjmass_colptrs_arg,
     const int inputs_length, const Function &jac_action,
     const Function &mass_action, const Function &sens, const Function &events,
-    const int n_s, int n_e, const int n_p, const Options& options)
+    const int n_s, int n_e, const int n_p,
+    const std::vector<Function *> &var_casadi_fcns_arg, const Options& options)
     : number_of_states(n_s), number_of_events(n_e), number_of_parameters(n_p),
       number_of_nnz(jac_times_cjmass_nnz), 
       jac_bandwidth_lower(jac_bandwidth_lower), jac_bandwidth_upper(jac_bandwidth_upper),
@@ -67,7 +70,14 @@ CasadiFunctions::CasadiFunctions(
   }
 
   inputs.resize(inputs_length);
-  
+
+  length_of_output_variables = 0;
+  var_casadi_fcns.reserve(var_casadi_fcns_arg.size());
+  for (auto var : var_casadi_fcns_arg) {
+    var_casadi_fcns.emplace_back(*var);
+    length_of_output_variables += var->nnz_out(0);
+  }
+
 }
 
 realtype *CasadiFunctions::get_tmp_state_vector() { return tmp_state_vector.data(); }
@@ -17,6 +17,8 @@ public:
   std::vector<const double *> m_arg;
   std::vector<double *> m_res;
   void operator()();
+  // number of nonzeros in the (first) output
+  casadi_int nnz_out();
 
 private:
   const Function &m_func;
@@ -33,6 +35,7 @@ public:
   int number_of_nnz;
   int jac_bandwidth_lower;
   int jac_bandwidth_upper;
+  // residual rhs_alg(t, y, p) - mass_matrix * yp, of t, y, p and yp
   CasadiFunction rhs_alg;
   CasadiFunction sens;
   CasadiFunction jac_times_cjmass;
@@ -42,6 +45,10 @@ public:
   CasadiFunction jac_action;
   CasadiFunction mass_action;
   CasadiFunction events;
+  // output variables, evaluated at each time point instead of storing the
+  // full state (empty if the full state is stored)
+  std::vector<CasadiFunction> var_casadi_fcns;
+  int length_of_output_variables;
   Options options;
 
   CasadiFunctions(const Function &rhs_alg, const Function &jac_times_cjmass,
@@ -52,7 +59,8 @@ public:
                   const int inputs_length, const Function &jac_action,
                   const Function &mass_action, const Function &sens,
                   const Function &events, const int n_s, int n_e,
-                  const int n_p, const Options& options);
+                  const int n_p, const std::vector<Function *> &var_casadi_fcns,
+                  const Options& options);
 
   realtype *get_tmp_state_vector();
   realtype *get_tmp_sparse_jacobian_data();
@@ -2,7 +2,12 @@
 #include "casadi_sundials_functions.hpp"
 #include "common.hpp"
 #include <idas/idas.h>
+#include <algorithm>
+#include <atomic>
+#include <exception>
 #include <memory>
+#include <mutex>
+#include <thread>
 
 
 CasadiSolver *
@@ -16,14 +21,16 @@ create_casadi_solver(int number_of_states, int number_of_parameters,
                      const Function &mass_action, const Function &sens,
                      const Function &events, const int number_of_events,
                      np_array rhs_alg_id, np_array atol_np, double rel_tol,
-                     int inputs_length, py::dict options)
+                     int inputs_length,
+                     const std::vector<Function *> &var_casadi_fcns,
+                     py::dict options)
 {
   auto options_cpp = Options(options);
   auto functions = std::make_unique<CasadiFunctions>(
       rhs_alg, jac_times_cjmass, jac_times_cjmass_nnz, jac_bandwidth_lower, jac_bandwidth_upper,  jac_times_cjmass_rowvals,
       jac_times_cjmass_colptrs, inputs_length, jac_action, mass_action, sens,
       events, number_of_states, number_of_events, number_of_parameters,
-      options_cpp);
+      var_casadi_fcns, options_cpp);
 
   return new CasadiSolver(atol_np, rel_tol, rhs_alg_id, number_of_parameters,
                           number_of_events, jac_times_cjmass_nnz, 
@@ -41,7 +48,8 @@ CasadiSolver::CasadiSolver(np_array atol_np, double rel_tol,
       number_of_parameters(number_of_parameters),
       number_of_events(number_of_events),
       jac_times_cjmass_nnz(jac_times_cjmass_nnz),
-      functions(std::move(functions_arg)), options(options)
+      functions(std::move(functions_arg)), options(options),
+      last_t(0.0), last_step_size(0.0)
 {
   DEBUG("CasadiSolver::CasadiSolver");
   auto atol = atol_np.unchecked<1>();
@@ -294,36 +302,89 @@ Solution CasadiSolver::solve(np_array t_np, np_array y0_np, np_array yp0_np,
   DEBUG("CasadiSolver::solve");
 
   int number_of_timesteps = t_np.request().size;
-  auto t = t_np.unchecked<1>();
-  realtype t0 = RCONST(t(0));
-  auto y0 = y0_np.unchecked<1>();
-  auto yp0 = yp0_np.unchecked<1>();
-
+  auto t_unchecked = t_np.unchecked<1>();
+  std::vector<realtype> t(number_of_timesteps);
+  for (int i = 0; i < number_of_timesteps; i++)
+  {
+    t[i] = t_unchecked(i);
+  }
 
-  if (y0.size() != number_of_states + number_of_parameters * number_of_states) {
+  const int y0_length =
+      number_of_states + number_of_parameters * number_of_states;
+  if (y0_np.request().size != y0_length) {
     throw std::domain_error(
-      "y0 has wrong size. Expected " + 
-      std::to_string(number_of_states + number_of_parameters * number_of_states) + 
-      " but got " + std::to_string(y0.size()));
+      "y0 has wrong size. Expected " + std::to_string(y0_length) +
+      " but got " + std::to_string(y0_np.request().size));
   }
 
-  if (yp0.size() != number_of_states + number_of_parameters * number_of_states) {
+  if (yp0_np.request().size != y0_length) {
     throw std::domain_error(
-      "yp0 has wrong size. Expected " + 
-      std::to_string(number_of_states + number_of_parameters * number_of_states) + 
-      " but got " + std::to_string(yp0.size()));
+      "yp0 has wrong size. Expected " + std::to_string(y0_length) +
+      " but got " + std::to_string(yp0_np.request().size));
+  }
+
+  // copy the initial conditions and inputs so that the solve itself does not
+  // need to access any numpy arrays
+  auto y0 = y0_np.unchecked<1>();
+  auto yp0 = yp0_np.unchecked<1>();
+  std::vector<realtype> y0_vec(y0_length);
+  std::vector<realtype> yp0_vec(y0_length);
+  for (int i = 0; i < y0_length; i++)
+  {
+    y0_vec[i] = y0(i);
+    yp0_vec[i] = yp0(i);
   }
 
-  // set inputs
   auto p_inputs = inputs.unchecked<2>();
+  std::vector<realtype> inputs_vec(functions->inputs.size());
   for (int i = 0; i < functions->inputs.size(); i++)
   {
-    functions->inputs[i] = p_inputs(i, 0);
+    inputs_vec[i] = p_inputs(i, 0);
   }
 
-  // set initial conditions
+  SolutionData data;
+  solve_nogil(t, y0_vec.data(), yp0_vec.data(), inputs_vec.data(), data);
+
+  if (options.print_stats)
+  {
+    print_stats();
+  }
+
+  return data.to_solution();
+}
+
+void CasadiSolver::solve_nogil(const std::vector<realtype> &t,
+                               const realtype *y0, const realtype *yp0,
+                               const realtype *inputs, SolutionData &data)
+{
+  DEBUG("CasadiSolver::solve_nogil");
+
+  int number_of_timesteps = t.size();
+  realtype t0 = RCONST(t[0]);
+
+  // if this solve continues from where the previous one finished (same inputs
+  // and state, starting within one step of the previous final time), start
+  // from the last step size rather than letting IDA estimate it again
   realtype *yval = N_VGetArrayPointer(yy);
   realtype *ypval = N_VGetArrayPointer(yp);
+  bool continuing = last_step_size > 0.0 && t0 >= last_t &&
+                    t0 - last_t < last_step_size;
+  for (int i = 0; continuing && i < functions->inputs.size(); i++)
+  {
+    continuing = functions->inputs[i] == inputs[i];
+  }
+  for (int i = 0; continuing && i < number_of_states; i++)
+  {
+    continuing = yval[i] == y0[i];
+  }
+
+  // set inputs
+  for (int i = 0; i < functions->inputs.size(); i++)
+  {
+    functions->inputs[i] = inputs[i];
+  }
+
+  // set initial conditions
   std::vector<realtype *> ySval(number_of_parameters);
   std::vector<realtype *> ypSval(number_of_parameters);
   for (int p = 0 ; p < number_of_parameters; p++) {
@@ -345,10 +406,12 @@ Solution CasadiSolver::solve(np_array t_np, np_array y0_np, np_array yp0_np,
   if (number_of_parameters > 0) {
     IDASensReInit(ida_mem, IDA_SIMULTANEOUS, yyS, ypS);
   }
+  // a step size of zero lets IDA estimate the initial step
+  IDASetInitStep(ida_mem, continuing ? last_step_size : 0.0);
 
   // calculate consistent initial conditions
   DEBUG("IDACalcIC");
-  IDACalcIC(ida_mem, IDA_YA_YDP_INIT, t(1));
+  IDACalcIC(ida_mem, IDA_YA_YDP_INIT, t[1]);
   if (number_of_parameters > 0)
   {
     IDAGetSens(ida_mem, &t0, yyS);
@@ -357,41 +420,25 @@ Solution CasadiSolver::solve(np_array t_np, np_array y0_np, np_array yp0_np,
   int t_i = 1;
   realtype tret;
   realtype t_next;
-  realtype t_final = t(number_of_timesteps - 1);
+  realtype t_final = t[number_of_timesteps - 1];
 
   // set return vectors
-  realtype *t_return = new realtype[number_of_timesteps];
-  realtype *y_return = new realtype[number_of_timesteps * number_of_states];
-  realtype *yS_return = new realtype[number_of_parameters *
-                                     number_of_timesteps * number_of_states];
-
-  py::capsule free_t_when_done(t_return,
-                               [](void *f)
-                               {
-                                 realtype *vect =
-                                     reinterpret_cast<realtype *>(f);
-                                 delete[] vect;
-                               });
-  py::capsule free_y_when_done(y_return,
-                               [](void *f)
-                               {
-                                 realtype *vect =
-                                     reinterpret_cast<realtype *>(f);
-                                 delete[] vect;
-                               });
-  py::capsule free_yS_when_done(yS_return,
-                                [](void *f)
-                                {
-                                  realtype *vect =
-                                      reinterpret_cast<realtype *>(f);
-                                  delete[] vect;
-                                });
-
-  t_return[0] = t(0);
-  for (int j = 0; j < number_of_states; j++)
-  {
-    y_return[j] = yval[j];
-  }
+  data.number_of_timesteps = number_of_timesteps;
+  data.number_of_states = number_of_states;
+  data.number_of_parameters = number_of_parameters;
+  const int length_of_return_vector =
+      functions->var_casadi_fcns.empty() ? number_of_states
+                                         : functions->length_of_output_variables;
+  data.length_of_return_vector = length_of_return_vector;
+  data.t.resize(number_of_timesteps);
+  data.y.resize(number_of_timesteps * length_of_return_vector);
+  data.yS.resize(number_of_parameters * number_of_timesteps * number_of_states);
+  realtype *t_return = data.t.data();
+  realtype *y_return = data.y.data();
+  realtype *yS_return = data.yS.data();
+
+  t_return[0] = t[0];
+  save_y(t_return[0], yval, &y_return[0]);
   for (int j = 0; j < number_of_parameters; j++)
   {
     const int base_index = j * number_of_timesteps * number_of_states;
@@ -401,29 +448,51 @@ Solution CasadiSolver::solve(np_array t_np, np_array y0_np, np_array yp0_np,
     }
   }
 
-
+  // with dense output, the solver returns after every internal step, and the
+  // time, state and time derivative are stored at each of them
+  const bool dense_output = options.dense_output;
+  const int itask = dense_output ? IDA_ONE_STEP : IDA_NORMAL;
+  auto save_dense = [&](realtype t_step)
+  {
+    data.t_dense.push_back(t_step);
+    data.y_dense.insert(data.y_dense.end(), yval, yval + number_of_states);
+    data.yp_dense.insert(data.yp_dense.end(), ypval, ypval + number_of_states);
+  };
+  if (dense_output)
+  {
+    // consistent time derivatives at the initial time
+    IDAGetConsistentIC(ida_mem, NULL, yp);
+    save_dense(t0);
+  }
 
   int retval;
   while (true)
   {
-    t_next = t(t_i);
+    t_next = t[t_i];
     IDASetStopTime(ida_mem, t_next);
     DEBUG("IDASolve");
-    retval = IDASolve(ida_mem, t_final, &tret, yy, yp, IDA_NORMAL);
+    retval = IDASolve(ida_mem, t_final, &tret, yy, yp, itask);
 
     if (retval == IDA_TSTOP_RETURN || retval == IDA_SUCCESS ||
         retval == IDA_ROOT_RETURN)
     {
+      if (dense_output)
+      {
+        save_dense(tret);
+        if (retval == IDA_SUCCESS)
+        {
+          // internal step before the next output time
+          continue;
+        }
+      }
+
       if (number_of_parameters > 0)
       {
         IDAGetSens(ida_mem, &tret, yyS);
       }
 
       t_return[t_i] = tret;
-      for (int j = 0; j < number_of_states; j++)
-      {
-        y_return[t_i * number_of_states + j] = yval[j];
-      }
+      save_y(tret, yval, &y_return[t_i * length_of_return_vector]);
       for (int j = 0; j < number_of_parameters; j++)
       {
         const int base_index =
@@ -434,6 +503,12 @@ Solution CasadiSolver::solve(np_array t_np, np_array y0_np, np_array yp0_np,
         }
       }
       t_i += 1;
+      if (dense_output && retval == IDA_TSTOP_RETURN &&
+          t_i == number_of_timesteps)
+      {
+        // reached the final time
+        retval = IDA_SUCCESS;
+      }
       if (retval == IDA_SUCCESS || retval == IDA_ROOT_RETURN)
       {
         break;
@@ -446,49 +521,209 @@ Solution CasadiSolver::solve(np_array t_np, np_array y0_np, np_array yp0_np,
     }
   }
 
-  np_array t_ret = np_array(t_i, &t_return[0], free_t_when_done);
-  np_array y_ret =
-      np_array(t_i * number_of_states, &y_return[0], free_y_when_done);
-  np_array yS_ret = np_array(
-      std::vector<ptrdiff_t>{number_of_parameters, number_of_timesteps, number_of_states},
-      &yS_return[0], free_yS_when_done);
+  // only the first t_i time points were reached
+  data.flag = retval;
+  data.t.resize(t_i);
+  data.y.resize(t_i * length_of_return_vector);
+  data.y_term.assign(yval, yval + number_of_states);
 
-  Solution sol(retval, t_ret, y_ret, yS_ret);
+  if (retval == IDA_SUCCESS || retval == IDA_TSTOP_RETURN ||
+      retval == IDA_ROOT_RETURN)
+  {
+    last_t = tret;
+    IDAGetLastStep(ida_mem, &last_step_size);
+  }
+  else
+  {
+    last_step_size = 0.0;
+  }
+}
 
-  if (options.print_stats)
+void CasadiSolver::save_y(realtype t, realtype *yval, realtype *y_return)
+{
+  if (functions->var_casadi_fcns.empty())
+  {
+    for (int j = 0; j < number_of_states; j++)
+    {
+      y_return[j] = yval[j];
+    }
+    return;
+  }
+
+  // evaluate the output variables at this time point, one after the other
+  for (auto &var : functions->var_casadi_fcns)
+  {
+    var.m_arg[0] = &t;
+    var.m_arg[1] = yval;
+    var.m_arg[2] = functions->inputs.data();
+    var.m_res[0] = y_return;
+    var();
+    y_return += var.nnz_out();
+  }
+}
+
+void CasadiSolver::print_stats()
+{
+  long nsteps, nrevals, nlinsetups, netfails;
+  int klast, kcur;
+  realtype hinused, hlast, hcur, tcur;
+
+  IDAGetIntegratorStats(ida_mem, &nsteps, &nrevals, &nlinsetups, &netfails,
+                        &klast, &kcur, &hinused, &hlast, &hcur, &tcur);
+
+  long nniters, nncfails;
+  IDAGetNonlinSolvStats(ida_mem, &nniters, &nncfails);
+
+  long int ngevalsBBDP = 0;
+  if (options.using_iterative_solver)
+  {
+    IDABBDPrecGetNumGfnEvals(ida_mem, &ngevalsBBDP);
+  }
+
+  py::print("Solver Stats:");
+  py::print("\tNumber of steps =", nsteps);
+  py::print("\tNumber of calls to residual function =", nrevals);
+  py::print("\tNumber of calls to residual function in preconditioner =",
+            ngevalsBBDP);
+  py::print("\tNumber of linear solver setup calls =", nlinsetups);
+  py::print("\tNumber of error test failures =", netfails);
+  py::print("\tMethod order used on last step =", klast);
+  py::print("\tMethod order used on next step =", kcur);
+  py::print("\tInitial step size =", hinused);
+  py::print("\tStep size on last step =", hlast);
+  py::print("\tStep size on next step =", hcur);
+  py::print("\tCurrent internal time reached =", tcur);
+  py::print("\tNumber of nonlinear iterations performed =", nniters);
+  py::print("\tNumber of nonlinear convergence failures =", nncfails);
+}
+
+std::vector<Solution>
+solve_casadi_batch(std::vector<CasadiSolver *> solvers, np_array t_np,
+                   np_array y0_np, np_array yp0_np, np_array_dense inputs)
+{
+  DEBUG("solve_casadi_batch");
+
+  if (solvers.empty())
+  {
+    throw std::invalid_argument("solve_casadi_batch requires at least one solver");
+  }
+
+  // inputs has shape (number of input sets, inputs length)
+  auto p_inputs = inputs.unchecked<2>();
+  const int number_of_input_sets = p_inputs.shape(0);
+  const int inputs_length = p_inputs.shape(1);
+  for (auto solver : solvers)
+  {
+    if (solver->functions->inputs.size() != inputs_length)
+    {
+      throw std::domain_error(
+        "inputs has wrong size. Expected " +
+        std::to_string(solver->functions->inputs.size()) + " but got " +
+        std::to_string(inputs_length));
+    }
+  }
+
+  int number_of_timesteps = t_np.request().size;
+  auto t_unchecked = t_np.unchecked<1>();
+  std::vector<realtype> t(number_of_timesteps);
+  for (int i = 0; i < number_of_timesteps; i++)
+  {
+    t[i] = t_unchecked(i);
+  }
+
+  CasadiSolver *first = solvers[0];
+  const int y0_length =
+      first->number_of_states + first->number_of_parameters * first->number_of_states;
+  if (y0_np.request().size != y0_length) {
+    throw std::domain_error(
+      "y0 has wrong size. Expected " + std::to_string(y0_length) +
+      " but got " + std::to_string(y0_np.request().size));
+  }
+  if (yp0_np.request().size != y0_length) {
+    throw std::domain_error(
+      "yp0 has wrong size. Expected " + std::to_string(y0_length) +
+      " but got " + std::to_string(yp0_np.request().size));
+  }
+
+  auto y0 = y0_np.unchecked<1>();
+  auto yp0 = yp0_np.unchecked<1>();
+  std::vector<realtype> y0_vec(y0_length);
+  std::vector<realtype> yp0_vec(y0_length);
+  for (int i = 0; i < y0_length; i++)
+  {
+    y0_vec[i] = y0(i);
+    yp0_vec[i] = yp0(i);
+  }
+  std::vector<realtype> inputs_vec(number_of_input_sets * inputs_length);
+  for (int i = 0; i < number_of_input_sets; i++)
   {
-    long nsteps, nrevals, nlinsetups, netfails;
-    int klast, kcur;
-    realtype hinused, hlast, hcur, tcur;
+    for (int j = 0; j < inputs_length; j++)
+    {
+      inputs_vec[i * inputs_length + j] = p_inputs(i, j);
+    }
+  }
 
-    IDAGetIntegratorStats(ida_mem, &nsteps, &nrevals, &nlinsetups, &netfails,
-                          &klast, &kcur, &hinused, &hlast, &hcur, &tcur);
+  // each solver owns its own IDA memory and work vectors, so each worker
+  // thread uses one solver and takes the next input set from a shared counter
+  std::vector<SolutionData> data(number_of_input_sets);
+  std::atomic<int> next_input_set(0);
+  std::exception_ptr error = nullptr;
+  std::mutex error_mutex;
 
-    long nniters, nncfails;
-    IDAGetNonlinSolvStats(ida_mem, &nniters, &nncfails);
+  auto worker = [&](CasadiSolver *solver)
+  {
+    try
+    {
+      int i;
+      while ((i = next_input_set++) < number_of_input_sets)
+      {
+        solver->solve_nogil(t, y0_vec.data(), yp0_vec.data(),
+                            inputs_vec.data() + i * inputs_length, data[i]);
+      }
+    }
+    catch (...)
+    {
+      std::lock_guard<std::mutex> lock(error_mutex);
+      if (!error)
+      {
+        error = std::current_exception();
+      }
+      next_input_set = number_of_input_sets;
+    }
+  };
 
-    long int ngevalsBBDP = 0;
-    if (options.using_iterative_solver)
+  const int number_of_threads =
+      std::min<int>(solvers.size(), number_of_input_sets);
+  {
+    py::gil_scoped_release release;
+    if (number_of_threads <= 1)
     {
-      IDABBDPrecGetNumGfnEvals(ida_mem, &ngevalsBBDP);
+      worker(first);
     }
+    else
+    {
+      std::vector<std::thread> threads;
+      for (int i = 0; i < number_of_threads; i++)
+      {
+        threads.emplace_back(worker, solvers[i]);
+      }
+      for (auto &thread : threads)
+      {
+        thread.join();
+      }
+    }
+  }
 
-    py::print("Solver Stats:");
-    py::print("\tNumber of steps =", nsteps);
-    py::print("\tNumber of calls to residual function =", nrevals);
-    py::print("\tNumber of calls to residual function in preconditioner =",
-              ngevalsBBDP);
-    py::print("\tNumber of linear solver setup calls =", nlinsetups);
-    py::print("\tNumber of error test failures =", netfails);
-    py::print("\tMethod order used on last step =", klast);
-    py::print("\tMethod order used on next step =", kcur);
-    py::print("\tInitial step size =", hinused);
-    py::print("\tStep size on last step =", hlast);
-    py::print("\tStep size on next step =", hcur);
-    py::print("\tCurrent internal time reached =", tcur);
-    py::print("\tNumber of nonlinear iterations performed =", nniters);
-    py::print("\tNumber of nonlinear convergence failures =", nncfails);
-  }
-
-  return sol;
+  if (error)
+  {
+    std::rethrow_exception(error);
+  }
+
+  std::vector<Solution> solutions;
+  solutions.reserve(number_of_input_sets);
+  for (auto &d : data)
+  {
+    solutions.push_back(d.to_solution());
+  }
+  return solutions;
 }
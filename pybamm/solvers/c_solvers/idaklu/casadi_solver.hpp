@@ -39,10 +39,30 @@ public:
   std::unique_ptr<CasadiFunctions> functions;
   Options options;
 
+  // final time and step size of the previous solve, used to warm start a solve
+  // that continues from where the previous one finished
+  realtype last_t;
+  realtype last_step_size;
+
   Solution solve(np_array t_np, np_array y0_np, np_array yp0_np,
                  np_array_dense inputs);
+
+  // Solve without touching any Python objects, so that it can be called
+  // without the GIL held (e.g. from a worker thread)
+  void solve_nogil(const std::vector<realtype> &t, const realtype *y0,
+                   const realtype *yp0, const realtype *inputs,
+                   SolutionData &data);
+
+  // Store either the state or the output variables at one time point
+  void save_y(realtype t, realtype *yval, realtype *y_return);
+
+  void print_stats();
 };
 
+std::vector<Solution>
+solve_casadi_batch(std::vector<CasadiSolver *> solvers, np_array t_np,
+                   np_array y0_np, np_array yp0_np, np_array_dense inputs);
+
 CasadiSolver *
 create_casadi_solver(int number_of_states, int number_of_parameters,
                      const Function &rhs_alg, const Function &jac_times_cjmass,
@@ -54,6 +74,8 @@ create_casadi_solver(int number_of_states, int number_of_parameters,
                      const Function &mass_action, const Function &sens,
                      const Function &event, const int number_of_events,
                      np_array rhs_alg_id, np_array atol_np,
-                     double rel_tol, int inputs_length, py::dict options);
+                     double rel_tol, int inputs_length,
+                     const std::vector<Function *> &var_casadi_fcns,
+                     py::dict options);
 
 #endif // PYBAMM_IDAKLU_CASADI_SOLVER_HPP
@@ -9,26 +9,19 @@ int residual_casadi(realtype tres, N_Vector yy, N_Vector yp, N_Vector rr,
   CasadiFunctions *p_python_functions =
       static_cast<CasadiFunctions *>(user_data);
 
+  // the residual function includes the mass matrix term, so that the residual
+  // rhs_alg(t, y) - mass_matrix * yp is evaluated in a single call
   p_python_functions->rhs_alg.m_arg[0] = &tres;
   p_python_functions->rhs_alg.m_arg[1] = NV_DATA_OMP(yy);
   p_python_functions->rhs_alg.m_arg[2] = p_python_functions->inputs.data();
+  p_python_functions->rhs_alg.m_arg[3] = NV_DATA_OMP(yp);
   p_python_functions->rhs_alg.m_res[0] = NV_DATA_OMP(rr);
   p_python_functions->rhs_alg();
 
-  realtype *tmp = p_python_functions->get_tmp_state_vector();
-  p_python_functions->mass_action.m_arg[0] = NV_DATA_OMP(yp);
-  p_python_functions->mass_action.m_res[0] = tmp;
-  p_python_functions->mass_action();
-
-  // AXPY: y <- a*x + y
-  const int ns = p_python_functions->number_of_states;
-  casadi::casadi_axpy(ns, -1., tmp, NV_DATA_OMP(rr));
-
   //DEBUG_VECTOR(yy);
   //DEBUG_VECTOR(yp);
   //DEBUG_VECTOR(rr);
 
-  // now rr has rhs_alg(t, y) - mass_matrix * yp
   return 0;
 }
 
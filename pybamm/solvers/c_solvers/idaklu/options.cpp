@@ -13,7 +13,8 @@ Options::Options(py::dict options)
       linear_solver(options["linear_solver"].cast<std::string>()),
       precon_half_bandwidth(options["precon_half_bandwidth"].cast<int>()),
       precon_half_bandwidth_keep(options["precon_half_bandwidth_keep"].cast<int>()),
-      num_threads(options["num_threads"].cast<int>())
+      num_threads(options["num_threads"].cast<int>()),
+      dense_output(options["dense_output"].cast<bool>())
 {
 
   using_sparse_matrix = true;
@@ -15,6 +15,7 @@ struct Options {
   int precon_half_bandwidth;
   int precon_half_bandwidth_keep;
   int num_threads;
+  bool dense_output;
   explicit Options(py::dict options);
 
 };
@@ -0,0 +1,52 @@
+#include "solution.hpp"
+
+namespace
+{
+// move a vector onto the heap and wrap it in a numpy array that frees the
+// vector when the array is deleted, so that the data is not copied
+np_array vector_to_np_array(std::vector<realtype> &&vec,
+                            std::vector<ptrdiff_t> shape)
+{
+  auto heap_vec = new std::vector<realtype>(std::move(vec));
+  py::capsule free_when_done(heap_vec,
+                             [](void *f)
+                             {
+                               auto vect =
+                                   reinterpret_cast<std::vector<realtype> *>(f);
+                               delete vect;
+                             });
+  return np_array(shape, heap_vec->data(), free_when_done);
+}
+} // namespace
+
+Solution SolutionData::to_solution()
+{
+  const ptrdiff_t number_of_timesteps_reached = t.size();
+  np_array t_ret = vector_to_np_array(
+      std::move(t), std::vector<ptrdiff_t>{number_of_timesteps_reached});
+  np_array y_ret = vector_to_np_array(
+      std::move(y),
+      std::vector<ptrdiff_t>{number_of_timesteps_reached *
+                             length_of_return_vector});
+  np_array yS_ret = vector_to_np_array(
+      std::move(yS),
+      std::vector<ptrdiff_t>{number_of_parameters, number_of_timesteps,
+                             number_of_states});
+  const ptrdiff_t y_term_length = y_term.size();
+  np_array y_term_ret = vector_to_np_array(
+      std::move(y_term), std::vector<ptrdiff_t>{y_term_length});
+  Solution sol(flag, t_ret, y_ret, yS_ret, y_term_ret);
+  if (!t_dense.empty())
+  {
+    const ptrdiff_t number_of_steps = t_dense.size();
+    sol.t_dense = vector_to_np_array(
+        std::move(t_dense), std::vector<ptrdiff_t>{number_of_steps});
+    sol.y_dense = vector_to_np_array(
+        std::move(y_dense),
+        std::vector<ptrdiff_t>{number_of_steps, number_of_states});
+    sol.yp_dense = vector_to_np_array(
+        std::move(yp_dense),
+        std::vector<ptrdiff_t>{number_of_steps, number_of_states});
+  }
+  return sol;
+}
@@ -7,7 +7,15 @@ class Solution
 {
 public:
   Solution(int retval, np_array t_np, np_array y_np, np_array yS_np)
-      : flag(retval), t(t_np), y(y_np), yS(yS_np)
+      : flag(retval), t(t_np), y(y_np), yS(yS_np), y_term(0), t_dense(0),
+        y_dense(0), yp_dense(0)
+  {
+  }
+
+  Solution(int retval, np_array t_np, np_array y_np, np_array yS_np,
+           np_array y_term_np)
+      : flag(retval), t(t_np), y(y_np), yS(yS_np), y_term(y_term_np),
+        t_dense(0), y_dense(0), yp_dense(0)
   {
   }
 
@@ -15,6 +23,39 @@ public:
   np_array t;
   np_array y;
   np_array yS;
+  np_array y_term;
+  // times, states and time derivatives at every internal step of the
+  // solver (only stored if the "dense_output" option is set)
+  np_array t_dense;
+  np_array y_dense;
+  np_array yp_dense;
+};
+
+/**
+ * @brief Solution data held in C++ containers, so that it can be written
+ * without the GIL held and then converted into a Solution without copying
+ */
+class SolutionData
+{
+public:
+  int flag;
+  int number_of_timesteps;
+  int number_of_states;
+  int number_of_parameters;
+  // length of y at each time point: either the number of states, or the
+  // total length of the output variables
+  int length_of_return_vector;
+  std::vector<realtype> t;
+  std::vector<realtype> y;
+  std::vector<realtype> yS;
+  // state at the final time point
+  std::vector<realtype> y_term;
+  // internal steps of the solver, for dense output
+  std::vector<realtype> t_dense;
+  std::vector<realtype> y_dense;
+  std::vector<realtype> yp_dense;
+
+  Solution to_solution();
 };
 
 #endif // PYBAMM_IDAKLU_COMMON_HPP
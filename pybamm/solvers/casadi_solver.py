@@ -72,6 +72,18 @@ class CasadiSolver(pybamm.BaseSolver):
         The maximum number of integrators that the solver will retain before
         ejecting past integrators using an LRU methodology. A value of 0 or
         None leaves the number of integrators unbound. Default is 100.
+    output_tolerances : dict, optional
+        Dictionary of {variable name: absolute tolerance} pairs used to thin the
+        stored solution: a point is only stored if one of these variables has
+        changed by more than its tolerance since the last stored point. Default is
+        None, which stores all points. Note that the CasADi integrators do not
+        expose their internal steps, so the solution is always computed at the
+        requested times before thinning.
+    jit_cache : :class:`pybamm.JitCache`, optional
+        If given, the function integrated by the CasADi integrators (the right-hand
+        sides and algebraic equations, and their Jacobian) is compiled to native
+        code and cached in `jit_cache`, so that it is only compiled once. Default is
+        None, which evaluates it with CasADi's virtual machine.
     """
 
     def __init__(
@@ -89,6 +101,8 @@ class CasadiSolver(pybamm.BaseSolver):
         return_solution_if_failed_early=False,
         perturb_algebraic_initial_conditions=None,
         integrators_maxcount=100,
+        output_tolerances=None,
+        jit_cache=None,
     ):
         super().__init__(
             "problem dependent",
@@ -127,6 +141,8 @@ class CasadiSolver(pybamm.BaseSolver):
                 perturb_algebraic_initial_conditions
             )
         self.name = "CasADi solver with '{}' mode".format(mode)
+        self.output_tolerances = output_tolerances
+        self.jit_cache = jit_cache
 
         # Initialize
         self.integrators_maxcount = integrators_maxcount
@@ -136,6 +152,17 @@ class CasadiSolver(pybamm.BaseSolver):
 
         pybamm.citations.register("Andersson2019")
 
+    def __getstate__(self):
+        """
+        Return dictionary of picklable items. The integrators cannot be pickled, so
+        they are created again the next time the solver is used.
+        """
+        state = self.__dict__.copy()
+        state["integrators"] = LRUDict(maxsize=self.integrators_maxcount)
+        state["integrator_specs"] = LRUDict(maxsize=self.integrators_maxcount)
+        state["y_sols"] = {}
+        return state
+
     def _integrate(self, model, t_eval, inputs_dict=None):
         """
         Solve a DAE model defined by residuals with initial conditions y0.
@@ -334,12 +361,9 @@ class CasadiSolver(pybamm.BaseSolver):
             if model.terminate_events_eval:
                 y_last = sol.all_ys[-1][:, -1]
                 crossed_events = np.sign(
-                    np.concatenate(
-                        [
-                            event(sol.t[-1], y_last, inputs)
-                            for event in model.terminate_events_eval
-                        ]
-                    )
+                    model.terminate_events_concatenated_eval(
+                        sol.all_ts[-1][-1], y_last, inputs
+                    ).full()[:, 0]
                     - 1e-5
                 )
             else:
@@ -586,6 +610,8 @@ class CasadiSolver(pybamm.BaseSolver):
                         "alg": algebraic(t_scaled, y_full, p),
                     }
                 )
+            if self.jit_cache is not None:
+                problem = self._compile_problem(problem)
             integrator = casadi.integrator("F", method, problem, *time_args, options)
             self.integrator_specs[model] = method, problem, options, time_args
             if use_grid is False:
@@ -595,6 +621,24 @@ class CasadiSolver(pybamm.BaseSolver):
 
             return integrator
 
+    def _compile_problem(self, problem):
+        """
+        Compile the DAE `problem` of an integrator, and its Jacobian, to native code
+        with the solver's JIT cache, and return it as a function that can be passed
+        to :func:`casadi.integrator` instead of `problem`
+        """
+        empty = casadi.MX(0, 1)
+        inputs = {"u": casadi.MX.sym("u", 0), "z": casadi.MX.sym("z", 0), **problem}
+        outputs = {"alg": empty, "quad": empty, **problem}
+        dae = casadi.Function(
+            "dae",
+            [inputs[name] for name in casadi.dyn_in()],
+            [outputs[name] for name in casadi.dyn_out()],
+            casadi.dyn_in(),
+            casadi.dyn_out(),
+        )
+        return self.jit_cache.compile(dae, jacobian=True)
+
     def _run_integrator(
         self,
         model,
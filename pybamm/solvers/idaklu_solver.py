@@ -5,7 +5,9 @@ import casadi
 import pybamm
 import numpy as np
 import numbers
+import os
 import scipy.sparse as sparse
+from scipy import interpolate
 
 import importlib
 
@@ -76,12 +78,43 @@ class IDAKLUSolver(pybamm.BaseSolver):
                 "precon_half_bandwidth_keep": 5
 
                 # Number of threads available for OpenMP
-                "num_threads": 1
+                "num_threads": 1,
+
+                # store the state and its time derivative at every internal step,
+                # so that the solution can be resampled at any time to the
+                # accuracy of the solver (see pybamm.Solution.resample)
+                "dense_output": False,
             }
 
         Note: These options only have an effect if model.convert_to_format == 'casadi'
 
-
+    output_variables : list of str, optional
+        Names of the variables to return from the solver. If given, these variables
+        are evaluated by the solver at each output time and only their values are
+        stored, instead of the full state vector, which reduces memory use for large
+        models. Only the output variables can then be read from the solution (the
+        state at the final time is still stored, so the solution can be used to
+        initialise another model). Only available for models in casadi format, and
+        without sensitivities. Default is None, which stores the full state.
+    output_mode : str, optional
+        Times at which the solution is stored. Can be "t_eval" (default), which
+        stores the solution at the requested times only, or "solver steps", which
+        stores the solution at every step accepted by the integrator (as well as at
+        the requested times), so that the stored points follow the dynamics of the
+        solution. In "solver steps" mode, :meth:`pybamm.BaseSolver.step` only
+        requests the start and end of each step. Only available for models in
+        casadi format, without sensitivities or `output_variables`.
+    output_tolerances : dict, optional
+        Dictionary of {variable name: absolute tolerance} pairs used to thin the
+        stored solution: a point is only stored if one of these variables has
+        changed by more than its tolerance since the last stored point. Default is
+        None, which stores all points.
+    jit_cache : :class:`pybamm.JitCache`, optional
+        If given, the functions evaluated by the solver (the residual, the Jacobian,
+        the events, the output variables and the sensitivities) are compiled to
+        native code and cached in `jit_cache`, so that they are only compiled once.
+        Only used for models in casadi format. Default is None, which evaluates them
+        with CasADi's virtual machine.
     """
 
     def __init__(
@@ -92,6 +125,10 @@ class IDAKLUSolver(pybamm.BaseSolver):
         root_tol=1e-6,
         extrap_tol=None,
         options=None,
+        output_variables=None,
+        output_mode="t_eval",
+        output_tolerances=None,
+        jit_cache=None,
     ):
         # set default options,
         # (only if user does not supply)
@@ -104,6 +141,7 @@ class IDAKLUSolver(pybamm.BaseSolver):
             "precon_half_bandwidth": 5,
             "precon_half_bandwidth_keep": 5,
             "num_threads": 1,
+            "dense_output": False,
         }
         if options is None:
             options = default_options
@@ -112,6 +150,7 @@ class IDAKLUSolver(pybamm.BaseSolver):
                 if key not in options:
                     options[key] = value
         self._options = options
+        self.output_variables = output_variables or []
 
         if idaklu_spec is None:  # pragma: no cover
             raise ImportError("KLU is not installed")
@@ -125,6 +164,14 @@ class IDAKLUSolver(pybamm.BaseSolver):
             extrap_tol,
         )
         self.name = "IDA KLU solver"
+        if output_mode not in ["t_eval", "solver steps"]:
+            raise ValueError(
+                "output_mode must be 't_eval' or 'solver steps', not "
+                f"'{output_mode}'"
+            )
+        self.output_mode = output_mode
+        self.output_tolerances = output_tolerances
+        self.jit_cache = jit_cache
 
         pybamm.citations.register("Hindmarsh2000")
         pybamm.citations.register("Hindmarsh2005")
@@ -202,10 +249,7 @@ class IDAKLUSolver(pybamm.BaseSolver):
             mass_matrix = model.mass_matrix.entries
 
         # construct residuals function by binding inputs
-        if model.convert_to_format == "casadi":
-            # TODO: do we need densify here?
-            rhs_algebraic = model.rhs_algebraic_eval
-        else:
+        if model.convert_to_format != "casadi":
 
             def resfn(t, y, inputs, ydot):
                 return (
@@ -228,14 +272,30 @@ class IDAKLUSolver(pybamm.BaseSolver):
                 else:
                     p_casadi[name] = casadi.MX.sym(name, value.shape[0])
             p_casadi_stacked = casadi.vertcat(*[p for p in p_casadi.values()])
+            yp_casadi = casadi.MX.sym("yp", model.len_rhs_and_alg)
+
+            # The residual, events and Jacobian are all built by inlining the fused
+            # function of the model, so that they share their intermediate nodes.
+            # IDA calls them at different points, so they are kept as separate
+            # functions, but the residual includes the mass matrix term so that it
+            # is evaluated in a single call
+            (
+                rhs_algebraic_casadi,
+                events_casadi,
+                jac_rhs_algebraic_casadi,
+            ) = model.rhs_algebraic_events_eval.call(
+                [t_casadi, y_casadi, p_casadi_stacked], True, False
+            )
+            residual = casadi.Function(
+                "residual",
+                [t_casadi, y_casadi, p_casadi_stacked, yp_casadi],
+                [casadi.densify(rhs_algebraic_casadi - mass_matrix @ yp_casadi)],
+            )
 
             jac_times_cjmass = casadi.Function(
                 "jac_times_cjmass",
                 [t_casadi, y_casadi, p_casadi_stacked, cj_casadi],
-                [
-                    model.jac_rhs_algebraic_eval(t_casadi, y_casadi, p_casadi_stacked)
-                    - cj_casadi * mass_matrix
-                ],
+                [jac_rhs_algebraic_casadi - cj_casadi * mass_matrix],
             )
 
             jac_times_cjmass_sparsity = jac_times_cjmass.sparsity_out(0)
@@ -258,6 +318,32 @@ class IDAKLUSolver(pybamm.BaseSolver):
                 "mass_action", [v_casadi], [casadi.densify(mass_matrix @ v_casadi)]
             )
 
+            # output variables are evaluated by the solver at each time point, and
+            # stored one after the other in place of the state vector
+            var_casadi_fcns = []
+            output_variables = {}
+            start = 0
+            for key in self.output_variables:
+                var = model.variables_and_events[key]
+                if isinstance(var, pybamm.ExplicitTimeIntegral):
+                    var = var.child
+                var_casadi = casadi.densify(
+                    var.to_casadi(t_casadi, y_casadi, inputs=p_casadi)
+                )
+                var_casadi_fcns.append(
+                    casadi.Function(
+                        "variable",
+                        [t_casadi, y_casadi, p_casadi_stacked],
+                        [var_casadi],
+                    )
+                )
+                output_variables[key] = slice(start, start + var_casadi.numel())
+                start += var_casadi.numel()
+
+        elif self.output_variables:
+            raise pybamm.SolverError(
+                "output_variables can only be used with models in casadi format"
+            )
         else:
             t0 = 0 if t_eval is None else t_eval[0]
             jac_y0_t0 = model.jac_rhs_algebraic_eval(t0, y0, inputs_dict)
@@ -309,16 +395,7 @@ class IDAKLUSolver(pybamm.BaseSolver):
         # rootfn needs to return an array of length num_of_events
         if model.convert_to_format == "casadi":
             rootfn = casadi.Function(
-                "rootfn",
-                [t_casadi, y_casadi, p_casadi_stacked],
-                [
-                    casadi.vertcat(
-                        *[
-                            event(t_casadi, y_casadi, p_casadi_stacked)
-                            for event in model.terminate_events_eval
-                        ]
-                    )
-                ],
+                "rootfn", [t_casadi, y_casadi, p_casadi_stacked], [events_casadi]
             )
         else:
 
@@ -348,6 +425,22 @@ class IDAKLUSolver(pybamm.BaseSolver):
         else:
             sensitivity_names = []
 
+        if self.output_variables and number_of_sensitivity_parameters > 0:
+            raise pybamm.SolverError(
+                "output_variables cannot be used when calculating sensitivities"
+            )
+        if self.output_mode == "solver steps":
+            if model.convert_to_format != "casadi":
+                raise pybamm.SolverError(
+                    "output_mode 'solver steps' can only be used with models in "
+                    "casadi format"
+                )
+            if number_of_sensitivity_parameters > 0 or self.output_variables:
+                raise pybamm.SolverError(
+                    "output_mode 'solver steps' cannot be used with sensitivities "
+                    "or output_variables"
+                )
+
         if model.convert_to_format == "casadi":
             # for the casadi solver we just give it dFdp_i
             if model.jacp_rhs_algebraic_eval is None:
@@ -403,56 +496,34 @@ class IDAKLUSolver(pybamm.BaseSolver):
         atol = self._check_atol_type(atol, y0.size)
 
         if model.convert_to_format == "casadi":
-            rhs_algebraic = idaklu.generate_function(rhs_algebraic.serialize())
-            jac_times_cjmass = idaklu.generate_function(jac_times_cjmass.serialize())
-            jac_rhs_algebraic_action = idaklu.generate_function(
-                jac_rhs_algebraic_action.serialize()
-            )
-            rootfn = idaklu.generate_function(rootfn.serialize())
-            mass_action = idaklu.generate_function(mass_action.serialize())
-            sensfn = idaklu.generate_function(sensfn.serialize())
-
             self._setup = {
                 "jac_bandwidth_upper": jac_bw_upper,
                 "jac_bandwidth_lower": jac_bw_lower,
-                "rhs_algebraic": rhs_algebraic,
-                "jac_times_cjmass": jac_times_cjmass,
                 "jac_times_cjmass_colptrs": jac_times_cjmass_colptrs,
                 "jac_times_cjmass_rowvals": jac_times_cjmass_rowvals,
                 "jac_times_cjmass_nnz": jac_times_cjmass_nnz,
-                "jac_rhs_algebraic_action": jac_rhs_algebraic_action,
-                "mass_action": mass_action,
-                "sensfn": sensfn,
-                "rootfn": rootfn,
                 "num_of_events": num_of_events,
                 "ids": ids,
                 "sensitivity_names": sensitivity_names,
                 "number_of_sensitivity_parameters": number_of_sensitivity_parameters,
+                "number_of_states": len(y0),
+                "atol": atol,
+                "rtol": rtol,
+                "inputs_length": len(inputs),
+                "output_variables": output_variables,
+                # the CasADi functions are kept so that the solver can be pickled
+                # (see __getstate__)
+                "casadi_fcns": {
+                    "residual": residual,
+                    "jac_times_cjmass": jac_times_cjmass,
+                    "jac_rhs_algebraic_action": jac_rhs_algebraic_action,
+                    "mass_action": mass_action,
+                    "sensfn": sensfn,
+                    "rootfn": rootfn,
+                    "var_casadi_fcns": var_casadi_fcns,
+                },
             }
-
-            solver = idaklu.create_casadi_solver(
-                len(y0),
-                self._setup["number_of_sensitivity_parameters"],
-                self._setup["rhs_algebraic"],
-                self._setup["jac_times_cjmass"],
-                self._setup["jac_times_cjmass_colptrs"],
-                self._setup["jac_times_cjmass_rowvals"],
-                self._setup["jac_times_cjmass_nnz"],
-                jac_bw_lower,
-                jac_bw_upper,
-                self._setup["jac_rhs_algebraic_action"],
-                self._setup["mass_action"],
-                self._setup["sensfn"],
-                self._setup["rootfn"],
-                self._setup["num_of_events"],
-                self._setup["ids"],
-                atol,
-                rtol,
-                len(inputs),
-                self._options,
-            )
-
-            self._setup["solver"] = solver
+            self._generate_casadi_solver()
         else:
             self._setup = {
                 "resfn": resfn,
@@ -468,27 +539,96 @@ class IDAKLUSolver(pybamm.BaseSolver):
 
         return base_set_up_return
 
-    def _integrate(self, model, t_eval, inputs_dict=None):
+    def _generate_casadi_solver(self):
+        """
+        Generate the C++ functions from the CasADi functions stored by `set_up`
+        (compiling them to native code first if the solver has a JIT cache), and
+        create the C++ solver object
         """
-        Solve a DAE model defined by residuals with initial conditions y0.
 
-        Parameters
-        ----------
-        model : :class:`pybamm.BaseModel`
-            The model whose solution to calculate.
-        t_eval : numeric type
-            The times at which to compute the solution
-        inputs_dict : dict, optional
-            Any input parameters to pass to the model when solving
+        def generate_function(fcn):
+            if self.jit_cache is not None:
+                fcn = self.jit_cache.compile(fcn)
+            return idaklu.generate_function(fcn.serialize())
+
+        for name, fcn in self._setup["casadi_fcns"].items():
+            if name == "var_casadi_fcns":
+                self._setup[name] = [generate_function(f) for f in fcn]
+            else:
+                self._setup[name] = generate_function(fcn)
+        self._setup["solver"] = self._make_casadi_solver()
+
+    def __getstate__(self):
         """
-        inputs_dict = inputs_dict or {}
-        # stack inputs
+        Return dictionary of picklable items. The C++ functions and solver objects
+        created by `set_up` cannot be pickled, so only the CasADi functions they were
+        generated from are kept, and the C++ objects are generated again when the
+        solver is unpickled.
+        """
+        state = self.__dict__.copy()
+        setup = state.get("_setup")
+        if setup is not None and "casadi_fcns" in setup:
+            state["_setup"] = {
+                key: value
+                for key, value in setup.items()
+                if key == "casadi_fcns"
+                or key not in [*setup["casadi_fcns"], "solver", "batch_solvers"]
+            }
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__ = state
+        setup = state.get("_setup")
+        if setup is not None and "casadi_fcns" in setup:
+            self._generate_casadi_solver()
+
+    def _make_casadi_solver(self):
+        """
+        Create a new C++ solver object from the functions stored by `set_up`. Each
+        solver object owns its own integrator memory, so separate solver objects
+        can be used to solve concurrently.
+        """
+        options = self._options
+        if self.output_mode == "solver steps":
+            # the internal steps are recorded with the dense output
+            options = {**options, "dense_output": True}
+        return idaklu.create_casadi_solver(
+            self._setup["number_of_states"],
+            self._setup["number_of_sensitivity_parameters"],
+            self._setup["residual"],
+            self._setup["jac_times_cjmass"],
+            self._setup["jac_times_cjmass_colptrs"],
+            self._setup["jac_times_cjmass_rowvals"],
+            self._setup["jac_times_cjmass_nnz"],
+            self._setup["jac_bandwidth_lower"],
+            self._setup["jac_bandwidth_upper"],
+            self._setup["jac_rhs_algebraic_action"],
+            self._setup["mass_action"],
+            self._setup["sensfn"],
+            self._setup["rootfn"],
+            self._setup["num_of_events"],
+            self._setup["ids"],
+            self._setup["atol"],
+            self._setup["rtol"],
+            self._setup["inputs_length"],
+            self._setup["var_casadi_fcns"],
+            options,
+        )
+
+    def _stack_inputs(self, inputs_dict):
+        """Stack the values of `inputs_dict` into a column vector"""
         if inputs_dict:
             arrays_to_stack = [np.array(x).reshape(-1, 1) for x in inputs_dict.values()]
-            inputs = np.vstack(arrays_to_stack)
+            return np.vstack(arrays_to_stack)
         else:
-            inputs = np.array([[]])
+            return np.array([[]])
 
+    def _get_initial_states(self, model):
+        """
+        Return the initial states `y0`, and the initial states and derivatives
+        including sensitivities, `y0full` and `ydot0full`, in the form required
+        by the C++ solvers
+        """
         # do this here cause y0 is set after set_up (calc consistent conditions)
         y0 = model.y0
         if isinstance(y0, casadi.DM):
@@ -516,6 +656,28 @@ class IDAKLUSolver(pybamm.BaseSolver):
             y0full = y0
             ydot0full = ydot0
 
+        return y0, y0full, ydot0full
+
+    def _integrate(self, model, t_eval, inputs_dict=None):
+        """
+        Solve a DAE model defined by residuals with initial conditions y0.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model whose solution to calculate.
+        t_eval : numeric type
+            The times at which to compute the solution
+        inputs_dict : dict, optional
+            Any input parameters to pass to the model when solving
+        """
+        inputs_dict = inputs_dict or {}
+        # stack inputs
+        inputs = self._stack_inputs(inputs_dict)
+
+        y0, y0full, ydot0full = self._get_initial_states(model)
+        ydot0 = np.zeros_like(y0)
+
         try:
             atol = model.atol
         except AttributeError:
@@ -555,14 +717,99 @@ class IDAKLUSolver(pybamm.BaseSolver):
             )
         integration_time = timer.time()
 
+        return self._process_idaklu_solution(
+            sol, model, inputs_dict, y0.size, integration_time
+        )
+
+    def _integrate_batch(self, model, t_eval, inputs_list, nproc=None):
+        """
+        Solve a DAE model for each set of inputs in `inputs_list`. For models in
+        casadi format, the solves run inside the C++ extension on `nproc` threads
+        (one solver object per thread) without holding the GIL, so there is no
+        process start-up or pickling overhead. Other formats fall back to
+        :meth:`pybamm.BaseSolver._integrate_batch`.
+
+        Parameters
+        ----------
+        model : :class:`pybamm.BaseModel`
+            The model whose solution to calculate.
+        t_eval : numeric type
+            The times at which to compute the solution
+        inputs_list : list of dict
+            The input parameters to pass to the model, one dictionary per solve
+        nproc : int, optional
+            Number of threads to use. If None, uses the number of CPUs
+
+        Returns
+        -------
+        list of :class:`pybamm.Solution`
+            The solutions, in the same order as `inputs_list`
+        """
+        if model.convert_to_format != "casadi":
+            return super()._integrate_batch(model, t_eval, inputs_list, nproc)
+
+        inputs_list = [inputs_dict or {} for inputs_dict in inputs_list]
+        inputs = np.vstack(
+            [self._stack_inputs(inputs_dict).T for inputs_dict in inputs_list]
+        )
+        y0, y0full, ydot0full = self._get_initial_states(model)
+
+        # one C++ solver per thread, kept until the model is set up again
+        nthreads = min(nproc or os.cpu_count(), len(inputs_list))
+        solvers = self._setup.setdefault("batch_solvers", [self._setup["solver"]])
+        while len(solvers) < nthreads:
+            solvers.append(self._make_casadi_solver())
+
+        timer = pybamm.Timer()
+        sols = idaklu.solve_casadi_batch(
+            solvers[:nthreads], t_eval, y0full, ydot0full, inputs
+        )
+        integration_time = timer.time()
+
+        return [
+            self._process_idaklu_solution(
+                sol, model, inputs_dict, y0.size, integration_time
+            )
+            for sol, inputs_dict in zip(sols, inputs_list)
+        ]
+
+    def _get_dense_output(self, t, y, yp):
+        """
+        Build a cubic Hermite interpolant through the states `y` (with time
+        derivatives `yp`) at the internal steps `t` of the solver. The interpolant
+        returns an array of shape (number of states, number of times).
+        """
+        # a root can be found exactly at the end of an internal step, giving a
+        # repeated time
+        keep = np.concatenate([[True], np.diff(t) > 0])
+        return interpolate.CubicHermiteSpline(t[keep], y[keep].T, yp[keep].T, axis=1)
+
+    def _process_idaklu_solution(
+        self, sol, model, inputs_dict, number_of_states, integration_time
+    ):
+        """Convert a solution returned by the C++ solver to a pybamm.Solution"""
         number_of_sensitivity_parameters = self._setup[
             "number_of_sensitivity_parameters"
         ]
         sensitivity_names = self._setup["sensitivity_names"]
         t = sol.t
         number_of_timesteps = t.size
-        number_of_states = y0.size
-        y_out = sol.y.reshape((number_of_timesteps, number_of_states))
+        t_dense, y_dense, yp_dense = sol.t_dense, sol.y_dense, sol.yp_dense
+        output_variables = self._setup.get("output_variables") or None
+        if self.output_mode == "solver steps":
+            # a root can be found exactly at the end of an internal step, giving a
+            # repeated time
+            keep = np.concatenate([[True], np.diff(t_dense) > 0])
+            t = t_dense[keep]
+            y_out = y_dense[keep]
+            y_event = y_out[-1]
+        elif output_variables is None:
+            y_out = sol.y.reshape((number_of_timesteps, number_of_states))
+            y_event = y_out[-1]
+        else:
+            # only the output variables were stored, plus the final state
+            y_out = sol.y.reshape((number_of_timesteps, -1))
+            y_event = sol.y_term
 
         # return sensitivity solution, we need to flatten yS to
         # (#timesteps * #states (where t is changing the quickest),)
@@ -587,16 +834,19 @@ class IDAKLUSolver(pybamm.BaseSolver):
                 termination = "event"
 
             sol = pybamm.Solution(
-                sol.t,
+                t,
                 np.transpose(y_out),
                 model,
                 inputs_dict,
                 np.array([t[-1]]),
-                np.transpose(y_out[-1])[:, np.newaxis],
+                np.transpose(y_event)[:, np.newaxis],
                 termination,
                 sensitivities=yS_out,
+                output_variables=output_variables,
             )
             sol.integration_time = integration_time
+            if t_dense.size > 0:
+                sol.dense_output = self._get_dense_output(t_dense, y_dense, yp_dense)
             return sol
         else:
             raise pybamm.SolverError("idaklu solver failed")
@@ -0,0 +1,139 @@
+#
+# On-disk cache of CasADi functions compiled to native code
+#
+import hashlib
+import os
+import shlex
+import subprocess
+import tempfile
+
+import casadi
+
+import pybamm
+
+
+class JitCache:
+    """
+    A persistent cache, on disk, of CasADi functions compiled to native code. The C
+    code of a function is generated by CasADi, compiled into a shared library with
+    the system C compiler, and stored under a hash of the generated code (and of the
+    compiler and its flags), so that a function is only compiled once and the
+    compiled library is loaded directly on later runs, including in other processes.
+
+    The cache can be passed to :class:`pybamm.CasadiSolver` and
+    :class:`pybamm.IDAKLUSolver` using the ``jit_cache`` keyword argument, in which
+    case the model functions that they evaluate repeatedly while integrating (the
+    residual, its Jacobian, the events and the output variables) are evaluated by
+    compiled code instead of CasADi's virtual machine. Compiling large models can
+    take a while, so this is most useful for models that are solved many times.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory in which to store the compiled libraries. It is created if it
+        does not exist, and must be owned by the current user and not be writable
+        by other users, since the libraries are loaded into the process. If None
+        (default), a "jit" directory in the user's PyBaMM cache directory is used
+        (see :func:`pybamm.get_cache_directory`).
+    compiler : str, optional
+        The C compiler. If None (default), the compiler given by the "CC"
+        environment variable, or "cc" if it is not set.
+    flags : list of str, optional
+        The flags to pass to the compiler, in addition to those needed to build a
+        shared library. Default is ``["-O2"]``.
+
+    For example:
+
+    .. code-block:: python
+
+        jit_cache = pybamm.JitCache("jit_cache")
+        solver = pybamm.CasadiSolver(jit_cache=jit_cache)
+    """
+
+    def __init__(self, directory=None, compiler=None, flags=None):
+        self.directory = pybamm.get_cache_directory("jit", directory)
+        self.compiler = compiler or os.environ.get("CC", "cc")
+        self.flags = ["-O2"] if flags is None else list(flags)
+
+    def compile(self, function, jacobian=False):
+        """
+        Return a compiled version of `function`, compiling it if it is not in the
+        cache yet.
+
+        Parameters
+        ----------
+        function : :class:`casadi.Function`
+            The function to compile
+        jacobian : bool, optional
+            Whether to also compile the Jacobian of `function`, for solvers that need
+            to differentiate it (e.g. CasADi's integrators). Default is False.
+
+        Returns
+        -------
+        :class:`casadi.Function`
+            The compiled function, which has the same inputs and outputs as
+            `function`
+        """
+        generator = casadi.CodeGenerator(
+            "pybamm_jit.c", {"with_header": False, "with_mem": False}
+        )
+        generator.add(function)
+        if jacobian:
+            generator.add(function.jacobian())
+        source = generator.dump()
+
+        key = hashlib.sha256(
+            "\n".join([casadi.__version__, self.compiler, *self.flags, source]).encode()
+        ).hexdigest()
+        path = os.path.join(self.directory, key + ".so")
+        if not os.path.exists(path):
+            pybamm.logger.info(f"Compiling '{function.name()}' to native code")
+            self._build(source, path)
+        return casadi.external(function.name(), path)
+
+    def _build(self, source, path):
+        """
+        Compile `source` into a shared library at `path`. The library is built in a
+        temporary file that is then renamed, so that processes sharing the cache
+        never load a partly written library.
+        """
+        fd, source_path = tempfile.mkstemp(dir=self.directory, suffix=".c")
+        with os.fdopen(fd, "w") as f:
+            f.write(source)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        command = [
+            *shlex.split(self.compiler),
+            *self.flags,
+            "-shared",
+            "-fPIC",
+            "-o",
+            tmp_path,
+            source_path,
+        ]
+        try:
+            try:
+                result = subprocess.run(command, capture_output=True, text=True)
+            except OSError as error:
+                raise pybamm.SolverError(
+                    f"Could not run the C compiler '{self.compiler}' ({error})"
+                )
+            if result.returncode != 0:
+                raise pybamm.SolverError(
+                    "Could not compile CasADi function with '{}':\n{}".format(
+                        " ".join(command), result.stderr
+                    )
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            os.remove(source_path)
+
+    def clear(self):
+        """Remove all the compiled libraries of the cache"""
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".so"):
+                os.remove(os.path.join(self.directory, filename))
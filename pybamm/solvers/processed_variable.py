@@ -107,23 +107,33 @@ class ProcessedVariable(object):
                             + "(note processing of 3D variables is not yet implemented)"
                         )
 
-    def initialise_0D(self):
-        # initialise empty array of the correct size
-        entries = np.empty(len(self.t_pts))
-        idx = 0
-
-        entries = np.empty(len(self.t_pts))
+    def _evaluate_base_variables(self, size):
+        """
+        Evaluate the base variables at all the time points of the solution, and
+        return the results as an array of shape (size, number of time points).
+        The casadi function of each sub-solution is mapped over all the time points
+        of that sub-solution, so that it is evaluated in a single call.
+        """
+        entries = np.empty((size, len(self.t_pts)))
+        # sub-solutions often share the same function and number of time points
+        # (e.g. repeated experiment steps), so reuse the mapped functions
+        mapped_vars_casadi = {}
         idx = 0
-        # Evaluate the base_variable index-by-index
         for ts, ys, inputs, base_var_casadi in zip(
             self.all_ts, self.all_ys, self.all_inputs_casadi, self.base_variables_casadi
         ):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[idx] = float(base_var_casadi(t, y, inputs))
+            n_t = len(ts)
+            key = (id(base_var_casadi), n_t)
+            if key not in mapped_vars_casadi:
+                mapped_vars_casadi[key] = base_var_casadi.map(n_t)
+            entries[:, idx : idx + n_t] = mapped_vars_casadi[key](
+                np.reshape(ts, (1, n_t)), ys, inputs
+            ).full()
+            idx += n_t
+        return entries
 
-                idx += 1
+    def initialise_0D(self):
+        entries = self._evaluate_base_variables(1)[0]
 
         if self.cumtrapz_ic is not None:
             entries = cumulative_trapezoid(
@@ -138,18 +148,7 @@ class ProcessedVariable(object):
 
     def initialise_1D(self, fixed_t=False):
         len_space = self.base_eval.shape[0]
-        entries = np.empty((len_space, len(self.t_pts)))
-
-        # Evaluate the base_variable index-by-index
-        idx = 0
-        for ts, ys, inputs, base_var_casadi in zip(
-            self.all_ts, self.all_ys, self.all_inputs_casadi, self.base_variables_casadi
-        ):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[:, idx] = base_var_casadi(t, y, inputs).full()[:, 0]
-                idx += 1
+        entries = self._evaluate_base_variables(len_space)
 
         # Get node and edge values
         nodes = self.mesh.nodes
@@ -221,22 +220,11 @@ class ProcessedVariable(object):
         second_dim_pts = second_dim_nodes
         first_dim_size = len(first_dim_pts)
         second_dim_size = len(second_dim_pts)
-        entries = np.empty((first_dim_size, second_dim_size, len(self.t_pts)))
-
-        # Evaluate the base_variable index-by-index
-        idx = 0
-        for ts, ys, inputs, base_var_casadi in zip(
-            self.all_ts, self.all_ys, self.all_inputs_casadi, self.base_variables_casadi
-        ):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[:, :, idx] = np.reshape(
-                    base_var_casadi(t, y, inputs).full(),
-                    [first_dim_size, second_dim_size],
-                    order="F",
-                )
-                idx += 1
+        entries = np.reshape(
+            self._evaluate_base_variables(first_dim_size * second_dim_size),
+            [first_dim_size, second_dim_size, len(self.t_pts)],
+            order="F",
+        )
 
         # add points outside first dimension domain for extrapolation to
         # boundaries
@@ -353,22 +341,11 @@ class ProcessedVariable(object):
         len_y = len(y_sol)
         z_sol = self.mesh.edges["z"]
         len_z = len(z_sol)
-        entries = np.empty((len_y, len_z, len(self.t_pts)))
-
-        # Evaluate the base_variable index-by-index
-        idx = 0
-        for ts, ys, inputs, base_var_casadi in zip(
-            self.all_ts, self.all_ys, self.all_inputs_casadi, self.base_variables_casadi
-        ):
-            for inner_idx, t in enumerate(ts):
-                t = ts[inner_idx]
-                y = ys[:, inner_idx]
-                entries[:, :, idx] = np.reshape(
-                    base_var_casadi(t, y, inputs).full(),
-                    [len_y, len_z],
-                    order="C",
-                )
-                idx += 1
+        entries = np.reshape(
+            self._evaluate_base_variables(len_y * len_z),
+            [len_y, len_z, len(self.t_pts)],
+            order="C",
+        )
 
         # assign attributes for reference
         self.entries = entries
@@ -447,28 +424,47 @@ class ProcessedVariable(object):
         dvar_dy = casadi.jacobian(var_casadi, y_casadi)
         dvar_dp = casadi.jacobian(var_casadi, p_casadi_stacked)
 
-        # Convert to functions and evaluate index-by-index
-        dvar_dy_func = casadi.Function(
-            "dvar_dy", [t_casadi, y_casadi, p_casadi_stacked], [dvar_dy]
-        )
-        dvar_dp_func = casadi.Function(
-            "dvar_dp", [t_casadi, y_casadi, p_casadi_stacked], [dvar_dp]
+        # The sensitivity of the variable at each time point is
+        # dvar/dy @ dy/dp + dvar/dp, where dy/dp is the (n_y, n_p) block of the
+        # solution sensitivities at that time point
+        n_y = self.all_ys[0].shape[0]
+        n_p = p_casadi_stacked.shape[0]
+        dy_dp_casadi = casadi.MX.sym("dy_dp", n_y, n_p)
+        S_var_func = casadi.Function(
+            "S_var",
+            [t_casadi, y_casadi, p_casadi_stacked, dy_dp_casadi],
+            [dvar_dy @ dy_dp_casadi + dvar_dp],
         )
-        for index, (ts, ys) in enumerate(zip(self.all_ts, self.all_ys)):
-            for idx, t in enumerate(ts):
-                u = ys[:, idx]
-                next_dvar_dy_eval = dvar_dy_func(t, u, inputs_stacked)
-                next_dvar_dp_eval = dvar_dp_func(t, u, inputs_stacked)
-                if index == 0 and idx == 0:
-                    dvar_dy_eval = next_dvar_dy_eval
-                    dvar_dp_eval = next_dvar_dp_eval
-                else:
-                    dvar_dy_eval = casadi.diagcat(dvar_dy_eval, next_dvar_dy_eval)
-                    dvar_dp_eval = casadi.vertcat(dvar_dp_eval, next_dvar_dp_eval)
 
-        # Compute sensitivity
+        # dy/dp has shape (n_t * n_y, n_p), with the time changing the slowest.
+        # Arrange the blocks side by side so that the function can be mapped over
+        # all the time points at once
         dy_dp = self.solution_sensitivities["all"]
-        S_var = dvar_dy_eval @ dy_dp + dvar_dp_eval
+        if isinstance(dy_dp, casadi.DM):
+            dy_dp = dy_dp.full()
+        n_t = len(self.t_pts)
+        dy_dp = dy_dp.reshape(n_t, n_y, n_p).transpose(1, 0, 2).reshape(n_y, -1)
+
+        # Evaluate for each sub-solution, writing the (n_x, n_t * n_p) results
+        # side by side
+        n_x = self.base_eval.size
+        S_var = np.empty((n_x, n_t * n_p))
+        idx = 0
+        for ts, ys in zip(self.all_ts, self.all_ys):
+            n_t_sub = len(ts)
+            cols = slice(idx * n_p, (idx + n_t_sub) * n_p)
+            S_var[:, cols] = (
+                S_var_func.map(n_t_sub)(
+                    np.reshape(ts, (1, n_t_sub)), ys, inputs_stacked, dy_dp[:, cols]
+                )
+            ).full()
+            idx += n_t_sub
+
+        # Rearrange into an (n_t * n_x, n_p) matrix, with the time changing the
+        # slowest
+        S_var = casadi.DM(
+            S_var.reshape(n_x, n_t, n_p).transpose(1, 0, 2).reshape(n_t * n_x, n_p)
+        )
 
         sensitivities = {"all": S_var}
 
@@ -2,6 +2,7 @@
 # Solution class
 #
 import casadi
+import itertools
 import json
 import numbers
 import numpy as np
@@ -25,6 +26,80 @@ class NumpyEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)  # pragma: no cover
 
 
+class _AppendOnlyList:
+    """
+    A view of the first `length` items of a list, which can be shared between
+    solutions. Extending the view of the whole list extends the list in place,
+    so that adding solutions one after the other (e.g. when stepping through an
+    experiment) costs a constant amortised time per sub-solution, instead of
+    copying the lists of all the previous sub-solutions at each step. Views that
+    are not at the end of the list are copied before being extended.
+
+    Slicing or adding a view returns a new list.
+    """
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, items, length=None):
+        self._items = items
+        self._length = len(items) if length is None else length
+
+    def extended(self, items):
+        """Return a view of these items followed by `items`"""
+        if self._length == len(self._items):
+            self._items.extend(items)
+            return _AppendOnlyList(self._items)
+        return _AppendOnlyList(self._items[: self._length] + list(items))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._items[: self._length][index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("list index out of range")
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        # the item is shared with the other views of the list
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("list assignment index out of range")
+        self._items[index] = value
+
+    def __iter__(self):
+        return itertools.islice(self._items, self._length)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        return (_AppendOnlyList, (list(self),))
+
+
+def _as_append_only_list(items):
+    """
+    Return `items` as an _AppendOnlyList. Lists are copied, so that extending the
+    result never changes the list passed in.
+    """
+    if isinstance(items, _AppendOnlyList):
+        return items
+    return _AppendOnlyList(list(items))
+
+
 class Solution(object):
     """
     Class containing the solution of, and various attributes associated with, a PyBaMM
@@ -61,6 +136,16 @@ class Solution(object):
         True if sensitivities included as the solution of the explicit forwards
         equations.  False if no sensitivities included/wanted. Dict if sensitivities are
         provided as a dict of {parameter: sensitivities} pairs.
+    check_solution : bool, optional
+        Whether to check that the values in `all_ys` are not too large. Default is
+        True.
+    output_variables : dict, optional
+        If the solver only returned some output variables instead of the full state
+        (see the `output_variables` option of :class:`pybamm.IDAKLUSolver`), a
+        dictionary of {variable name: slice} pairs giving the rows of `all_ys` in
+        which each variable is stored. In this case `y_event` must be the full
+        state at the final time. Default is None, meaning that `all_ys` contains
+        the full state.
 
     """
 
@@ -75,27 +160,29 @@ class Solution(object):
         termination="final time",
         sensitivities=False,
         check_solution=True,
+        output_variables=None,
     ):
-        if not isinstance(all_ts, list):
+        if not isinstance(all_ts, (list, _AppendOnlyList)):
             all_ts = [all_ts]
-        if not isinstance(all_ys, list):
+        if not isinstance(all_ys, (list, _AppendOnlyList)):
             all_ys = [all_ys]
-        if not isinstance(all_models, list):
+        if not isinstance(all_models, (list, _AppendOnlyList)):
             all_models = [all_models]
-        self._all_ts = all_ts
-        self._all_ys = all_ys
-        self._all_ys_and_sens = all_ys
-        self._all_models = all_models
+        self._all_ts = _as_append_only_list(all_ts)
+        self._all_ys = _as_append_only_list(all_ys)
+        self._all_ys_and_sens = self._all_ys
+        self._all_models = _as_append_only_list(all_models)
+        self.output_variables = output_variables
 
         # Set up inputs
-        if not isinstance(all_inputs, list):
+        if not isinstance(all_inputs, (list, _AppendOnlyList)):
             all_inputs_copy = dict(all_inputs)
             for key, value in all_inputs_copy.items():
                 if isinstance(value, numbers.Number):
                     all_inputs_copy[key] = np.array([value])
-            self.all_inputs = [all_inputs_copy]
+            self.all_inputs = _AppendOnlyList([all_inputs_copy])
         else:
-            self.all_inputs = all_inputs
+            self.all_inputs = _as_append_only_list(all_inputs)
 
         self.sensitivities = sensitivities
 
@@ -113,6 +200,10 @@ class Solution(object):
         self._termination = termination
         self.closest_event_idx = None
 
+        # Dense output (a callable that returns the state at any time between the
+        # first and last times), if provided by the solver
+        self.dense_output = None
+
         # Initialize times
         self.set_up_time = None
         self.solve_time = None
@@ -123,7 +214,7 @@ class Solution(object):
         self.data = pybamm.FuzzyDict()
 
         # Add self as sub-solution for compatibility with ProcessedVariable
-        self._sub_solutions = [self]
+        self._sub_solutions = _AppendOnlyList([self])
 
         # initialize empty cycles
         self._cycles = []
@@ -143,13 +234,16 @@ class Solution(object):
             self.all_models[0], self.y, self.t, self.all_inputs[0]
         )
 
-        # make sure we remove all sensitivities from all_ys
-        for index, (model, ys, ts, inputs) in enumerate(
-            zip(self.all_models, self.all_ys, self.all_ts, self.all_inputs)
-        ):
-            self._all_ys[index], _ = self._extract_explicit_sensitivities(
-                model, ys, ts, inputs
-            )
+        # make sure we remove all sensitivities from all_ys (in a new list, as the
+        # list may be shared with other solutions)
+        self._all_ys = _AppendOnlyList(
+            [
+                self._extract_explicit_sensitivities(model, ys, ts, inputs)[0]
+                for model, ys, ts, inputs in zip(
+                    self.all_models, self.all_ys, self.all_ts, self.all_inputs
+                )
+            ]
+        )
 
     def _extract_explicit_sensitivities(self, model, y, t_eval, inputs):
         """
@@ -253,7 +347,7 @@ class Solution(object):
 
     def set_t(self):
         self._t = np.concatenate(self.all_ts)
-        if any(np.diff(self._t) <= 0):
+        if np.any(np.diff(self._t) <= 0):
             raise ValueError("Solution time vector must be strictly increasing")
 
     @property
@@ -305,7 +399,14 @@ class Solution(object):
         # We only care about the cases where y is growing too large without any
         # restraint, so if y gets large in the middle then comes back down that is ok
         y, model = self.all_ys[-1], self.all_models[-1]
+        if self.output_variables is not None:
+            # all_ys only holds the output variables, so check the final state
+            if self.y_event is None:
+                return
+            y = self.y_event
         y = y[:, -1]
+        if isinstance(y, casadi.DM):
+            y = y.full()
         if np.any(y > pybamm.settings.max_y_value):
             for var in [*model.rhs.keys(), *model.algebraic.keys()]:
                 y_var = y[model.variables[var.name].y_slices[0]]
@@ -331,9 +432,15 @@ class Solution(object):
         """Model(s) used for solution"""
         return self._all_models
 
-    @cached_property
+    @property
     def all_inputs_casadi(self):
-        return [casadi.vertcat(*inp.values()) for inp in self.all_inputs]
+        try:
+            return self._all_inputs_casadi
+        except AttributeError:
+            self._all_inputs_casadi = _AppendOnlyList(
+                [casadi.vertcat(*inp.values()) for inp in self.all_inputs]
+            )
+            return self._all_inputs_casadi
 
     @property
     def t_event(self):
@@ -370,6 +477,8 @@ class Solution(object):
             None,
             None,
             "final time",
+            check_solution=False,
+            output_variables=self.output_variables,
         )
         new_sol._all_inputs_casadi = self.all_inputs_casadi[:1]
         new_sol._sub_solutions = self.sub_solutions[:1]
@@ -385,16 +494,22 @@ class Solution(object):
         """
         A Solution object that only contains the final state. This is faster to evaluate
         than the full solution when only the final state is needed (e.g. to initialize
-        a model with the solution)
+        a model with the solution). This always contains the full state, even if the
+        solver only returned some output variables.
         """
+        if self.output_variables is None:
+            y_last = self.all_ys[-1][:, -1:]
+        else:
+            y_last = self.y_event
         new_sol = Solution(
             self.all_ts[-1][-1:],
-            self.all_ys[-1][:, -1:],
+            y_last,
             self.all_models[-1:],
             self.all_inputs[-1:],
             self.t_event,
             self.y_event,
             self.termination,
+            check_solution=False,
         )
         new_sol._all_inputs_casadi = self.all_inputs_casadi[-1:]
         new_sol._sub_solutions = self.sub_solutions[-1:]
@@ -454,7 +569,14 @@ class Solution(object):
             for i, (model, ys, inputs, var_pybamm) in enumerate(
                 zip(self.all_models, self.all_ys, self.all_inputs, vars_pybamm)
             ):
-                if isinstance(var_pybamm, pybamm.ExplicitTimeIntegral):
+                if self.output_variables is not None:
+                    # the solver returned this variable directly, rather than the
+                    # states that it depends on
+                    if isinstance(var_pybamm, pybamm.ExplicitTimeIntegral):
+                        cumtrapz_ic = var_pybamm.initial_condition.evaluate()
+                        vars_pybamm[i] = var_pybamm.child
+                    var_casadi = self.process_output_variable_casadi(key, inputs, ys)
+                elif isinstance(var_pybamm, pybamm.ExplicitTimeIntegral):
                     cumtrapz_ic = var_pybamm.initial_condition
                     cumtrapz_ic = cumtrapz_ic.evaluate()
                     var_pybamm = var_pybamm.child
@@ -486,6 +608,91 @@ class Solution(object):
         var_casadi = casadi.Function("variable", [t_MX, y_MX, inputs_MX], [var_sym])
         return var_casadi
 
+    def resample(self, t):
+        """
+        Evaluate the solution at new times, using the dense output returned by the
+        solver (e.g. ``pybamm.IDAKLUSolver(options={"dense_output": True})``). This
+        interpolates the states to the accuracy of the solver, without solving
+        again, so a model can be solved with a sparse `t_eval` and the solution
+        resampled at high resolution afterwards.
+
+        Parameters
+        ----------
+        t : array-like
+            The (strictly increasing) times at which to evaluate the solution. These
+            must lie between the first and last times of the solution.
+
+        Returns
+        -------
+        :class:`pybamm.Solution`
+            A solution containing the full state at times `t`
+        """
+        t = np.asarray(t, dtype=float).flatten()
+        if np.any(np.diff(t) <= 0):
+            raise ValueError("t must be strictly increasing")
+        if t[0] < self.t[0] or t[-1] > self.t[-1]:
+            raise ValueError(
+                f"t must be between {self.t[0]} and {self.t[-1]}, the first and last "
+                "times of the solution"
+            )
+
+        # sub-solutions with a single time point (e.g. the event state) add nothing
+        sub_solutions = [sub for sub in self.sub_solutions if len(sub.t) > 1]
+        all_ts, all_ys, all_models, all_inputs = [], [], [], []
+        start = 0
+        for i, sub in enumerate(sub_solutions):
+            if sub.dense_output is None:
+                raise pybamm.SolverError(
+                    "Solution cannot be resampled as it has no dense output. Solve "
+                    "with a solver that returns dense output, e.g. "
+                    "pybamm.IDAKLUSolver(options={'dense_output': True})"
+                )
+            if i == len(sub_solutions) - 1:
+                end = len(t)
+            else:
+                end = np.searchsorted(t, sub.t[-1], side="right")
+            if end > start:
+                all_ts.append(t[start:end])
+                all_ys.append(sub.dense_output(t[start:end]))
+                all_models.append(sub.all_models[0])
+                all_inputs.append(sub.all_inputs[0])
+            start = end
+
+        new_sol = Solution(
+            all_ts,
+            all_ys,
+            all_models,
+            all_inputs,
+            self.t_event,
+            self.y_event,
+            self.termination,
+        )
+        new_sol.closest_event_idx = self.closest_event_idx
+        new_sol.set_up_time = self.set_up_time
+        new_sol.solve_time = self.solve_time
+        new_sol.integration_time = self.integration_time
+        return new_sol
+
+    def process_output_variable_casadi(self, key, inputs, ys):
+        """
+        Create a casadi function that extracts the output variable `key` from the
+        rows of `ys`, for solutions that only contain the output variables
+        """
+        if key not in self.output_variables:
+            raise KeyError(
+                f"'{key}' was not returned by the solver. Add it to the "
+                "solver's output_variables to access it"
+            )
+        t_MX = casadi.MX.sym("t")
+        y_MX = casadi.MX.sym("y", ys.shape[0])
+        inputs_MX = casadi.MX.sym(
+            "input", sum(value.shape[0] for value in inputs.values())
+        )
+        var_casadi = casadi.Function(
+            "variable", [t_MX, y_MX, inputs_MX], [y_MX[self.output_variables[key]]]
+        )
+        return var_casadi
+
     def __getitem__(self, key):
         """Read a variable from the solution. Variables are created 'just in time', i.e.
         only when they are called.
@@ -700,6 +907,10 @@ class Solution(object):
             raise pybamm.SolverError(
                 "Only a Solution or None can be added to a Solution"
             )
+        if other.output_variables != self.output_variables:
+            raise pybamm.SolverError(
+                "Cannot add solutions that store different output variables"
+            )
         # Special case: new solution only has one timestep and it is already in the
         # existing solution. In this case, return a copy of the existing solution
         if (
@@ -717,32 +928,38 @@ class Solution(object):
         # Update list of sub-solutions
         if other.all_ts[0][0] == self.all_ts[-1][-1]:
             # Skip first time step if it is repeated
-            all_ts = self.all_ts + [other.all_ts[0][1:]] + other.all_ts[1:]
-            all_ys = self.all_ys + [other.all_ys[0][:, 1:]] + other.all_ys[1:]
+            other_ts = [other.all_ts[0][1:]] + other.all_ts[1:]
+            other_ys = [other.all_ys[0][:, 1:]] + other.all_ys[1:]
         else:
-            all_ts = self.all_ts + other.all_ts
-            all_ys = self.all_ys + other.all_ys
+            other_ts = other.all_ts
+            other_ys = other.all_ys
 
         new_sol = Solution(
-            all_ts,
-            all_ys,
-            self.all_models + other.all_models,
-            self.all_inputs + other.all_inputs,
+            self.all_ts.extended(other_ts),
+            self.all_ys.extended(other_ys),
+            self.all_models.extended(other.all_models),
+            _as_append_only_list(self.all_inputs).extended(other.all_inputs),
             other.t_event,
             other.y_event,
             other.termination,
             bool(self.sensitivities),
+            check_solution=False,
+            output_variables=self.output_variables,
         )
 
         new_sol.closest_event_idx = other.closest_event_idx
-        new_sol._all_inputs_casadi = self.all_inputs_casadi + other.all_inputs_casadi
+        new_sol._all_inputs_casadi = _as_append_only_list(
+            self.all_inputs_casadi
+        ).extended(other.all_inputs_casadi)
 
         # Set solution time
         new_sol.solve_time = self.solve_time + other.solve_time
         new_sol.integration_time = self.integration_time + other.integration_time
 
         # Set sub_solutions
-        new_sol._sub_solutions = self.sub_solutions + other.sub_solutions
+        new_sol._sub_solutions = _as_append_only_list(self.sub_solutions).extended(
+            other.sub_solutions
+        )
 
         return new_sol
 
@@ -758,6 +975,8 @@ class Solution(object):
             self.t_event,
             self.y_event,
             self.termination,
+            check_solution=False,
+            output_variables=self.output_variables,
         )
         new_sol._all_inputs_casadi = self.all_inputs_casadi
         new_sol._sub_solutions = self.sub_solutions
@@ -828,6 +1047,7 @@ def make_cycle_solution(step_solutions, esoh_solver=None, save_this_cycle=True):
         sum_sols.t_event,
         sum_sols.y_event,
         sum_sols.termination,
+        check_solution=False,
     )
     cycle_solution._all_inputs_casadi = sum_sols.all_inputs_casadi
     cycle_solution._sub_solutions = sum_sols.sub_solutions
@@ -856,8 +1076,7 @@ def _get_cycle_summary_variables(cycle_solution, esoh_solver):
 
     # Measured capacity variables
     if "Discharge capacity [A.h]" in model.variables:
-        Q = cycle_solution["Discharge capacity [A.h]"].data
-        min_Q, max_Q = np.min(Q), np.max(Q)
+        min_Q, max_Q = _get_extrema(cycle_solution, "Discharge capacity [A.h]")
 
         cycle_summary_variables.update(
             {
@@ -869,8 +1088,7 @@ def _get_cycle_summary_variables(cycle_solution, esoh_solver):
 
     # Voltage variables
     if "Battery voltage [V]" in model.variables:
-        V = cycle_solution["Battery voltage [V]"].data
-        min_V, max_V = np.min(V), np.max(V)
+        min_V, max_V = _get_extrema(cycle_solution, "Battery voltage [V]")
 
         cycle_summary_variables.update(
             {"Minimum voltage [V]": min_V, "Maximum voltage [V]": max_V}
@@ -881,8 +1099,8 @@ def _get_cycle_summary_variables(cycle_solution, esoh_solver):
     first_state = cycle_solution.first_state
     last_state = cycle_solution.last_state
     for var in degradation_variables:
-        data_first = first_state[var].data
-        data_last = last_state[var].data
+        data_first = _evaluate_scalar_variable(first_state, var)
+        data_last = _evaluate_scalar_variable(last_state, var)
         cycle_summary_variables[var] = data_last[0]
         var_lowercase = var[0].lower() + var[1:]
         cycle_summary_variables["Change in " + var_lowercase] = (
@@ -895,9 +1113,15 @@ def _get_cycle_summary_variables(cycle_solution, esoh_solver):
         and isinstance(model, pybamm.lithium_ion.BaseModel)
         and model.options.electrode_types["negative"] == "porous"
     ):
-        Q_n = last_state["Negative electrode capacity [A.h]"].data[0]
-        Q_p = last_state["Positive electrode capacity [A.h]"].data[0]
-        Q_Li = last_state["Total lithium capacity in particles [A.h]"].data[0]
+        Q_n = _evaluate_scalar_variable(
+            last_state, "Negative electrode capacity [A.h]"
+        )[0]
+        Q_p = _evaluate_scalar_variable(
+            last_state, "Positive electrode capacity [A.h]"
+        )[0]
+        Q_Li = _evaluate_scalar_variable(
+            last_state, "Total lithium capacity in particles [A.h]"
+        )[0]
 
         inputs = {"Q_n": Q_n, "Q_p": Q_p, "Q_Li": Q_Li}
 
@@ -912,3 +1136,80 @@ def _get_cycle_summary_variables(cycle_solution, esoh_solver):
         cycle_summary_variables.update(esoh_sol)
 
     return cycle_summary_variables
+
+
+def _get_extrema(solution, name):
+    """
+    Return the minimum and maximum of the scalar variable `name` over `solution`,
+    gathered from the minimum and maximum over each of its sub-solutions (i.e. the
+    steps of a cycle)
+    """
+    step_extrema = [
+        (np.min(entries), np.max(entries))
+        for entries in _evaluate_scalar_variable(solution, name, concatenate=False)
+    ]
+    return (
+        min(step_min for step_min, _ in step_extrema),
+        max(step_max for _, step_max in step_extrema),
+    )
+
+
+def _evaluate_scalar_variable(solution, name, concatenate=True):
+    """
+    Evaluate the scalar variable `name` at all the time points of `solution`. The
+    casadi function of the variable is evaluated on the time points of each
+    sub-solution directly, which is much cheaper than creating a
+    :class:`pybamm.ProcessedVariable` when only the values are needed (e.g. for
+    summary variables). Variables that need more processing (time integrals,
+    variables returned by the solver) fall back to the processed variable.
+
+    Parameters
+    ----------
+    solution : :class:`pybamm.Solution`
+        The solution to evaluate the variable on
+    name : str
+        The name of the variable
+    concatenate : bool, optional
+        Whether to return a single array (default), or a list of arrays, one for
+        each sub-solution
+
+    Returns
+    -------
+    :class:`numpy.array` or list of :class:`numpy.array`
+        The values of the variable
+    """
+    vars_pybamm = [model.variables_and_events[name] for model in solution.all_models]
+    if solution.output_variables is not None or any(
+        isinstance(var_pybamm, pybamm.ExplicitTimeIntegral)
+        for var_pybamm in vars_pybamm
+    ):
+        entries = solution[name].data
+        return entries if concatenate else [entries]
+
+    all_entries = []
+    mapped_vars_casadi = {}
+    for model, ts, ys, inputs, inputs_casadi, var_pybamm in zip(
+        solution.all_models,
+        solution.all_ts,
+        solution.all_ys,
+        solution.all_inputs,
+        solution.all_inputs_casadi,
+        vars_pybamm,
+    ):
+        if name not in model._variables_casadi:
+            model._variables_casadi[name] = solution.process_casadi_var(
+                var_pybamm, inputs, ys
+            )
+        var_casadi = model._variables_casadi[name]
+        n_t = len(ts)
+        key = (id(var_casadi), n_t)
+        if key not in mapped_vars_casadi:
+            mapped_vars_casadi[key] = var_casadi.map(n_t)
+        entries = mapped_vars_casadi[key](np.reshape(ts, (1, n_t)), ys, inputs_casadi)
+        if entries.shape[0] != 1:
+            raise ValueError(f"'{name}' is not a scalar variable")
+        all_entries.append(entries.full()[0])
+
+    if concatenate:
+        return np.concatenate(all_entries)
+    return all_entries
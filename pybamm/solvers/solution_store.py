@@ -0,0 +1,157 @@
+#
+# On-disk storage for the time and state arrays of solutions
+#
+import glob
+import os
+import shutil
+import tempfile
+import weakref
+
+import casadi
+import numpy as np
+
+import pybamm
+
+
+class SolutionStore:
+    """
+    Store the times and states of solutions on disk instead of in memory. Each
+    sub-solution appended to the store is written to its own chunk of ".npy" files
+    in `directory`, and the arrays held by the solution are replaced by read-only
+    memory maps of these files. Variables are then processed one sub-solution at a
+    time (see :class:`pybamm.ProcessedVariable`), so only the chunks that are
+    being read are loaded into memory, and memory use does not grow with the
+    number of cycles simulated.
+
+    The store can be passed to :meth:`pybamm.Simulation.solve` using the
+    ``solution_store`` keyword argument, in which case each step of an experiment
+    is appended to the store as soon as it has been solved.
+
+    Parameters
+    ----------
+    directory : str, optional
+        The directory in which to write the chunks. It is created if it does not
+        exist. If None (default), a new temporary directory is used, which is
+        removed when the store is closed (see :meth:`close`) or garbage collected.
+
+    For example:
+
+    .. code-block:: python
+
+        store = pybamm.SolutionStore("ageing_run")
+        solution = sim.solve(solution_store=store)
+        voltage = solution["Voltage [V]"].entries
+
+    The store can also be used as a context manager, which closes it on exit:
+
+    .. code-block:: python
+
+        with pybamm.SolutionStore() as store:
+            solution = sim.solve(solution_store=store)
+            voltage = solution["Voltage [V]"].entries
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="pybamm-solution-")
+            # only remove the directories created by the store, never those given
+            # by the user
+            self._finalizer = weakref.finalize(
+                self, shutil.rmtree, directory, ignore_errors=True
+            )
+        else:
+            self._finalizer = None
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        # carry on numbering after any chunks already in the directory, so that
+        # the files backing existing solutions are never overwritten
+        self._number_of_chunks = len(glob.glob(os.path.join(self.directory, "*_y.npy")))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Remove the temporary directory created by the store, if no directory was
+        given. Solutions backed by the store should not be used after it is closed.
+        Directories given by the user are left as they are.
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+
+    @property
+    def number_of_chunks(self):
+        """Number of sub-solutions written to the store"""
+        return self._number_of_chunks
+
+    def append(self, solution):
+        """
+        Write the times and states of each sub-solution of `solution` to disk, and
+        replace them in place by memory maps of the written files.
+
+        Parameters
+        ----------
+        solution : :class:`pybamm.Solution`
+            The solution to store. Its sub-solutions share the same arrays, so
+            they are updated as well.
+
+        Returns
+        -------
+        :class:`pybamm.Solution`
+            The same solution, now backed by the store
+        """
+        if isinstance(solution, pybamm.EmptySolution):
+            return solution
+
+        # sub-solutions are stored first, so that the arrays of the full solution
+        # that only drop the repeated first time of a sub-solution (see
+        # pybamm.Solution.__add__) can be read from the same chunk
+        stored = {}
+        for sol in [*solution.sub_solutions, solution]:
+            for idx, (ts, ys) in enumerate(zip(sol.all_ts, sol.all_ys)):
+                if isinstance(ys, np.memmap):
+                    continue
+                if isinstance(ys, casadi.DM):
+                    ys = ys.full()
+                    sol.all_ys[idx] = ys
+                if id(ys) not in stored:
+                    stored[id(ys)] = self._find_view(ts, ys, stored.values())
+                if stored[id(ys)] is None:
+                    stored[id(ys)] = (ts, ys, *self._write_chunk(ts, ys))
+                sol.all_ts[idx], sol.all_ys[idx] = stored[id(ys)][2:]
+
+            # drop cached arrays that would keep the in-memory data alive
+            for attr in ["_t", "_y", "first_state", "last_state"]:
+                sol.__dict__.pop(attr, None)
+
+        return solution
+
+    @staticmethod
+    def _find_view(ts, ys, stored):
+        """
+        If `ys` is equal to a stored array, or to a stored array without its first
+        column, return the corresponding memory maps. Otherwise return None.
+        """
+        for stored_ts, stored_ys, ts_map, ys_map in stored:
+            for start in [0, 1]:
+                if (
+                    ys.shape == (stored_ys.shape[0], stored_ys.shape[1] - start)
+                    and np.array_equal(ts, stored_ts[start:])
+                    and np.array_equal(ys, stored_ys[:, start:])
+                ):
+                    return ts, ys, ts_map[start:], ys_map[:, start:]
+        return None
+
+    def _write_chunk(self, ts, ys):
+        """Write `ts` and `ys` to the next chunk, and return memory maps of them"""
+        prefix = os.path.join(self.directory, f"{self._number_of_chunks:06d}")
+        self._number_of_chunks += 1
+        np.save(prefix + "_t.npy", ts)
+        np.save(prefix + "_y.npy", ys)
+        return (
+            np.load(prefix + "_t.npy", mmap_mode="r"),
+            np.load(prefix + "_y.npy", mmap_mode="r"),
+        )
@@ -0,0 +1,177 @@
+#
+# Persistent pool of worker processes for solving a model for many inputs
+#
+import multiprocessing as mp
+import os
+
+import pybamm
+
+# State held by each worker process: the solver and the set-up model it was
+# initialised with. This is shipped to each worker once, when the pool is started.
+_worker_state = {}
+
+
+def _initialise_worker(solver, model):
+    _worker_state["solver"] = solver
+    _worker_state["model"] = model
+
+
+def _integrate_in_worker(task):
+    """
+    Integrate the model held by this worker for one set of inputs, returning only
+    the arrays needed to rebuild the solution in the parent process
+    """
+    t_eval, inputs, y0, y0S = task
+    solver = _worker_state["solver"]
+    model = _worker_state["model"]
+    model.y0 = y0
+    model.y0S = y0S
+    sol = solver._integrate(model, t_eval, inputs)
+    return {
+        "all_ts": sol.all_ts,
+        "all_ys": sol.all_ys,
+        "all_inputs": sol.all_inputs,
+        "t_event": sol.t_event,
+        "y_event": sol.y_event,
+        "termination": sol.termination,
+        "sensitivities": sol._sensitivities,
+        "closest_event_idx": sol.closest_event_idx,
+        "integration_time": sol.integration_time,
+    }
+
+
+class SolverPool:
+    """
+    A long-lived pool of worker processes used to solve a set-up model for a list
+    of inputs. The solver and model are shipped to each worker once, when the
+    workers are started, and the workers are kept alive between calls to
+    :meth:`pybamm.BaseSolver.solve` so that only the inputs, initial conditions and
+    solution arrays are exchanged with the workers on each call. Inputs are
+    scheduled dynamically in chunks, so that slow inputs do not stall the rest of
+    the batch.
+
+    The pool can be attached to a solver (``solver.pool = pool``), or passed to
+    :meth:`pybamm.BaseSolver.solve` or :meth:`pybamm.Simulation.solve` using the
+    ``pool`` keyword argument.
+
+    Parameters
+    ----------
+    processes : int, optional
+        Number of worker processes. Defaults to the value returned by
+        "os.cpu_count()".
+    chunksize : int, optional
+        Number of inputs sent to a worker at a time. If None (default), the
+        chunksize is chosen so that each worker receives around four chunks per
+        call, which balances scheduling overhead against load balancing.
+
+    For example:
+
+    .. code-block:: python
+
+        with pybamm.SolverPool(processes=4) as pool:
+            for inputs_list in batches:
+                solutions = solver.solve(model, t_eval, inputs=inputs_list, pool=pool)
+    """
+
+    def __init__(self, processes=None, chunksize=None):
+        self.processes = processes or os.cpu_count()
+        self.chunksize = chunksize
+        self._pool = None
+        self._payload = None
+
+    def _load(self, solver, model):
+        """
+        Make sure that the workers hold `solver` and `model`, (re)starting the
+        workers if they were initialised with a different solver or model, or if
+        the model has been set up again since the workers were started
+        """
+        set_up_record = solver._model_set_up.get(model)
+        if self._pool is not None and self._payload is not None:
+            old_solver, old_model, old_record = self._payload
+            if (
+                old_solver is solver
+                and old_model is model
+                and old_record is set_up_record
+            ):
+                return
+        self.close()
+        pybamm.logger.verbose(
+            f"Starting solver pool with {self.processes} processes for {model.name}"
+        )
+        self._pool = mp.Pool(
+            processes=self.processes,
+            initializer=_initialise_worker,
+            initargs=(solver, model),
+        )
+        self._payload = (solver, model, set_up_record)
+
+    def integrate(self, solver, model, t_eval, inputs_list):
+        """
+        Integrate `model` with `solver` for each set of inputs in `inputs_list`,
+        starting from `model.y0`. The model must already have been set up by the
+        solver.
+
+        Parameters
+        ----------
+        solver : :class:`pybamm.BaseSolver`
+            The solver to use
+        model : :class:`pybamm.BaseModel`
+            The (set-up) model to integrate
+        t_eval : numeric type
+            The times at which to compute the solution
+        inputs_list : list of dict
+            The inputs to integrate the model for
+
+        Returns
+        -------
+        list of :class:`pybamm.Solution`
+            The solutions, in the same order as `inputs_list`
+        """
+        self._load(solver, model)
+        y0 = model.y0
+        y0S = getattr(model, "y0S", None)
+        tasks = [(t_eval, inputs, y0, y0S) for inputs in inputs_list]
+        chunksize = self.chunksize or max(1, len(tasks) // (4 * self.processes))
+
+        solutions = []
+        for result in self._pool.imap(_integrate_in_worker, tasks, chunksize):
+            n_sub_solutions = len(result["all_ts"])
+            sol = pybamm.Solution(
+                result["all_ts"],
+                result["all_ys"],
+                [model] * n_sub_solutions,
+                result["all_inputs"],
+                result["t_event"],
+                result["y_event"],
+                result["termination"],
+                sensitivities=result["sensitivities"],
+                check_solution=False,
+            )
+            sol.closest_event_idx = result["closest_event_idx"]
+            sol.integration_time = result["integration_time"]
+            solutions.append(sol)
+        return solutions
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+        self._pool = None
+        self._payload = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        """
+        Return dictionary of picklable items. The worker processes cannot be
+        pickled, so a pickled pool is restarted the next time it is used.
+        """
+        result = self.__dict__.copy()
+        result["_pool"] = None
+        result["_payload"] = None
+        return result
@@ -10,6 +10,7 @@ import numbers
 import os
 import pathlib
 import pickle
+import stat
 import subprocess
 import sys
 import timeit
@@ -259,6 +260,54 @@ def get_parameters_filepath(path):
         return os.path.join(pybamm.__path__[0], path)
 
 
+def get_cache_directory(name, directory=None):
+    """
+    Return the directory of an on-disk cache, creating it (readable and writable by
+    the current user only) if it does not exist.
+
+    The files of the caches are loaded as code (compiled libraries, pickles and
+    Python modules), so the directory is only used if it belongs to the current
+    user and cannot be written by anyone else.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache, used for the default directory
+    directory : str, optional
+        The directory of the cache. If None (default), the directory `name` in the
+        "pybamm" directory of the user's cache directory ("$XDG_CACHE_HOME", or
+        "~/.cache" if it is not set) is used.
+
+    Returns
+    -------
+    str
+        The directory of the cache
+
+    Raises
+    ------
+    PermissionError
+        If the directory is not owned by the current user, or can be written by
+        its group or by other users
+    """
+    if directory is None:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        directory = os.path.join(cache_home, "pybamm", name)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # file ownership and permissions are only meaningful on POSIX systems
+    if hasattr(os, "getuid"):
+        status = os.stat(directory)
+        if status.st_uid != os.getuid() or status.st_mode & (
+            stat.S_IWGRP | stat.S_IWOTH
+        ):
+            raise PermissionError(
+                f"Cannot use '{directory}' as a cache directory: it must be owned "
+                "by the current user and not be writable by other users"
+            )
+    return directory
+
+
 def have_jax():
     """Check if jax and jaxlib are installed with the correct versions"""
     return (
@@ -276,6 +325,11 @@ def is_jax_compatible():
     )
 
 
+def have_numba():
+    """Check if numba is installed"""
+    return importlib.util.find_spec("numba") is not None
+
+
 def is_constant_and_can_evaluate(symbol):
     """
     Returns True if symbol is constant and evaluation does not raise any errors.
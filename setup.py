@@ -242,6 +242,9 @@ setup(
             "black",  # For code style auto-formatting
             "jupyter",  # For example notebooks
         ],
+        "numba": [
+            "numba",  # For models in the "numba" format
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -3,6 +3,7 @@ Tests for the batch_study.py
 """
 from tests import TestCase
 import os
+import numpy as np
 import pybamm
 import unittest
 
@@ -89,6 +90,108 @@ class TestBatchStudy(TestCase):
             ]
             self.assertIn(output_experiment, experiments_list)
 
+    def test_shared_build(self):
+        # simulations that only differ in numerical parameters share a built model
+        parameter_values = {}
+        for name, value in [("a", 19986), ("b", 15000), ("c", 19986)]:
+            param = pybamm.ParameterValues("Marquis2019")
+            param["Negative particle radius [m]"] = 1e-5
+            param["Initial concentration in negative electrode [mol.m-3]"] = value
+            parameter_values[name] = param
+        # parameters that appear in the geometry change the mesh, so cannot be
+        # input parameters
+        param = pybamm.ParameterValues("Marquis2019")
+        param["Negative particle radius [m]"] = 2e-5
+        parameter_values["d"] = param
+
+        bs = pybamm.BatchStudy(
+            models={"SPM": spm}, parameter_values=parameter_values, permutations=True
+        )
+        bs.solve(t_eval=[0, 3600])
+        self.assertEqual(4, len(bs.sims))
+        self.assertIs(bs.sims[0].built_model, bs.sims[1].built_model)
+        self.assertIs(bs.sims[0].built_model, bs.sims[2].built_model)
+        self.assertIsNot(bs.sims[0].built_model, bs.sims[3].built_model)
+        self.assertIsNot(bs.sims[0].solution, bs.sims[1].solution)
+        self.assertEqual(
+            bs.sims[1].solution.all_inputs[0],
+            {"Initial concentration in negative electrode [mol.m-3]": 15000},
+        )
+        for sim, param in zip(bs.sims, parameter_values.values()):
+            # each simulation has its own parameter values, not the input parameters
+            # of the shared model
+            self.assertEqual(
+                sim.parameter_values[
+                    "Initial concentration in negative electrode [mol.m-3]"
+                ],
+                param["Initial concentration in negative electrode [mol.m-3]"],
+            )
+            solution = pybamm.Simulation(spm, parameter_values=param).solve([0, 3600])
+            np.testing.assert_allclose(
+                sim.solution["Voltage [V]"].entries,
+                solution["Voltage [V]"].entries,
+                rtol=1e-6,
+            )
+
+        # each simulation can be solved again on its own
+        solution = bs.sims[1].solve([0, 1800])
+        np.testing.assert_allclose(
+            solution["Voltage [V]"].entries,
+            pybamm.Simulation(spm, parameter_values=parameter_values["b"])
+            .solve([0, 1800])["Voltage [V]"]
+            .entries,
+            rtol=1e-6,
+        )
+
+        # parameters that depend on the varying parameters (here the current given
+        # by the C-rate) are calculated for each simulation
+        capacity_parameter_values = {}
+        for name, capacity in [("a", 0.68), ("b", 0.5)]:
+            param = pybamm.ParameterValues("Marquis2019")
+            param["Nominal cell capacity [A.h]"] = capacity
+            capacity_parameter_values[name] = param
+        bs = pybamm.BatchStudy(
+            models={"SPM": spm},
+            parameter_values=capacity_parameter_values,
+            C_rates={"1C": 1},
+            permutations=True,
+        )
+        bs.solve(t_eval=[0, 600])
+        self.assertIs(bs.sims[0].built_model, bs.sims[1].built_model)
+        for sim, capacity in zip(bs.sims, [0.68, 0.5]):
+            self.assertEqual(sim.parameter_values["Current function [A]"], capacity)
+            np.testing.assert_allclose(
+                sim.solve([0, 600])["Current [A]"].entries, capacity
+            )
+
+        # if the shared model cannot be built, each simulation is built separately
+        # (here the initial stoichiometries depend on the varying parameter)
+        bs = pybamm.BatchStudy(
+            models={"SPM": spm},
+            parameter_values=dict(list(parameter_values.items())[:2]),
+            permutations=True,
+        )
+        bs.solve(t_eval=[0, 600], initial_soc=0.5)
+        self.assertIsNot(bs.sims[0].built_model, bs.sims[1].built_model)
+
+    def test_iter_solve_parallel(self):
+        bs = pybamm.BatchStudy(
+            models={"SPM": spm, "SPM uniform": spm_uniform},
+            solvers={"casadi safe": casadi_safe, "casadi fast": casadi_fast},
+            permutations=True,
+        )
+        results = dict(bs.iter_solve(t_eval=[0, 3600], nproc=2))
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        for sim in results.values():
+            self.assertIsInstance(sim.solution, pybamm.Solution)
+
+        bs.solve(t_eval=[0, 3600], nproc=2)
+        for index, sim in enumerate(bs.sims):
+            np.testing.assert_allclose(
+                sim.solution["Voltage [V]"].entries,
+                results[index].solution["Voltage [V]"].entries,
+            )
+
     def test_create_gif(self):
         bs = pybamm.BatchStudy({"spm": pybamm.lithium_ion.SPM()})
         bs.solve([0, 10])
@@ -0,0 +1,196 @@
+"""
+Tests for the build_cache.py
+"""
+from tests import TestCase
+import os
+import subprocess
+import tempfile
+import numpy as np
+import pybamm
+import unittest
+from unittest.mock import patch
+
+
+def get_key(cache, model, parameter_values=None, solver=None):
+    sim = pybamm.Simulation(
+        model,
+        parameter_values=parameter_values,
+        solver=solver,
+        build_cache=cache,
+    )
+    return sim.get_build_cache_key()
+
+
+SCALE = 1
+
+
+def scaled_diffusivity(sto, T):
+    return 3.3e-14 * SCALE
+
+
+def nested_scaled_diffusivity(sto, T):
+    return sum(scaled_diffusivity(sto, T) for _ in range(2))
+
+
+def factorial(n):
+    return 1 if n <= 1 else n * factorial(n - 1)
+
+
+class TestBuildCache(TestCase):
+    def test_key(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.BuildCache(directory)
+            key = get_key(cache, pybamm.lithium_ion.SPM())
+            # the key only depends on the contents of the model
+            self.assertEqual(key, get_key(cache, pybamm.lithium_ion.SPM()))
+            self.assertNotEqual(
+                key,
+                get_key(cache, pybamm.lithium_ion.SPM({"thermal": "lumped"})),
+            )
+            self.assertNotEqual(key, get_key(cache, pybamm.lithium_ion.SPMe()))
+
+            # parameter values
+            param = pybamm.ParameterValues("Marquis2019")
+            self.assertEqual(key, get_key(cache, pybamm.lithium_ion.SPM(), param))
+            param["Current function [A]"] = 1
+            self.assertNotEqual(key, get_key(cache, pybamm.lithium_ion.SPM(), param))
+
+            # solver options
+            self.assertNotEqual(
+                key,
+                get_key(
+                    cache,
+                    pybamm.lithium_ion.SPM(),
+                    solver=pybamm.CasadiSolver(mode="fast"),
+                ),
+            )
+
+            # arrays and functions
+            self.assertEqual(cache.key(np.arange(3.0)), cache.key(np.arange(3.0)))
+            self.assertNotEqual(cache.key(np.arange(3.0)), cache.key(np.arange(4.0)))
+            self.assertEqual(cache.key(get_key), cache.key(get_key))
+            self.assertNotEqual(cache.key(get_key), cache.key(np.exp))
+            self.assertEqual(cache.key({1, 2}), cache.key({2, 1}))
+
+    def test_key_function_globals(self):
+        # functions that read globals change when the globals change, even if their
+        # source does not
+        global SCALE
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.BuildCache(directory)
+            keys = [
+                cache.key(scaled_diffusivity),
+                cache.key(nested_scaled_diffusivity),
+            ]
+            param = pybamm.ParameterValues("Marquis2019")
+            param["Negative electrode diffusivity [m2.s-1]"] = scaled_diffusivity
+            key = get_key(cache, pybamm.lithium_ion.SPM(), param)
+            try:
+                SCALE = 0.01
+                self.assertNotEqual(keys[0], cache.key(scaled_diffusivity))
+                self.assertNotEqual(keys[1], cache.key(nested_scaled_diffusivity))
+                self.assertNotEqual(
+                    key, get_key(cache, pybamm.lithium_ion.SPM(), param)
+                )
+            finally:
+                SCALE = 1
+            self.assertEqual(keys[0], cache.key(scaled_diffusivity))
+
+            # recursive functions
+            self.assertEqual(cache.key(factorial), cache.key(factorial))
+
+    def test_key_other_process(self):
+        # the key is the same in another Python process, where hashes of strings
+        # (and so the ids of symbols) are different
+        import sys
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.BuildCache(directory)
+            key = get_key(cache, pybamm.lithium_ion.SPM())
+            code = (
+                "import pybamm;"
+                f"cache = pybamm.BuildCache({directory!r});"
+                "sim = pybamm.Simulation(pybamm.lithium_ion.SPM(), build_cache=cache);"
+                "print(sim.get_build_cache_key())"
+            )
+            output = subprocess.run(
+                [sys.executable, "-c", code],
+                capture_output=True,
+                text=True,
+                check=True,
+                env={**os.environ, "PYTHONHASHSEED": "1"},
+            )
+            self.assertEqual(output.stdout.strip(), key)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.BuildCache(directory)
+            self.assertNotIn("a", cache)
+            self.assertIsNone(cache.load("a"))
+            cache.save("a", {"b": np.arange(3)})
+            self.assertIn("a", cache)
+            np.testing.assert_array_equal(cache.load("a")["b"], np.arange(3))
+
+            # corrupt entries are ignored
+            with open(os.path.join(directory, "c.pkl"), "w") as f:
+                f.write("not a pickle")
+            self.assertIsNone(cache.load("c"))
+
+            cache.clear()
+            self.assertNotIn("a", cache)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as cache_home:
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+                cache = pybamm.BuildCache()
+            self.assertEqual(
+                cache.directory, os.path.join(cache_home, "pybamm", "build")
+            )
+
+            # entries are unpickled, so directories that other users can write to
+            # are refused
+            if hasattr(os, "getuid"):
+                os.chmod(cache.directory, 0o777)
+                with self.assertRaises(PermissionError):
+                    pybamm.BuildCache(cache.directory)
+
+    def test_simulation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.BuildCache(directory)
+            sim = pybamm.Simulation(pybamm.lithium_ion.SPM(), build_cache=cache)
+            sol = sim.solve([0, 3600])
+            key = sim.get_build_cache_key()
+            self.assertIn(key, cache)
+
+            # a new simulation loads the built model and set-up solver
+            new_sim = pybamm.Simulation(pybamm.lithium_ion.SPM(), build_cache=cache)
+            new_sim.build()
+            self.assertIsNot(new_sim.built_model, sim.built_model)
+            self.assertTrue(new_sim.built_model.is_discretised)
+            self.assertIn(new_sim.built_model, new_sim.solver._model_set_up)
+            new_sol = new_sim.solve([0, 3600])
+            np.testing.assert_allclose(
+                new_sol["Voltage [V]"].entries, sol["Voltage [V]"].entries, rtol=1e-6
+            )
+
+            # different parameter values are built again
+            param = pybamm.ParameterValues("Marquis2019")
+            param["Current function [A]"] = 1
+            sim = pybamm.Simulation(
+                pybamm.lithium_ion.SPM(), parameter_values=param, build_cache=cache
+            )
+            sim.build()
+            self.assertNotIn(sim.get_build_cache_key(), cache)
+            sim.solve([0, 3600])
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
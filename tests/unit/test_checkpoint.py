@@ -0,0 +1,47 @@
+"""
+Tests for the checkpoint.py
+"""
+from tests import TestCase
+import os
+import tempfile
+import pybamm
+import unittest
+
+
+class TestCheckpoint(TestCase):
+    def test_is_due(self):
+        checkpoint = pybamm.Checkpoint("checkpoint")
+        self.assertTrue(checkpoint.is_due())
+
+        checkpoint = pybamm.Checkpoint("checkpoint", every_cycles=3)
+        self.assertEqual([checkpoint.is_due() for _ in range(3)], [False, False, True])
+
+        checkpoint = pybamm.Checkpoint("checkpoint", every_minutes=0)
+        self.assertTrue(checkpoint.is_due())
+        checkpoint = pybamm.Checkpoint("checkpoint", every_minutes=10)
+        self.assertFalse(checkpoint.is_due())
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = pybamm.Checkpoint(
+                os.path.join(directory, "checkpoint"), every_cycles=2
+            )
+            self.assertFalse(checkpoint.exists())
+            checkpoint.is_due()
+            checkpoint.save({"number of cycles": 1})
+            self.assertTrue(checkpoint.exists())
+            self.assertEqual(checkpoint.load(), {"number of cycles": 1})
+            # saving restarts the count
+            self.assertFalse(checkpoint.is_due())
+            # no temporary files are left behind
+            self.assertEqual(os.listdir(directory), ["checkpoint"])
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -6,6 +6,7 @@ import casadi
 import pybamm
 import numpy as np
 import os
+import tempfile
 import unittest
 from datetime import datetime
 
@@ -53,6 +54,154 @@ class TestSimulationExperiment(TestCase):
         with self.assertRaisesRegex(TypeError, "experiment must be"):
             pybamm.Simulation(model, experiment=0)
 
+    def test_set_up_shared_step_models(self):
+        experiment = pybamm.Experiment(
+            [
+                "Discharge at 1C for 1 minute",
+                "Discharge at C/2 for 1 minute or until 3.5 V",
+                "Discharge at 2C for 1 minute or until 3.4 V",
+                "Rest for 1 minute",
+                "Hold at 4.1 V for 1 minute",
+                "Hold at 4 V for 1 minute",
+            ]
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        sim.build_for_experiment()
+        models = sim.op_conds_to_built_models
+        solvers = sim.op_conds_to_built_solvers
+        op_conds = [repr(op) for op in sim.experiment.operating_conditions_steps]
+
+        # steps that only differ by their values share a model and a solver
+        for i, j in [(0, 3), (1, 2), (4, 5)]:
+            self.assertIs(models[op_conds[i]], models[op_conds[j]])
+            self.assertIs(solvers[op_conds[i]], solvers[op_conds[j]])
+        self.assertIsNot(models[op_conds[0]], models[op_conds[1]])
+        self.assertIsNot(models[op_conds[0]], models[op_conds[4]])
+        self.assertEqual(len(set(map(id, models.values()))), 3)
+
+        inputs = sim.experiment_unique_steps_to_inputs
+        C = model.default_parameter_values["Nominal cell capacity [A.h]"]
+        self.assertEqual(
+            inputs[op_conds[2]],
+            {
+                "Current function [A]": 2 * C,
+                "Ambient temperature [K]": 298.15,
+                "Voltage cut-off [V]": 3.4,
+            },
+        )
+        self.assertEqual(inputs[op_conds[5]]["Voltage function [V]"], 4)
+
+        # the inputs set the values of each step
+        sol = sim.solve()
+        steps = sol.cycles[0].steps
+        for step, current in zip(steps[:4], [C, C / 2, 2 * C, 0]):
+            np.testing.assert_allclose(step["Current [A]"].entries, current)
+        for step, voltage in zip(steps[4:], [4.1, 4]):
+            np.testing.assert_allclose(
+                step["Terminal voltage [V]"].entries, voltage, rtol=1e-6
+            )
+
+    def test_single_experiment_model(self):
+        experiment = pybamm.Experiment(
+            [
+                (
+                    "Discharge at 1C for 10 minutes or until 3.3 V",
+                    "Rest for 10 minutes",
+                    "Charge at 1C until 4.1 V",
+                    "Hold at 4.1 V until C/20",
+                    "Discharge at 2 W for 10 minutes",
+                )
+            ]
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(
+            model, experiment=experiment, single_experiment_model=True
+        )
+        sim.build_for_experiment()
+        models = list(sim.op_conds_to_built_models.values())
+        solvers = list(sim.op_conds_to_built_solvers.values())
+        self.assertTrue(all(m is models[0] for m in models))
+        self.assertTrue(all(s is solvers[0] for s in solvers))
+        hold = repr(sim.experiment.operating_conditions_steps[3])
+        inputs = sim.experiment_unique_steps_to_inputs[hold]
+        self.assertEqual(inputs["Voltage switch"], 1)
+        self.assertEqual(inputs["Current switch"], 0)
+        self.assertEqual(inputs["Current cut-off switch"], 1)
+        self.assertEqual(inputs["Voltage cut-off direction"], 0)
+
+        sol = sim.solve()
+        sol_steps = pybamm.Simulation(model, experiment=experiment).solve()
+        self.assertEqual(
+            [step.termination for step in sol.cycles[0].steps],
+            [
+                "final time",
+                "final time",
+                "event: Voltage cut-off [V] [experiment]",
+                "event: Current cut-off [A] [experiment]",
+                "final time",
+            ],
+        )
+        for step, step_ref in zip(sol.cycles[0].steps, sol_steps.cycles[0].steps):
+            np.testing.assert_allclose(step.t[-1], step_ref.t[-1], rtol=1e-6)
+            np.testing.assert_allclose(
+                step["Voltage [V]"].entries[-1],
+                step_ref["Voltage [V]"].entries[-1],
+                rtol=1e-6,
+            )
+
+        # the padding rest uses the same model
+        experiment = pybamm.step.string(
+            "Discharge at 1C for 1 hour", start_time=datetime(1, 1, 1, 8, 0, 0)
+        )
+        sim = pybamm.Simulation(
+            model, experiment=experiment, single_experiment_model=True
+        )
+        sim.build_for_experiment()
+        self.assertIs(
+            sim.experiment_unique_steps_to_model["Rest for padding"],
+            sim.experiment_unique_steps_to_model[repr(experiment)],
+        )
+        self.assertEqual(
+            sim.experiment_unique_steps_to_inputs["Rest for padding"][
+                "Applied current function [A]"
+            ],
+            0,
+        )
+
+    def test_build_for_experiment_in_parallel(self):
+        experiment = pybamm.Experiment(
+            [
+                (
+                    "Discharge at 1C for 10 minutes",
+                    "Charge at 1C until 4.1 V",
+                    "Hold at 4.1 V until C/20",
+                )
+            ]
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        sim.build_for_experiment(nproc=2)
+        for op_cond, built_model in sim.op_conds_to_built_models.items():
+            self.assertTrue(built_model.is_discretised)
+            self.assertIs(sim.experiment_unique_steps_to_model[op_cond], built_model)
+            # the models were set up by their solver in the other processes
+            self.assertIn(
+                built_model, sim.op_conds_to_built_solvers[op_cond]._model_set_up
+            )
+        sol = sim.solve()
+
+        sol_serial = pybamm.Simulation(model, experiment=experiment).solve()
+        np.testing.assert_allclose(sol.t, sol_serial.t)
+        np.testing.assert_allclose(
+            sol["Voltage [V]"].entries, sol_serial["Voltage [V]"].entries
+        )
+
+        # nproc can also be passed to solve
+        sim = pybamm.Simulation(model, experiment=experiment)
+        sol = sim.solve(nproc=2)
+        np.testing.assert_allclose(sol.t, sol_serial.t)
+
     def test_setup_experiment_string_or_list(self):
         model = pybamm.lithium_ion.SPM()
 
@@ -91,7 +240,10 @@ class TestSimulationExperiment(TestCase):
         self.assertEqual(len(sol.cycles), 1)
 
         # Test outputs
-        np.testing.assert_array_equal(sol.cycles[0].steps[0]["C-rate"].data, 1 / 20)
+        # the current is an input, so the C-rate is computed at run time
+        np.testing.assert_allclose(
+            sol.cycles[0].steps[0]["C-rate"].data, 1 / 20, rtol=1e-15
+        )
         np.testing.assert_array_equal(sol.cycles[0].steps[1]["Current [A]"].data, -1)
         np.testing.assert_array_almost_equal(
             sol.cycles[0].steps[2]["Voltage [V]"].data, 4.1, decimal=5
@@ -389,6 +541,160 @@ class TestSimulationExperiment(TestCase):
         # Summary variables are not None
         self.assertIsNotNone(sol.summary_variables["Capacity [A.h]"])
 
+    def test_solution_store(self):
+        experiment = pybamm.Experiment(
+            [("Discharge at 1C until 3.3V", "Charge at 1C until 4.1 V")] * 3
+        )
+        model = pybamm.lithium_ion.SPM()
+        sim = pybamm.Simulation(model, experiment=experiment)
+        sol = sim.solve(save_at_cycles=2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = pybamm.SolutionStore(directory)
+            sol_stored = sim.solve(save_at_cycles=2, solution_store=store)
+            self.assertGreater(store.number_of_chunks, 0)
+            for ys in sol_stored.all_ys + sol_stored.cycles[0].steps[1].all_ys:
+                self.assertIsInstance(ys, np.memmap)
+            # steps of cycles that are not saved are not stored
+            self.assertIsNone(sol_stored.cycles[2])
+            np.testing.assert_array_almost_equal(
+                sol_stored["Voltage [V]"].entries, sol["Voltage [V]"].entries
+            )
+            np.testing.assert_array_almost_equal(
+                sol_stored.cycles[1]["Voltage [V]"].entries,
+                sol.cycles[1]["Voltage [V]"].entries,
+            )
+            np.testing.assert_array_almost_equal(
+                sol_stored.summary_variables["Capacity [A.h]"],
+                sol.summary_variables["Capacity [A.h]"],
+            )
+            # release the memory maps before the directory is removed
+            del sol_stored, sim
+
+    def test_cycle_skipping(self):
+        experiment = pybamm.Experiment(
+            [
+                (
+                    "Discharge at 1C until 3 V",
+                    "Charge at 1C until 4.2 V",
+                    "Hold at 4.2 V until C/10",
+                )
+            ]
+            * 20
+        )
+        model = pybamm.lithium_ion.SPM({"SEI": "ec reaction limited"})
+        parameter_values = pybamm.ParameterValues("Mohtat2020")
+        sim = pybamm.Simulation(
+            model, parameter_values=parameter_values, experiment=experiment
+        )
+        sol = sim.solve(calc_esoh=False)
+        sol_skipped = sim.solve(
+            calc_esoh=False,
+            save_at_cycles=[12],
+            cycle_skipping={"rtol": 1e-2, "max skipped cycles": 2},
+        )
+
+        # skipped cycles are not stored, but have summary variables
+        self.assertEqual(len(sol_skipped.cycles), 20)
+        skipped = [i for i, cycle in enumerate(sol_skipped.cycles) if cycle is None]
+        self.assertGreater(len(skipped), 0)
+        self.assertNotIn(11, skipped)
+        self.assertEqual(len(sol_skipped.all_first_states), 20)
+        for name in ["Loss of lithium inventory [%]", "Time [s]"]:
+            self.assertEqual(len(sol_skipped.summary_variables[name]), 20)
+            np.testing.assert_allclose(
+                sol_skipped.summary_variables[name],
+                sol.summary_variables[name],
+                rtol=1e-2,
+            )
+
+    def test_cycle_skipping_stopping_conditions(self):
+        experiment = pybamm.Experiment(
+            [("Discharge at 1C until 3 V", "Charge at 1C until 4.2 V")] * 20
+        )
+        cycle_skipping = pybamm.simulation._CycleSkipping(
+            {}, pybamm.lithium_ion.SPM(), experiment, 0, None
+        )
+        cycle_skipping.history = [
+            (1, {"Capacity [A.h]": 5, "Minimum voltage [V]": 3}, None, None),
+            (2, {"Capacity [A.h]": 4.5, "Minimum voltage [V]": 3}, None, None),
+            (3, {"Capacity [A.h]": 4, "Minimum voltage [V]": 3.1}, None, None),
+        ]
+        # the capacity of cycles 4 and 5 is extrapolated to 3.5 and 3 A.h, so
+        # cycle 6 is the first to reach the stopping capacity and must be simulated
+        for capacity_stop, n in [(2.75, 2), (3, 1), (4, 0), (5, 0), (None, np.inf)]:
+            self.assertEqual(
+                cycle_skipping._max_cycles_before_stop(
+                    {"Capacity [A.h]": capacity_stop, "Minimum voltage [V]": 2.5}
+                ),
+                n,
+            )
+        # the minimum voltage increases, so it never reaches the stopping voltage
+        self.assertEqual(
+            cycle_skipping._max_cycles_before_stop({"Minimum voltage [V]": 3.05}),
+            np.inf,
+        )
+
+    def test_checkpoint(self):
+        class Interrupt(pybamm.callbacks.Callback):
+            def on_cycle_start(self, logs):
+                if logs["cycle number"][0] == 4:
+                    raise KeyboardInterrupt
+
+        experiment = pybamm.Experiment(
+            [("Discharge at 1C until 3.3V", "Charge at 1C until 4.1 V")] * 5
+        )
+        model = pybamm.lithium_ion.SPM()
+        sol = pybamm.Simulation(model, experiment=experiment).solve()
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = pybamm.Checkpoint(
+                os.path.join(directory, "checkpoint"), every_cycles=2
+            )
+            sim = pybamm.Simulation(model, experiment=experiment)
+            # nothing to resume from yet
+            with self.assertRaises(KeyboardInterrupt):
+                sim.solve(checkpoint=checkpoint, resume=True, callbacks=Interrupt())
+            self.assertTrue(checkpoint.exists())
+            self.assertEqual(checkpoint.load()["number of cycles"], 2)
+
+            # resume in a new simulation
+            sim = pybamm.Simulation(model, experiment=experiment)
+            sol_resumed = sim.solve(checkpoint=checkpoint, resume=True)
+            self.assertEqual(len(sol_resumed.cycles), 5)
+            self.assertIsNone(sol_resumed.cycles[1])
+            self.assertIsNotNone(sol_resumed.cycles[2])
+            self.assertEqual(len(sol_resumed.all_first_states), 5)
+            np.testing.assert_allclose(
+                sol_resumed.summary_variables["Capacity [A.h]"],
+                sol.summary_variables["Capacity [A.h]"],
+            )
+            np.testing.assert_allclose(
+                sol_resumed.cycles[4]["Voltage [V]"].entries,
+                sol.cycles[4]["Voltage [V]"].entries,
+            )
+
+            # the checkpoint must match the experiment
+            sim = pybamm.Simulation(
+                model, experiment=pybamm.Experiment(["Rest for 1 hour"])
+            )
+            with self.assertRaisesRegex(ValueError, "different experiment"):
+                sim.solve(checkpoint=checkpoint, resume=True)
+            # ... and the model, options and parameter values
+            param = pybamm.ParameterValues("Marquis2019")
+            param["Current function [A]"] = 1
+            for other_sim in [
+                pybamm.Simulation(
+                    pybamm.lithium_ion.SPM({"thermal": "lumped"}),
+                    experiment=experiment,
+                ),
+                pybamm.Simulation(model, experiment=experiment, parameter_values=param),
+            ]:
+                with self.assertRaisesRegex(ValueError, "different model"):
+                    other_sim.solve(checkpoint=checkpoint, resume=True)
+            with self.assertRaisesRegex(ValueError, "starting_solution"):
+                sim.solve(checkpoint=checkpoint, starting_solution=sol)
+
     def test_cycle_summary_variables(self):
         # Test cycle_summary_variables works for different combinations of data and
         # function OCPs
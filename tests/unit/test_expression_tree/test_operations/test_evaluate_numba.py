@@ -0,0 +1,375 @@
+#
+# Tests for the numba evaluator
+#
+from tests import TestCase
+import os
+import pickle
+import subprocess
+import tempfile
+import pybamm
+from pybamm.expression_tree.operations.evaluate_numba import _load_kernel
+
+from tests import get_discretisation_for_testing, get_1p1d_discretisation_for_testing
+import unittest
+import numpy as np
+import scipy.sparse
+
+
+def evaluate_uncompiled(symbol, t=None, y=None, inputs=None):
+    """
+    Run the function generated by `pybamm.to_numba` as python code, which does not
+    need numba
+    """
+    constants, input_names, python_str = pybamm.to_numba(symbol)
+    namespace = {"np": np}
+    exec(python_str, namespace)
+    if y is not None:
+        y = np.asarray(y, dtype=float).reshape(-1, 1)
+    inputs = inputs or {}
+    result = namespace["evaluate"](
+        *constants, t, y, *[inputs[name] for name in input_names]
+    )
+    shape = symbol.evaluate_for_shape()
+    if scipy.sparse.issparse(shape):
+        result = scipy.sparse.csr_matrix(result, shape=shape.shape)
+        # the result is in canonical format
+        np.testing.assert_array_equal(result.indptr, result.tocoo().tocsr().indptr)
+        np.testing.assert_array_equal(result.indices, result.tocoo().tocsr().indices)
+    return result
+
+
+class TestEvaluateNumba(TestCase):
+    def assert_evaluates_like(self, expr, t=None, y=None, inputs=None):
+        result = evaluate_uncompiled(expr, t=t, y=y, inputs=inputs)
+        expected = expr.evaluate(t=t, y=y, inputs=inputs)
+        if scipy.sparse.issparse(expected):
+            self.assertTrue(scipy.sparse.issparse(result))
+            result, expected = result.toarray(), expected.toarray()
+        np.testing.assert_allclose(result, expected, rtol=1e-14, atol=1e-14)
+
+    def test_to_numba(self):
+        a = pybamm.StateVector(slice(0, 1))
+        b = pybamm.StateVector(slice(1, 2))
+
+        constants, input_names, python_str = pybamm.to_numba(a + b * a)
+        self.assertEqual(constants, [])
+        self.assertEqual(input_names, [])
+        self.assertEqual(
+            python_str,
+            "def evaluate(t, y):\n"
+            "    v0 = y[0:1]\n"
+            "    v1 = y[1:2]\n"
+            "    v2 = v1 * v0\n"
+            "    v3 = v0 + v2\n"
+            "    return v3",
+        )
+
+        # variables and inputs are named by their position, so that the same tree
+        # always gives the same function
+        c = pybamm.InputParameter("c")
+        d = pybamm.InputParameter("d")
+        _, input_names, python_str = pybamm.to_numba(c * a - d * pybamm.t)
+        self.assertEqual(input_names, ["c", "d"])
+        self.assertEqual(
+            python_str,
+            "def evaluate(t, y, p0, p1):\n"
+            "    v0 = p0\n"
+            "    v1 = y[0:1]\n"
+            "    v2 = v0 * v1\n"
+            "    v3 = p1\n"
+            "    v4 = t\n"
+            "    v5 = v3 * v4\n"
+            "    v6 = v2 - v5\n"
+            "    return v6",
+        )
+        e = pybamm.InputParameter("e")
+        self.assertEqual(pybamm.to_numba(e * a - d * pybamm.t)[2], python_str)
+
+        # constants are arguments, and numbers are written in the code
+        vector = pybamm.Vector(np.array([1, 2]))
+        constants, _, python_str = pybamm.to_numba(
+            vector * pybamm.StateVector(slice(0, 2)) ** -2
+        )
+        self.assertEqual(len(constants), 1)
+        np.testing.assert_array_equal(constants[0], vector.entries)
+        self.assertEqual(
+            python_str,
+            "def evaluate(c0, t, y):\n"
+            "    v0 = y[0:2]\n"
+            "    v1 = v0 ** (-2.0)\n"
+            "    v2 = c0 * v1\n"
+            "    return v2",
+        )
+
+    def test_to_numba_dense(self):
+        a = pybamm.StateVector(slice(0, 1))
+        b = pybamm.StateVector(slice(1, 2))
+        c = pybamm.StateVector(slice(0, 2))
+        d = pybamm.StateVector(slice(0, 1), slice(3, 4))
+        p = pybamm.InputParameter("p")
+        q = pybamm.InputParameter("q", expected_size=2)
+        y = np.array([[2.0], [3.0], [-1.5], [0.5]])
+        inputs = {"p": 1.5, "q": np.array([[4.0], [-5.0]])}
+
+        expressions = [
+            a + b,
+            a - b * pybamm.t,
+            a / b,
+            a**b,
+            -a,
+            abs(c - 2.5),
+            pybamm.sign(c - 2.5),
+            pybamm.Floor(c * 1.5),
+            pybamm.Ceiling(c * 1.5),
+            pybamm.exp(c) * pybamm.sin(b) + pybamm.sqrt(c) / pybamm.arcsinh(a),
+            pybamm.log(c) + pybamm.tanh(c) * pybamm.cosh(c),
+            pybamm.maximum(a, b) + pybamm.minimum(c, 2.5),
+            pybamm.min(c) + pybamm.max(d),
+            (a < b) + (c <= 2),
+            pybamm.Modulo(c, 2.5),
+            pybamm.Index(d * 2, 1),
+            pybamm.Inner(c, c + 1),
+            pybamm.NotConstant(a) + 1,
+            p * c + q,
+            pybamm.Matrix(np.array([[1, 2], [3, 4]])) @ c,
+            pybamm.Matrix(scipy.sparse.csr_matrix([[1, 0], [3, 4], [0, 0]])) @ c,
+            pybamm.Matrix(scipy.sparse.csr_matrix([[1, 0, 2, 0]]))
+            @ pybamm.StateVector(slice(0, 4)),
+            pybamm.numpy_concatenation(a, 2 * d, c),
+            pybamm.Scalar(2) * pybamm.Scalar(3),
+            pybamm.Vector(np.array([1, 2])),
+        ]
+        for expr in expressions:
+            self.assert_evaluates_like(expr, t=2.0, y=y, inputs=inputs)
+
+    def test_domain_concatenation(self):
+        disc = get_discretisation_for_testing()
+        mesh = disc.mesh
+
+        a_dom = ["separator"]
+        b_dom = ["negative electrode", "positive electrode"]
+        a_pts = mesh[a_dom[0]].npts
+        b_pts = mesh[b_dom[0]].npts + mesh[b_dom[1]].npts
+        a = pybamm.StateVector(slice(0, a_pts), domain=a_dom)
+        b = pybamm.StateVector(slice(a_pts, a_pts + b_pts), domain=b_dom)
+        y = np.arange(a_pts + b_pts)[:, np.newaxis]
+
+        for children in [[a, b], [a]]:
+            expr = pybamm.DomainConcatenation(children, mesh)
+            self.assert_evaluates_like(expr, y=y)
+
+        disc = get_1p1d_discretisation_for_testing()
+        a = pybamm.Variable("a", domain=["negative electrode"])
+        b = pybamm.Variable("b", domain=["separator"])
+        disc.set_variable_slices([a, b])
+        expr = disc.process_symbol(pybamm.concatenation(2 * a, 3 * b))
+        self.assertIsInstance(expr, pybamm.DomainConcatenation)
+        y = np.arange(expr.size)[:, np.newaxis]
+        self.assert_evaluates_like(expr, y=y)
+
+    def test_to_numba_sparse(self):
+        y = pybamm.StateVector(slice(0, 4))
+        a = pybamm.StateVector(slice(0, 2))
+        b = pybamm.StateVector(slice(2, 4))
+        A = pybamm.Matrix(scipy.sparse.csr_matrix([[1, 0], [2, 3]]))
+        B = pybamm.Matrix(scipy.sparse.csr_matrix([[0, 0, 1, 0], [0, 0, 4, 5]]))
+        y_test = np.array([[2.0], [3.0], [-1.5], [0.5]])
+
+        expressions = [
+            # Jacobians, whose sparsity patterns depend on the expressions
+            pybamm.exp(a) * b,
+            A @ (a * b) - pybamm.sin(b) / a,
+            pybamm.numpy_concatenation(a**2, b * pybamm.t, a * b),
+            pybamm.maximum(a, b) * a,
+            pybamm.Index(pybamm.numpy_concatenation(a, b * a), slice(1, 3)),
+            -(A @ (a * b)),
+            B @ y * a,
+        ]
+        for expr in expressions:
+            jac = pybamm.Jacobian().jac(expr, y)
+            self.assert_evaluates_like(jac, t=2.0, y=y_test)
+
+        # products of sparse matrices, and with row vectors
+        J = pybamm.Jacobian().jac(a * b, y)
+        C = pybamm.Matrix(scipy.sparse.csr_matrix([[0, 1], [0, 0], [1, 1]]))
+        row = pybamm.Matrix(np.array([[1, 2, 3, 4]]))
+        for expr in [
+            C @ J,
+            pybamm.MatrixMultiplication(J, pybamm.Matrix(scipy.sparse.eye(4))),
+            pybamm.Multiplication(J, row),
+            pybamm.Multiplication(J, pybamm.Matrix(np.ones((2, 4)))),
+            pybamm.Division(J, a),
+            pybamm.Multiplication(J, pybamm.StateVector(slice(0, 1))),
+            pybamm.Multiplication(pybamm.t, J),
+            pybamm.Multiplication(pybamm.Index(J, slice(0, 1)), a),
+            pybamm.Addition(J, B),
+            pybamm.Subtraction(J, 2 * J),
+            pybamm.SparseStack(J, B, pybamm.Matrix(np.eye(4))),
+        ]:
+            self.assert_evaluates_like(expr, t=2.0, y=y_test)
+
+        # the sparse matrices are not converted to dense matrices
+        _, _, python_str = pybamm.to_numba(A @ (a * b))
+        self.assertIn("for i in range(2):", python_str)
+        self.assertNotIn("@", python_str)
+
+    def test_to_numba_model(self):
+        model = pybamm.lithium_ion.SPMe()
+        param = model.default_parameter_values
+        param["Current function [A]"] = "[input]"
+        sim = pybamm.Simulation(model, parameter_values=param)
+        sim.build()
+        model = sim.built_model
+
+        inputs = {"Current function [A]": 2}
+        y0 = model.concatenated_initial_conditions.evaluate(inputs=inputs)
+        y_test = y0 * np.linspace(0.99, 1.01, len(y0))[:, np.newaxis]
+        rhs = model.concatenated_rhs
+        jac = pybamm.Jacobian().jac(rhs, pybamm.StateVector(slice(0, len(y0))))
+        self.assert_evaluates_like(rhs, t=10.0, y=y_test, inputs=inputs)
+        self.assert_evaluates_like(jac, t=10.0, y=y_test, inputs=inputs)
+
+    def test_to_numba_not_implemented(self):
+        a = pybamm.StateVector(slice(0, 2))
+
+        def function(x):
+            return x
+
+        for expr in [
+            pybamm.Function(function, a),
+            pybamm.erf(a),
+            pybamm.Variable("a"),
+            pybamm.StateVectorDot(slice(0, 2)),
+        ]:
+            with self.assertRaisesRegex(
+                NotImplementedError, "Conversion to numba not implemented"
+            ):
+                pybamm.to_numba(expr)
+
+        # elementwise product of sparse matrices
+        J = pybamm.Jacobian().jac(a**2, a)
+        expr = pybamm.Multiplication(J, J)
+        with self.assertRaisesRegex(
+            NotImplementedError, "Conversion to numba not implemented"
+        ):
+            pybamm.to_numba(expr)
+
+    @unittest.skipIf(not hasattr(os, "getuid"), "file ownership is POSIX only")
+    def test_cache_directory(self):
+        # the kernels are imported, so directories that other users can write to
+        # are refused before anything is written or imported
+        _, _, python_str = pybamm.to_numba(pybamm.StateVector(slice(0, 2)) * 2)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.chmod(cache_dir, 0o777)
+            with self.assertRaises(PermissionError):
+                _load_kernel(python_str, cache_dir)
+            self.assertEqual(os.listdir(cache_dir), [])
+
+    @unittest.skipIf(not pybamm.have_numba(), "numba is not installed")
+    def test_evaluator_numba(self):
+        a = pybamm.StateVector(slice(0, 2))
+        p = pybamm.InputParameter("p")
+        A = pybamm.Matrix(scipy.sparse.csr_matrix([[1, 0], [2, 3]]))
+        expr = A @ pybamm.exp(a) * p + pybamm.t
+        jac = pybamm.Jacobian().jac(expr, a)
+        y = np.array([1.0, 2.0])
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            evaluator = pybamm.EvaluatorNumba(expr, cache_dir=cache_dir)
+            result = evaluator(t=1, y=y, inputs={"p": 2})
+            np.testing.assert_allclose(
+                result, expr.evaluate(t=1, y=y[:, np.newaxis], inputs={"p": 2})
+            )
+            with self.assertRaisesRegex(KeyError, "Input parameter 'p' not found"):
+                evaluator(t=1, y=y)
+
+            jac_evaluator = pybamm.EvaluatorNumba(jac, cache_dir=cache_dir)
+            result = jac_evaluator(t=1, y=y, inputs={"p": 2})
+            self.assertTrue(scipy.sparse.issparse(result))
+            np.testing.assert_allclose(
+                result.toarray(),
+                jac.evaluate(t=1, y=y[:, np.newaxis], inputs={"p": 2}).toarray(),
+            )
+
+            # the kernels are stored in the cache directory, and a tree with the same
+            # structure (here with different matrix) uses the same kernel
+            kernels = [f for f in os.listdir(cache_dir) if f.endswith(".py")]
+            self.assertEqual(len(kernels), 2)
+            B = pybamm.Matrix(scipy.sparse.csr_matrix([[4, 0], [5, 6]]))
+            expr = B @ pybamm.exp(a) * p + pybamm.t
+            evaluator = pybamm.EvaluatorNumba(expr, cache_dir=cache_dir)
+            np.testing.assert_allclose(
+                evaluator(t=1, y=y, inputs={"p": 2}),
+                expr.evaluate(t=1, y=y[:, np.newaxis], inputs={"p": 2}),
+            )
+            kernels = [f for f in os.listdir(cache_dir) if f.endswith(".py")]
+            self.assertEqual(len(kernels), 2)
+
+            # pickling
+            evaluator = pickle.loads(pickle.dumps(evaluator))
+            np.testing.assert_allclose(
+                evaluator(t=1, y=y, inputs={"p": 2}),
+                expr.evaluate(t=1, y=y[:, np.newaxis], inputs={"p": 2}),
+            )
+
+            # constant expressions
+            evaluator = pybamm.EvaluatorNumba(
+                pybamm.Scalar(2) * pybamm.Scalar(3), cache_dir=cache_dir
+            )
+            self.assertEqual(evaluator(), 6)
+
+    @unittest.skipIf(not pybamm.have_numba(), "numba is not installed")
+    def test_evaluator_numba_other_process(self):
+        # the compiled kernel is loaded from the cache by other Python processes
+        import sys
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            code = (
+                "import numpy as np;"
+                "import pybamm;"
+                "a = pybamm.StateVector(slice(0, 2));"
+                "evaluator = pybamm.EvaluatorNumba("
+                f"    pybamm.exp(a) * pybamm.t, cache_dir={cache_dir!r}"
+                ");"
+                "print(evaluator(t=2, y=np.array([1.0, 2.0])).ravel().tolist())"
+            )
+            cache_files = []
+            for _ in range(2):
+                output = subprocess.run(
+                    [sys.executable, "-c", code], capture_output=True, text=True
+                )
+                self.assertEqual(output.returncode, 0, output.stderr)
+                np.testing.assert_allclose(eval(output.stdout), 2 * np.exp([1.0, 2.0]))
+                cache_files.append(
+                    sorted(
+                        os.path.join(root, filename)
+                        for root, _, filenames in os.walk(cache_dir)
+                        for filename in filenames
+                    )
+                )
+            # the kernel is only compiled in the first process
+            self.assertEqual(cache_files[0], cache_files[1])
+
+    @unittest.skipIf(not pybamm.have_numba(), "numba is not installed")
+    def test_solve_model_numba(self):
+        solutions = {}
+        for convert_to_format in ["numba", "python"]:
+            model = pybamm.lithium_ion.SPMe()
+            model.convert_to_format = convert_to_format
+            sim = pybamm.Simulation(model, solver=pybamm.ScipySolver())
+            solutions[convert_to_format] = sim.solve([0, 3600])
+        np.testing.assert_allclose(
+            solutions["numba"]["Voltage [V]"].entries,
+            solutions["python"]["Voltage [V]"].entries,
+            rtol=1e-6,
+        )
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -0,0 +1,96 @@
+#
+# Tests for the symbol interner
+#
+from tests import TestCase
+import pybamm
+import unittest
+import numpy as np
+
+
+class TestSymbolInterner(TestCase):
+    def test_intern(self):
+        interner = pybamm.SymbolInterner({})
+        a = pybamm.Variable("a", domain="negative electrode")
+        b = pybamm.Parameter("b")
+
+        # structurally identical trees built separately
+        exp_a = pybamm.exp(a)
+        expr1 = exp_a * b + exp_a
+        expr2 = pybamm.exp(pybamm.Variable("a", domain="negative electrode")) * b
+        self.assertIsNot(expr1.children[0], expr2)
+
+        interned1 = interner.intern(expr1)
+        self.assertIs(interned1, expr1)
+        interned2 = interner.intern(expr2)
+        self.assertIs(interned2, expr1.children[0])
+        self.assertIs(interner.intern(pybamm.exp(a)), expr1.children[1])
+
+        # subtrees are replaced without modifying the original tree
+        expr3 = -pybamm.exp(pybamm.Variable("a", domain="negative electrode"))
+        interned3 = interner.intern(expr3)
+        self.assertIsNot(interned3, expr3)
+        self.assertEqual(interned3, expr3)
+        self.assertIs(interned3.child, expr1.children[1])
+        self.assertIs(interned3.children[0], expr1.children[1])
+        self.assertIsNot(expr3.child, expr1.children[1])
+
+        # symbols with the same id but different domains or bounds are kept apart
+        vector = pybamm.Vector(np.ones(3), domain="test")
+        other_vector = pybamm.Vector(
+            np.ones(3), domains={"primary": "test", "secondary": "other"}
+        )
+        self.assertEqual(vector.id, other_vector.id)
+        self.assertIs(interner.intern(vector), vector)
+        self.assertIs(interner.intern(other_vector), other_vector)
+        c = pybamm.Variable("c", bounds=(0, 1))
+        self.assertIs(interner.intern(c), c)
+        other_c = pybamm.Variable("c", bounds=(0, 2))
+        self.assertIs(interner.intern(other_c), other_c)
+
+    def test_intern_model(self):
+        model = pybamm.lithium_ion.SPM()
+        param = model.default_parameter_values
+        geometry = model.default_geometry
+        param.process_geometry(geometry)
+        mesh = pybamm.Mesh(geometry, model.default_submesh_types, model.default_var_pts)
+        disc = pybamm.Discretisation(mesh, model.default_spatial_methods)
+        model_disc = disc.process_model(param.process_model(model, inplace=False))
+        solution = pybamm.CasadiSolver().solve(model_disc, [0, 3600])
+
+        def count_nodes(model):
+            nodes = {}
+            for expression in model.variables.values():
+                for node in expression.pre_order():
+                    nodes[id(node)] = node
+            return len(nodes), len({node.id for node in nodes.values()})
+
+        n_nodes, n_unique = count_nodes(model_disc)
+        self.assertGreater(n_nodes, n_unique)
+
+        pybamm.settings.intern_symbols = True
+        try:
+            model_interned = disc.process_model(
+                param.process_model(model, inplace=False)
+            )
+        finally:
+            pybamm.settings.intern_symbols = False
+        self.assertEqual(count_nodes(model_interned), (n_unique, n_unique))
+        for name, variable in model_disc.variables.items():
+            self.assertEqual(model_interned.variables[name], variable)
+
+        solution_interned = pybamm.CasadiSolver().solve(model_interned, [0, 3600])
+        np.testing.assert_allclose(
+            solution_interned["Voltage [V]"].entries,
+            solution["Voltage [V]"].entries,
+            rtol=1e-6,
+        )
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -0,0 +1,126 @@
+#
+# Tests for the symbol optimiser
+#
+from tests import TestCase
+import pybamm
+import unittest
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+from pybamm.expression_tree.operations.optimise_symbols import count_nodes
+
+
+class TestSymbolOptimiser(TestCase):
+    def test_common_subexpressions(self):
+        optimiser = pybamm.SymbolOptimiser()
+        y = pybamm.StateVector(slice(0, 3))
+        # same id, different objects
+        expr = pybamm.exp(y) + pybamm.exp(pybamm.StateVector(slice(0, 3)))
+        self.assertEqual(count_nodes(expr), 5)
+
+        optimised = optimiser.optimise(expr)
+        self.assertEqual(optimised, expr)
+        self.assertIs(optimised.children[0], optimised.children[1])
+        self.assertEqual(count_nodes(optimised), 3)
+        # original tree is not modified
+        self.assertIsNot(expr.children[0], expr.children[1])
+
+        # shared across expressions
+        self.assertIs(
+            optimiser.optimise(pybamm.exp(pybamm.StateVector(slice(0, 3)))),
+            optimised.children[0],
+        )
+
+        # unchanged trees are returned as they are
+        self.assertIs(optimiser.optimise(2 * y), optimiser.optimise(2 * y))
+        expr = pybamm.sin(y) * pybamm.t
+        self.assertIs(optimiser.optimise(expr), expr)
+
+    def test_constant_folding(self):
+        optimiser = pybamm.SymbolOptimiser()
+        y = pybamm.StateVector(slice(0, 3))
+        a = pybamm.Vector(np.array([1, 2, 3]))
+        b = pybamm.Vector(np.array([4, 5, 6]))
+        # constructors of the classes do not simplify
+        constant = pybamm.Multiplication(pybamm.Function(np.exp, a), pybamm.Negate(b))
+        expr = pybamm.Addition(constant, y)
+
+        optimised = optimiser.optimise(expr)
+        self.assertIsInstance(optimised.children[0], pybamm.Vector)
+        y_test = np.array([1, 1, 1])
+        np.testing.assert_array_equal(
+            optimised.evaluate(y=y_test), expr.evaluate(y=y_test)
+        )
+
+        # sparse matrices stay sparse
+        A = pybamm.Matrix(csr_matrix(np.eye(3)))
+        optimised = optimiser.optimise(pybamm.Multiplication(A, pybamm.Scalar(2)))
+        self.assertIsInstance(optimised, pybamm.Matrix)
+        self.assertEqual(optimised.entries.nnz, 3)
+
+        # input parameters and NotConstant are not folded
+        expr = pybamm.Multiplication(a, pybamm.InputParameter("p"))
+        self.assertIs(optimiser.optimise(expr), expr)
+        expr = pybamm.NotConstant(pybamm.Negate(a))
+        optimised = optimiser.optimise(expr)
+        self.assertIsInstance(optimised, pybamm.NotConstant)
+        self.assertIsInstance(optimised.child, pybamm.Vector)
+
+    def test_matrix_multiplication_chains(self):
+        optimiser = pybamm.SymbolOptimiser()
+        y = pybamm.StateVector(slice(0, 4))
+        A = pybamm.Matrix(diags([1, 2, 3], shape=(3, 4)))
+        B = pybamm.Matrix(diags([1, -1], [0, 1], shape=(4, 4)))
+        C = pybamm.Matrix(diags([2, 2, 2, 2]))
+        expr = pybamm.MatrixMultiplication(
+            A, pybamm.MatrixMultiplication(B, pybamm.MatrixMultiplication(C, y))
+        )
+
+        optimised = optimiser.optimise(expr)
+        self.assertIsInstance(optimised, pybamm.MatrixMultiplication)
+        self.assertIsInstance(optimised.left, pybamm.Matrix)
+        self.assertIs(optimised.right, y)
+        y_test = np.array([1, 2, 3, 4])
+        np.testing.assert_array_equal(
+            optimised.evaluate(y=y_test), expr.evaluate(y=y_test)
+        )
+
+        # chains are not merged if the product is denser than the matrices
+        dense = pybamm.Matrix(csr_matrix(np.ones((4, 1))))
+        row = pybamm.Matrix(csr_matrix(np.ones((1, 4))))
+        expr = pybamm.MatrixMultiplication(dense, pybamm.MatrixMultiplication(row, y))
+        self.assertIs(optimiser.optimise(expr), expr)
+
+    def test_optimise_model(self):
+        model = pybamm.lithium_ion.SPMe()
+        geometry = model.default_geometry
+        param = model.default_parameter_values
+        param.process_model(model)
+        param.process_geometry(geometry)
+        mesh = pybamm.Mesh(geometry, model.default_submesh_types, model.default_var_pts)
+        disc = pybamm.Discretisation(mesh, model.default_spatial_methods)
+        disc.process_model(model)
+
+        # discretisation optimises the model, so optimising again changes nothing
+        rhs = model.concatenated_rhs
+        pybamm.SymbolOptimiser().optimise_model(model)
+        self.assertIs(model.concatenated_rhs, rhs)
+
+        events = model.events
+        self.assertEqual(
+            [event.expression for event in model.events],
+            [event.expression for event in events],
+        )
+
+        solution = pybamm.CasadiSolver().solve(model, [0, 3600])
+        self.assertEqual(solution.termination, "final time")
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
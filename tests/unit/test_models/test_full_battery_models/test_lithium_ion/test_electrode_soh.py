@@ -4,6 +4,7 @@
 from tests import TestCase
 import pybamm
 import unittest
+import numpy as np
 
 
 class TestElectrodeSOH(TestCase):
@@ -53,6 +54,124 @@ class TestElectrodeSOH(TestCase):
         sol = esoh_solver.solve(inputs)
         self.assertAlmostEqual(sol["Q_Li"], Q_Li, places=5)
 
+    def test_warm_start(self):
+        param = pybamm.LithiumIonParameters()
+        parameter_values = pybamm.ParameterValues("Mohtat2020")
+        esoh_solver = pybamm.lithium_ion.ElectrodeSOHSolver(parameter_values, param)
+
+        Q_n = parameter_values.evaluate(param.n.Q_init)
+        Q_p = parameter_values.evaluate(param.p.Q_init)
+        Q_Li = parameter_values.evaluate(param.Q_Li_particles_init)
+        self.assertIsNone(esoh_solver._solve_warm_start({}))
+        esoh_solver.solve({"Q_Li": Q_Li, "Q_n": Q_n, "Q_p": Q_p})
+
+        # the second solve starts from the first solution, and gives the same
+        # result as a new solver
+        inputs = {"Q_Li": 0.95 * Q_Li, "Q_n": 0.98 * Q_n, "Q_p": Q_p}
+        sol = esoh_solver.solve(dict(inputs))
+        self.assertIsNotNone(esoh_solver._warm_start_y0)
+        new_sol = pybamm.lithium_ion.ElectrodeSOHSolver(parameter_values, param).solve(
+            dict(inputs)
+        )
+        for key in sol:
+            self.assertAlmostEqual(sol[key], new_sol[key], places=5)
+
+    def test_solve_batch(self):
+        param = pybamm.LithiumIonParameters()
+        parameter_values = pybamm.ParameterValues("Mohtat2020")
+        Q_n = parameter_values.evaluate(param.n.Q_init)
+        Q_p = parameter_values.evaluate(param.p.Q_init)
+        Q_Li = parameter_values.evaluate(param.Q_Li_particles_init)
+        Q = parameter_values.evaluate(param.Q / param.n_electrodes_parallel)
+
+        for known_value, inputs in [
+            (
+                "cyclable lithium capacity",
+                {
+                    "Q_n": Q_n * np.array([[1, 0.9, 0.95], [0.85, 1, 0.9]]),
+                    "Q_p": Q_p,
+                    "Q_Li": Q_Li * np.array([[1, 0.8, 0.9], [0.75, 0.95, 0.7]]),
+                },
+            ),
+            (
+                "cell capacity",
+                {"Q_n": Q_n, "Q_p": Q_p, "Q": Q * np.array([1, 0.9, 0.8])},
+            ),
+        ]:
+            esoh_solver = pybamm.lithium_ion.ElectrodeSOHSolver(
+                parameter_values, param, known_value=known_value
+            )
+            sol = esoh_solver.solve_batch(inputs)
+            shape = np.broadcast(*inputs.values()).shape
+            self.assertEqual(sol["x_100"].shape, shape)
+
+            # same solution as solving each cell on its own
+            for idx in np.ndindex(shape):
+                cell_inputs = {
+                    key: np.broadcast_to(value, shape)[idx]
+                    for key, value in inputs.items()
+                }
+                cell_sol = esoh_solver.solve(cell_inputs)
+                for key in cell_sol:
+                    self.assertAlmostEqual(sol[key][idx], cell_sol[key], places=5)
+
+        # initial stoichiometries of many cells
+        esoh_solver = pybamm.lithium_ion.ElectrodeSOHSolver(parameter_values, param)
+        inputs = {
+            "Q_n": Q_n * np.array([1, 0.95]),
+            "Q_p": Q_p,
+            "Q_Li": Q_Li * np.array([1, 0.9]),
+        }
+        sol = esoh_solver.solve_batch(inputs)
+        x, y = esoh_solver.get_initial_stoichiometries(0.4, inputs)
+        np.testing.assert_allclose(x, sol["x_0"] + 0.4 * (sol["x_100"] - sol["x_0"]))
+        np.testing.assert_allclose(y, sol["y_0"] - 0.4 * (sol["y_0"] - sol["y_100"]))
+        x, y = esoh_solver.get_initial_stoichiometries("3.9 V", inputs)
+        T = parameter_values.evaluate(param.T_ref)
+        for i in range(2):
+            V = parameter_values.evaluate(
+                param.p.prim.U(y[i], T) - param.n.prim.U(x[i], T)
+            )
+            self.assertAlmostEqual(V.item(), 3.9, places=8)
+        with self.assertRaisesRegex(ValueError, "outside the voltage limits"):
+            esoh_solver.get_initial_stoichiometries("5 V", inputs)
+
+    def test_theoretical_energy_integral(self):
+        param = pybamm.LithiumIonParameters()
+        parameter_values = pybamm.ParameterValues("Mohtat2020")
+        esoh_solver = pybamm.lithium_ion.ElectrodeSOHSolver(parameter_values, param)
+
+        # compare with the open-circuit voltage evaluated point by point
+        x_100, x_0, y_100, y_0 = 0.8, 0.1, 0.3, 0.9
+        points = 5
+        T = param.T_amb(0)
+        Vs = [
+            parameter_values.evaluate(param.p.prim.U(y, T)).item()
+            - parameter_values.evaluate(param.n.prim.U(x, T)).item()
+            for x, y in zip(
+                np.linspace(x_100, x_0, points), np.linspace(y_100, y_0, points)
+            )
+        ]
+        Q_p = parameter_values.evaluate(param.p.prim.Q_init)
+        energy = np.trapz(Vs, dx=Q_p * (y_0 - y_100) / (points - 1))
+        self.assertAlmostEqual(
+            esoh_solver.theoretical_energy_integral(
+                x_100, x_0, y_100, y_0, points=points
+            ),
+            energy,
+        )
+
+        # many sets of stoichiometries at once
+        energies = esoh_solver.theoretical_energy_integral(
+            np.array([x_100, 0.7]), x_0, np.array([y_100, 0.35]), y_0, points=points
+        )
+        self.assertEqual(energies.shape, (2,))
+        self.assertAlmostEqual(energies[0], energy)
+        self.assertAlmostEqual(
+            energies[1],
+            esoh_solver.theoretical_energy_integral(0.7, x_0, 0.35, y_0, points=points),
+        )
+
     def test_known_solution_cell_capacity(self):
         param = pybamm.LithiumIonParameters()
         parameter_values = pybamm.ParameterValues("Mohtat2020")
@@ -15,6 +15,14 @@ class TestSettings(TestCase):
 
         pybamm.settings.simplify = True
 
+    def test_intern_symbols(self):
+        self.assertFalse(pybamm.settings.intern_symbols)
+
+        pybamm.settings.intern_symbols = True
+        self.assertTrue(pybamm.settings.intern_symbols)
+
+        pybamm.settings.intern_symbols = False
+
     def test_smoothing_parameters(self):
         self.assertEqual(pybamm.settings.min_smoothing, "exact")
         self.assertEqual(pybamm.settings.max_smoothing, "exact")
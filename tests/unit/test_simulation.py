@@ -4,6 +4,7 @@ import pandas as pd
 from tests import TestCase
 import os
 import sys
+import tempfile
 import unittest
 import uuid
 
@@ -79,6 +80,10 @@ class TestSimulation(TestCase):
         # Test options that are only available when simulating an experiment
         with self.assertRaisesRegex(ValueError, "save_at_cycles"):
             sim.solve(save_at_cycles=2)
+        with self.assertRaisesRegex(ValueError, "cycle_skipping"):
+            sim.solve(cycle_skipping={})
+        with self.assertRaisesRegex(ValueError, "checkpoint"):
+            sim.solve(checkpoint=pybamm.Checkpoint("checkpoint"))
         with self.assertRaisesRegex(ValueError, "starting_solution"):
             sim.solve(starting_solution=sol)
 
@@ -98,6 +103,17 @@ class TestSimulation(TestCase):
             sim.solution["v"].entries, np.exp(-np.linspace(0, 1, 100))
         )
 
+        # store the solution on disk
+        with tempfile.TemporaryDirectory() as directory:
+            store = pybamm.SolutionStore(directory)
+            sim.solve(np.linspace(0, 1, 100), solution_store=store)
+            self.assertIsInstance(sim.solution.all_ys[0], np.memmap)
+            np.testing.assert_array_almost_equal(
+                sim.solution["v"].entries, np.exp(-np.linspace(0, 1, 100))
+            )
+            # release the memory maps before the directory is removed
+            del sim
+
     def test_solve_already_partially_processed_model(self):
         model = pybamm.lithium_ion.SPM()
 
@@ -8,6 +8,7 @@ import numpy as np
 from scipy.sparse import csr_matrix
 
 import unittest
+from unittest.mock import patch
 
 
 class TestBaseSolver(TestCase):
@@ -273,6 +274,53 @@ class TestBaseSolver(TestCase):
         self.assertEqual(model.convert_to_format, "casadi")
         pybamm.set_logging_level("WARNING")
 
+    def test_fused_function(self):
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        v = pybamm.Variable("v")
+        a = pybamm.InputParameter("a")
+        model.rhs = {u: -a * pybamm.exp(u)}
+        model.algebraic = {v: v - 2 * pybamm.exp(u)}
+        model.initial_conditions = {u: 1, v: 2}
+        model.events = [
+            pybamm.Event("u = 0.5", u - 0.5),
+            pybamm.Event("switch", u - 0.8, pybamm.EventType.SWITCH),
+            pybamm.Event("v = 1", v - 1),
+        ]
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+        solver = pybamm.CasadiSolver()
+        solver.set_up(model, {"a": 0.1})
+
+        fused = model.rhs_algebraic_events_eval
+        self.assertEqual(
+            fused.name_out(), ["rhs_algebraic", "events", "jac_rhs_algebraic"]
+        )
+        y = np.array([0.7, 1.5])
+        out = fused(t=0, y=y, p=0.1)
+        np.testing.assert_array_equal(
+            out["rhs_algebraic"], model.rhs_algebraic_eval(0, y, 0.1)
+        )
+        np.testing.assert_array_equal(
+            out["jac_rhs_algebraic"], model.jac_rhs_algebraic_eval(0, y, 0.1)
+        )
+        # only the termination events
+        np.testing.assert_allclose(out["events"].full().flatten(), [0.2, 0.5])
+
+        # without the Jacobian
+        model = model.new_copy()
+        model.use_jacobian = False
+        solver.set_up(model, {"a": 0.1})
+        self.assertEqual(
+            model.rhs_algebraic_events_eval.name_out(), ["rhs_algebraic", "events"]
+        )
+
+        # python format
+        model = model.new_copy()
+        model.convert_to_format = "python"
+        pybamm.BaseSolver().set_up(model)
+        self.assertIsNone(model.rhs_algebraic_events_eval)
+
     def test_inputs_step(self):
         # Make sure interpolant inputs are dropped
         model = pybamm.BaseModel()
@@ -288,6 +336,42 @@ class TestBaseSolver(TestCase):
             )
             self.assertFalse(input_key in sol.all_inputs[0])
 
+    def test_step_continuing_same_model(self):
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        v = pybamm.Variable("v")
+        a = pybamm.InputParameter("a")
+        model.rhs = {u: -a * u}
+        model.algebraic = {v: v - 2 * u}
+        model.initial_conditions = {u: 1, v: 2}
+        model.events = [pybamm.Event("u = 0.5", u - 0.5)]
+        model.variables = {"u": u, "v": v}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+        solver = pybamm.CasadiSolver(rtol=1e-8, atol=1e-8)
+
+        with patch.object(
+            solver, "_set_initial_conditions", wraps=solver._set_initial_conditions
+        ) as set_initial_conditions:
+            sol = solver.step(None, model, 1, inputs={"a": 0.1})
+            self.assertEqual(set_initial_conditions.call_count, 1)
+
+            # same model and inputs: the initial conditions are already consistent
+            sol = solver.step(sol, model, 1, inputs={"a": 0.1})
+            self.assertEqual(set_initial_conditions.call_count, 1)
+            u_sol = sol["u"].entries
+            np.testing.assert_allclose(u_sol, np.exp(-0.1 * sol.t), rtol=1e-6)
+            np.testing.assert_allclose(sol["v"].entries, 2 * u_sol, rtol=1e-6)
+
+            # new inputs: recalculate the initial conditions and check the events
+            sol = solver.step(sol, model, 1, inputs={"a": 0.2})
+            self.assertEqual(set_initial_conditions.call_count, 2)
+
+            # events are still detected when continuing
+            sol = solver.step(sol, model, 100, inputs={"a": 0.2})
+            self.assertEqual(set_initial_conditions.call_count, 2)
+            self.assertEqual(sol.termination, "event: u = 0.5")
+
     def test_extrapolation_warnings(self):
         # Make sure the extrapolation warnings work
         model = pybamm.BaseModel()
@@ -2,6 +2,7 @@
 # Tests for the Casadi Solver class
 #
 from tests import TestCase
+import pickle
 import pybamm
 import unittest
 import numpy as np
@@ -57,6 +58,24 @@ class TestCasadiSolver(TestCase):
             solution.y.full()[0], np.exp(0.1 * solution.t), decimal=5
         )
 
+    def test_pickle(self):
+        model = pybamm.BaseModel()
+        var = pybamm.Variable("var")
+        model.rhs = {var: 0.1 * var}
+        model.initial_conditions = {var: 1}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+        solver = pybamm.CasadiSolver()
+        t_eval = np.linspace(0, 1, 100)
+        solution = solver.solve(model, t_eval)
+
+        # the integrators are dropped, and created again when solving
+        model_copy, solver_copy = pickle.loads(pickle.dumps((model, solver)))
+        self.assertEqual(len(solver_copy.integrators), 0)
+        self.assertIn(model_copy, solver_copy._model_set_up)
+        solution_copy = solver_copy.solve(model_copy, t_eval)
+        np.testing.assert_array_almost_equal(solution_copy.y, solution.y)
+
     def test_without_grid(self):
         t_eval = np.linspace(0, 1, 100)
 
@@ -539,6 +558,47 @@ class TestCasadiSolver(TestCase):
         with self.assertRaisesRegex(pybamm.SolverError, "interpolation bounds"):
             solver.solve(model, t_eval=[0, 1])
 
+    def test_output_tolerances(self):
+        model = pybamm.BaseModel()
+        v = pybamm.Variable("v")
+        model.rhs = {v: -v}
+        model.initial_conditions = {v: 1}
+        model.variables = {"v": v, "2v": 2 * v}
+        t_eval = np.linspace(0, 20, 2001)
+
+        # points are only stored when v has changed by more than the tolerance
+        solver = pybamm.CasadiSolver(
+            mode="fast", rtol=1e-8, atol=1e-8, output_tolerances={"v": 1e-2}
+        )
+        solution = solver.solve(model, t_eval)
+        self.assertLess(len(solution.t), 100)
+        self.assertEqual(solution.t[0], 0)
+        self.assertEqual(solution.t[-1], 20)
+        np.testing.assert_allclose(
+            solution["2v"].entries, 2 * np.exp(-solution.t), rtol=1e-5, atol=1e-6
+        )
+        # the dropped points are within the tolerance of the last stored point
+        full_solution = pybamm.CasadiSolver(mode="fast", rtol=1e-8, atol=1e-8).solve(
+            model, t_eval
+        )
+        idx = np.searchsorted(solution.t, t_eval, side="right") - 1
+        np.testing.assert_array_less(
+            np.abs(full_solution["v"].entries - solution["v"].entries[idx]), 1e-2
+        )
+
+        # stepping in "safe" mode, with several sub-solutions per step
+        solver = pybamm.CasadiSolver(
+            mode="safe", dt_max=3, output_tolerances={"v": 1e-2}
+        )
+        solution = None
+        for _ in range(3):
+            solution = solver.step(solution, model, 5, npts=501)
+        self.assertLess(len(solution.t), 150)
+        self.assertEqual(solution.t[-1], 15)
+        np.testing.assert_allclose(
+            solution["v"].entries, np.exp(-solution.t), rtol=1e-4, atol=1e-5
+        )
+
 
 class TestCasadiSolverODEsWithForwardSensitivityEquations(TestCase):
     def test_solve_sensitivity_scalar_var_scalar_input(self):
@@ -4,6 +4,7 @@
 from tests import TestCase
 from contextlib import redirect_stdout
 import io
+import pickle
 import unittest
 
 import numpy as np
@@ -181,6 +182,159 @@ class TestIDAKLUSolver(TestCase):
             true_solution = b_value * sol.t
             np.testing.assert_array_almost_equal(sol.y[1:3], true_solution)
 
+    def test_multiple_inputs(self):
+        model = pybamm.BaseModel()
+        var = pybamm.Variable("var")
+        rate = pybamm.InputParameter("rate")
+        model.rhs = {var: -rate * var}
+        model.initial_conditions = {var: 2}
+        model.events = [pybamm.Event("var=1", var - 1)]
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        for form in ["python", "casadi"]:
+            model.convert_to_format = form
+            solver = pybamm.IDAKLUSolver(rtol=1e-8, atol=1e-8)
+            t_eval = np.linspace(0, 10, 100)
+            inputs_list = [{"rate": 0.01 * (i + 1)} for i in range(10)]
+            solutions = solver.solve(model, t_eval, inputs=inputs_list, nproc=3)
+            for i, solution in enumerate(solutions):
+                rate = 0.01 * (i + 1)
+                self.assertEqual(solution.all_inputs[0]["rate"], rate)
+                np.testing.assert_allclose(
+                    solution.y[0], 2 * np.exp(-rate * solution.t), rtol=1e-6
+                )
+                if 2 * np.exp(-rate * 10) > 1:
+                    self.assertEqual(solution.termination, "final time")
+                    np.testing.assert_array_equal(solution.t, t_eval)
+                else:
+                    self.assertEqual(solution.termination, "event: var=1")
+                    self.assertLess(solution.t[-1], 10)
+            if form == "casadi":
+                # one solver object per thread is created and kept
+                self.assertEqual(len(solver._setup["batch_solvers"]), 3)
+
+    def test_step_same_model(self):
+        # consecutive steps of the same model restart from the previous step size
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        v = pybamm.Variable("v")
+        model.rhs = {u: -0.1 * u}
+        model.algebraic = {v: v - 2 * u}
+        model.initial_conditions = {u: 1, v: 2}
+        model.variables = {"u": u, "v": v}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        solver = pybamm.IDAKLUSolver(rtol=1e-8, atol=1e-8)
+        sol = None
+        for _ in range(10):
+            sol = solver.step(sol, model, 1, npts=5, inputs={})
+        self.assertEqual(sol.termination, "final time")
+        np.testing.assert_allclose(sol["u"].entries, np.exp(-0.1 * sol.t), rtol=1e-6)
+        np.testing.assert_allclose(
+            sol["v"].entries, 2 * np.exp(-0.1 * sol.t), rtol=1e-6
+        )
+
+    def test_pickle_set_up(self):
+        # a set-up solver can be pickled, e.g. to be sent back from another process
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        a = pybamm.InputParameter("a")
+        model.rhs = {u: -a * u}
+        model.initial_conditions = {u: 1}
+        model.variables = {"u": u}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        solver = pybamm.IDAKLUSolver()
+        sol = solver.step(None, model, 10, npts=11, inputs={"a": 0.1})
+        new_model, new_solver = pickle.loads(pickle.dumps((model, solver)))
+        self.assertIn(new_model, new_solver._model_set_up)
+        new_sol = new_solver.step(None, new_model, 10, npts=11, inputs={"a": 0.1})
+        np.testing.assert_allclose(new_sol["u"].entries, sol["u"].entries)
+
+    def test_dense_output(self):
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        v = pybamm.Variable("v")
+        model.rhs = {u: -0.1 * u}
+        model.algebraic = {v: v - 2 * u}
+        model.initial_conditions = {u: 1, v: 2}
+        model.variables = {"u": u, "v": v}
+        model.events = [pybamm.Event("u = 0.5", u - 0.5)]
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        # solve with only a few output times
+        solver = pybamm.IDAKLUSolver(
+            rtol=1e-8, atol=1e-8, options={"dense_output": True}
+        )
+        sol = solver.solve(model, np.linspace(0, 10, 3))
+        self.assertEqual(len(sol.t), 3)
+        self.assertIsNotNone(sol.dense_output)
+
+        # resampling is accurate at any time
+        t = np.linspace(0, 10, 1000)
+        resampled = sol.resample(t)
+        np.testing.assert_allclose(resampled["u"].entries, np.exp(-0.1 * t), rtol=1e-6)
+        np.testing.assert_allclose(
+            resampled["v"].entries, 2 * np.exp(-0.1 * t), rtol=1e-6
+        )
+
+        # with an event
+        sol = solver.solve(model, np.linspace(0, 20, 3))
+        self.assertEqual(sol.termination, "event: u = 0.5")
+        t = np.linspace(0, sol.t[-1], 100)
+        np.testing.assert_allclose(
+            sol.resample(t)["u"].entries, np.exp(-0.1 * t), rtol=1e-6
+        )
+
+        # no dense output by default
+        sol = pybamm.IDAKLUSolver().solve(model, np.linspace(0, 10, 3))
+        self.assertIsNone(sol.dense_output)
+
+    def test_output_mode_solver_steps(self):
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        v = pybamm.Variable("v")
+        model.rhs = {u: -u}
+        model.algebraic = {v: v - 2 * u}
+        model.initial_conditions = {u: 1, v: 2}
+        model.variables = {"u": u, "v": v}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        # the solution is stored at the integrator's own steps
+        solver = pybamm.IDAKLUSolver(rtol=1e-8, atol=1e-8, output_mode="solver steps")
+        sol = solver.solve(model, [0, 50])
+        self.assertEqual(sol.t[0], 0)
+        self.assertEqual(sol.t[-1], 50)
+        self.assertTrue(np.all(np.diff(sol.t) > 0))
+        # steps grow as the solution decays
+        self.assertGreater(np.diff(sol.t)[-1], np.diff(sol.t)[0])
+        np.testing.assert_allclose(
+            sol["u"].entries, np.exp(-sol.t), rtol=1e-6, atol=1e-8
+        )
+
+        # steps ignore npts
+        sol = solver.step(None, model, 50, npts=10000)
+        self.assertLess(len(sol.t), 10000)
+
+        # thinned by a tolerance on an output variable
+        solver = pybamm.IDAKLUSolver(
+            rtol=1e-8,
+            atol=1e-8,
+            output_mode="solver steps",
+            output_tolerances={"v": 0.1},
+        )
+        thinned = solver.solve(model, [0, 50])
+        self.assertLess(len(thinned.t), len(sol.t))
+        self.assertLessEqual(len(thinned.t), 2 / 0.1 + 2)
+
+        with self.assertRaisesRegex(ValueError, "output_mode"):
+            pybamm.IDAKLUSolver(output_mode="bad")
+
     def test_sensitivites_initial_condition(self):
         model = pybamm.BaseModel()
         model.convert_to_format = "casadi"
@@ -540,6 +694,58 @@ class TestIDAKLUSolver(TestCase):
                         with self.assertRaises(ValueError):
                             soln = solver.solve(model, t_eval)
 
+    def test_output_variables(self):
+        model = pybamm.lithium_ion.SPM()
+        geometry = model.default_geometry
+        param = model.default_parameter_values
+        param.update({"Current function [A]": "[input]"})
+        param.process_model(model)
+        param.process_geometry(geometry)
+        mesh = pybamm.Mesh(geometry, model.default_submesh_types, model.default_var_pts)
+        disc = pybamm.Discretisation(mesh, model.default_spatial_methods)
+        disc.process_model(model)
+
+        t_eval = np.linspace(0, 3600, 100)
+        inputs = {"Current function [A]": 0.5}
+        output_variables = [
+            "Voltage [V]",
+            "Time [min]",
+            "Negative particle concentration [mol.m-3]",
+            "Discharge capacity [A.h]",
+        ]
+        solver = pybamm.IDAKLUSolver()
+        sol = solver.solve(model, t_eval, inputs=inputs)
+        solver_outputs = pybamm.IDAKLUSolver(output_variables=output_variables)
+        sol_outputs = solver_outputs.solve(model, t_eval, inputs=inputs)
+
+        # only the output variables are stored at each time point
+        n_outputs = sum(sol[var].entries[..., 0].size for var in output_variables)
+        self.assertEqual(sol_outputs.y.shape, (n_outputs, len(t_eval)))
+        for var in output_variables:
+            np.testing.assert_allclose(
+                sol_outputs[var].entries, sol[var].entries, rtol=1e-6, atol=1e-8
+            )
+        with self.assertRaisesRegex(KeyError, "was not returned by the solver"):
+            sol_outputs["Electrolyte concentration [mol.m-3]"]
+
+        # the final state is kept, so any variable can be read at the final time
+        np.testing.assert_allclose(
+            sol_outputs.last_state.y, sol.last_state.y, rtol=1e-6, atol=1e-8
+        )
+
+        # output variables are only available in casadi format
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        model.rhs = {u: -u}
+        model.initial_conditions = {u: 1}
+        model.variables = {"u": u}
+        model.convert_to_format = "python"
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+        solver = pybamm.IDAKLUSolver(root_method="lm", output_variables=["u"])
+        with self.assertRaisesRegex(pybamm.SolverError, "casadi format"):
+            solver.solve(model, t_eval)
+
 
 if __name__ == "__main__":
     print("Add -v for more debug output")
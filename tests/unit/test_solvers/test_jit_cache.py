@@ -0,0 +1,143 @@
+#
+# Tests for the JIT cache
+#
+from tests import TestCase
+import os
+import shutil
+import tempfile
+import casadi
+import numpy as np
+import pybamm
+import unittest
+from unittest.mock import patch
+
+
+have_compiler = shutil.which(os.environ.get("CC", "cc")) is not None
+
+
+@unittest.skipIf(not have_compiler, "no C compiler")
+class TestJitCache(TestCase):
+    def test_compile(self):
+        x = casadi.MX.sym("x", 2)
+        p = casadi.MX.sym("p")
+        f = casadi.Function("f", [x, p], [casadi.sin(x) * p])
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.JitCache(directory)
+            f_compiled = cache.compile(f)
+            self.assertEqual(f_compiled.class_name(), "External")
+            self.assertEqual(len(os.listdir(directory)), 1)
+            np.testing.assert_allclose(
+                f_compiled([1, 2], 3).full(), f([1, 2], 3).full(), rtol=1e-14
+            )
+
+            # the library is only compiled once
+            with patch.object(cache, "_build") as build:
+                f_compiled = cache.compile(f)
+                build.assert_not_called()
+            np.testing.assert_allclose(
+                f_compiled([1, 2], 3).full(), f([1, 2], 3).full(), rtol=1e-14
+            )
+            # also by another cache using the same directory
+            with patch.object(pybamm.JitCache, "_build") as build:
+                pybamm.JitCache(directory).compile(f)
+                build.assert_not_called()
+
+            # a different function or different flags give a different library
+            g = casadi.Function("f", [x, p], [casadi.cos(x) * p])
+            np.testing.assert_allclose(
+                cache.compile(g)([1, 2], 3).full(), g([1, 2], 3).full(), rtol=1e-14
+            )
+            pybamm.JitCache(directory, flags=["-O0"]).compile(f)
+            self.assertEqual(len(os.listdir(directory)), 3)
+
+            # with the Jacobian
+            f_compiled = cache.compile(f, jacobian=True)
+            jac = casadi.Function(
+                "jac_f", [x, p], [casadi.jacobian(f_compiled(x, p), x)]
+            )
+            np.testing.assert_allclose(
+                jac([1, 2], 3).full(), np.diag(3 * np.cos([1, 2])), rtol=1e-14
+            )
+
+            cache.clear()
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as cache_home:
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+                cache = pybamm.JitCache()
+            self.assertEqual(cache.directory, os.path.join(cache_home, "pybamm", "jit"))
+
+            # the libraries are loaded into the process, so directories that other
+            # users can write to are refused
+            if hasattr(os, "getuid"):
+                os.chmod(cache.directory, 0o777)
+                with self.assertRaises(PermissionError):
+                    pybamm.JitCache(cache.directory)
+
+    def test_compile_error(self):
+        f = casadi.Function("f", [casadi.MX.sym("x")], [casadi.MX.sym("x") ** 0])
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pybamm.JitCache(directory, flags=["-not-a-flag"])
+            with self.assertRaisesRegex(pybamm.SolverError, "Could not compile"):
+                cache.compile(f)
+            cache = pybamm.JitCache(directory, compiler="not-a-compiler")
+            with self.assertRaisesRegex(pybamm.SolverError, "Could not run"):
+                cache.compile(f)
+            # no temporary files are left behind
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_casadi_solver(self):
+        model = pybamm.BaseModel()
+        u = pybamm.Variable("u")
+        v = pybamm.Variable("v")
+        a = pybamm.InputParameter("a")
+        model.rhs = {u: -a * u}
+        model.algebraic = {v: v - 2 * u}
+        model.initial_conditions = {u: 1, v: 2}
+        model.events = [pybamm.Event("u = 0.5", u - 0.5)]
+        model.variables = {"u": u, "v": v}
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        t_eval = np.linspace(0, 10, 20)
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in ["fast", "safe"]:
+                solver = pybamm.CasadiSolver(
+                    mode=mode,
+                    rtol=1e-8,
+                    atol=1e-8,
+                    jit_cache=pybamm.JitCache(directory),
+                )
+                solution = solver.solve(model, t_eval, inputs={"a": 0.1})
+                np.testing.assert_allclose(
+                    solution["u"].entries, np.exp(-0.1 * solution.t), rtol=1e-6
+                )
+                np.testing.assert_allclose(
+                    solution["v"].entries, 2 * solution["u"].entries, rtol=1e-6
+                )
+
+            # ODE model
+            model = pybamm.BaseModel()
+            model.rhs = {u: -u}
+            model.initial_conditions = {u: 1}
+            model.variables = {"u": u}
+            disc.process_model(model)
+            solver = pybamm.CasadiSolver(
+                rtol=1e-8, atol=1e-8, jit_cache=pybamm.JitCache(directory)
+            )
+            solution = solver.solve(model, t_eval)
+            solution_vm = pybamm.CasadiSolver(rtol=1e-8, atol=1e-8).solve(model, t_eval)
+            np.testing.assert_allclose(
+                solution["u"].entries, solution_vm["u"].entries, rtol=1e-10
+            )
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -132,6 +132,71 @@ class TestProcessedVariable(TestCase):
         with self.assertRaisesRegex(ValueError, "Cannot compute sensitivities"):
             print(processed_var.sensitivities)
 
+    def test_processed_variable_sensitivities(self):
+        # var = a * t * y[0] + b * y[2], so that
+        # dvar/dp = dvar/dy @ dy/dp + (t * y[0], y[2])
+        t = pybamm.t
+        a = pybamm.InputParameter("a")
+        b = pybamm.InputParameter("b")
+        var = a * t * pybamm.StateVector(slice(0, 1)) + b * pybamm.StateVector(
+            slice(2, 3)
+        )
+        var.mesh = None
+        inputs = {"a": np.array([2.0]), "b": np.array([3.0])}
+        all_ts = [np.linspace(0, 1, 10), np.linspace(1.1, 2, 4)]
+        all_ys = [np.array([[1], [2], [3]]) * ts for ts in all_ts]
+        t_sol = np.concatenate(all_ts)
+        n_t = len(t_sol)
+        # dy/dp, with shape (n_t * n_y, n_p)
+        dy_dp = np.arange(n_t * 3 * 2, dtype=float).reshape(n_t * 3, 2)
+        solution = pybamm.Solution(
+            all_ts, all_ys, [pybamm.BaseModel()] * 2, [inputs] * 2
+        )
+        solution.sensitivities = {"all": dy_dp}
+        var_casadi = to_casadi(var, all_ys[0], inputs=inputs)
+        processed_var = pybamm.ProcessedVariable(
+            [var] * 2, [var_casadi] * 2, solution, warn=False
+        )
+
+        sensitivities = processed_var.sensitivities
+        expected = np.empty((n_t, 2))
+        for idx, t_val in enumerate(t_sol):
+            dvar_dy = np.array([2 * t_val, 0, 3])
+            dvar_dp = np.array([t_val * t_val, 3 * t_val])
+            expected[idx] = dvar_dy @ dy_dp[3 * idx : 3 * idx + 3] + dvar_dp
+        np.testing.assert_array_almost_equal(sensitivities["all"], expected)
+        np.testing.assert_array_almost_equal(sensitivities["a"], expected[:, :1])
+        np.testing.assert_array_almost_equal(sensitivities["b"], expected[:, 1:])
+
+    def test_processed_variable_sub_solutions(self):
+        # sub-solutions with different lengths, functions and inputs
+        t = pybamm.t
+        var = pybamm.Variable("var", domain=["negative electrode", "separator"])
+        x = pybamm.SpatialVariable("x", domain=["negative electrode", "separator"])
+        a = pybamm.InputParameter("a")
+        disc = tests.get_discretisation_for_testing()
+        disc.set_variable_slices([var])
+        x_sol = disc.process_symbol(x).entries[:, 0]
+        eqn_sol = disc.process_symbol(a * t * var + x)
+
+        all_ts = [np.linspace(0, 1), np.linspace(1.1, 2, 5), np.linspace(2.1, 3)]
+        all_ys = [np.ones_like(x_sol)[:, np.newaxis] * ts for ts in all_ts]
+        all_inputs = [{"a": np.array([i + 1.0])} for i in range(3)]
+        eqn_casadi = to_casadi(eqn_sol, all_ys[0], inputs=all_inputs[0])
+        processed_eqn = pybamm.ProcessedVariable(
+            [eqn_sol] * 3,
+            [eqn_casadi, to_casadi(eqn_sol, all_ys[0], all_inputs[0]), eqn_casadi],
+            pybamm.Solution(all_ts, all_ys, [pybamm.BaseModel()] * 3, all_inputs),
+            warn=False,
+        )
+        expected = np.hstack(
+            [
+                inputs["a"] * ts**2 + x_sol[:, np.newaxis]
+                for ts, inputs in zip(all_ts, all_inputs)
+            ]
+        )
+        np.testing.assert_array_almost_equal(processed_eqn.entries, expected)
+
     def test_processed_variable_1D(self):
         t = pybamm.t
         var = pybamm.Variable("var", domain=["negative electrode", "separator"])
@@ -15,6 +15,8 @@ class TestScipySolver(TestCase):
             formats = ["python", "jax"]
         else:
             formats = ["python"]
+        if pybamm.have_numba():
+            formats.append("numba")
 
         for convert_to_format in formats:
             # Create model
@@ -109,6 +109,53 @@ class TestSolution(TestCase):
         ):
             2 + sol3
 
+    def test_add_solutions_shared_lists(self):
+        sols = []
+        for i in range(4):
+            t = np.linspace(i, i + 0.5)
+            sol = pybamm.Solution(t, np.tile(t, (2, 1)), pybamm.BaseModel(), {"a": i})
+            sol.solve_time = 0
+            sol.integration_time = 0
+            sols.append(sol)
+
+        # adding solutions one after the other extends the same lists in place
+        sol_01 = sols[0] + sols[1]
+        sol_012 = sol_01 + sols[2]
+        self.assertIs(sol_012.all_ts._items, sol_01.all_ts._items)
+        self.assertIs(sol_012.sub_solutions._items, sol_01.sub_solutions._items)
+        # but each solution keeps its own view
+        self.assertEqual(len(sol_01.all_ts), 2)
+        self.assertEqual(len(sol_01.sub_solutions), 2)
+        self.assertEqual(len(sol_012.all_ys), 3)
+        np.testing.assert_array_equal(sol_01.t, np.concatenate(sol_01.all_ts))
+        np.testing.assert_array_equal(sol_01.all_ts[-1], sols[1].t)
+        np.testing.assert_array_equal(sol_012.all_inputs[-1]["a"], 2)
+        self.assertEqual(len(sol_012.all_inputs_casadi), 3)
+        with self.assertRaises(IndexError):
+            sol_01.all_ts[2]
+
+        # adding to a solution that is not the latest copies its lists
+        sol_013 = sol_01 + sols[3]
+        self.assertIsNot(sol_013.all_ts._items, sol_01.all_ts._items)
+        np.testing.assert_array_equal(sol_013.all_ts[-1], sols[3].t)
+        np.testing.assert_array_equal(sol_012.all_ts[-1], sols[2].t)
+        self.assertIs(sol_013.sub_solutions[-1], sols[3])
+        self.assertIs(sol_012.sub_solutions[-1], sols[2])
+
+        # lists passed to a solution are never extended
+        all_ts = [sols[0].t]
+        sol = pybamm.Solution(all_ts, [sols[0].y], pybamm.BaseModel(), {"a": 0})
+        sol.solve_time = 0
+        sol.integration_time = 0
+        sol + sols[1]
+        self.assertEqual(len(all_ts), 1)
+
+        # views behave like lists
+        self.assertEqual(sol_01.all_models + [1], [*sol_01.all_models, 1])
+        self.assertEqual([1] + sol_01.all_models, [1, *sol_01.all_models])
+        self.assertEqual(sol_012.all_models[1:], list(sol_012.all_models)[1:])
+        self.assertEqual(repr(sol_01.all_models), repr(list(sol_01.all_models)))
+
     def test_add_solutions_different_models(self):
         # Set up first solution
         t1 = np.linspace(0, 1)
@@ -192,6 +239,43 @@ class TestSolution(TestCase):
         np.testing.assert_array_equal(sol.cycles[1].t, sol.t[len_cycle_1:])
         np.testing.assert_allclose(sol.cycles[1].y, sol.y[:, len_cycle_1:])
 
+    def test_cycle_summary_variables(self):
+        model = pybamm.lithium_ion.SPM({"SEI": "ec reaction limited"})
+        experiment = pybamm.Experiment(
+            [("Discharge at 1C for 20 minutes", "Charge at 1C for 10 minutes")] * 2
+        )
+        sim = pybamm.Simulation(model, experiment=experiment)
+        sol = sim.solve(calc_esoh=False)
+
+        # the summary variables are calculated from the sub-solutions of each
+        # cycle, and agree with the processed variables
+        for cycle, summary_variables in zip(sol.cycles, sol.all_summary_variables):
+            V = cycle["Battery voltage [V]"].data
+            Q = cycle["Discharge capacity [A.h]"].data
+            self.assertEqual(summary_variables["Minimum voltage [V]"], np.min(V))
+            self.assertEqual(summary_variables["Maximum voltage [V]"], np.max(V))
+            self.assertAlmostEqual(
+                summary_variables["Measured capacity [A.h]"], np.max(Q) - np.min(Q)
+            )
+            lli = cycle["Loss of lithium inventory [%]"].data
+            self.assertAlmostEqual(
+                summary_variables["Loss of lithium inventory [%]"], lli[-1]
+            )
+            self.assertAlmostEqual(
+                summary_variables["Change in loss of lithium inventory [%]"],
+                lli[-1] - lli[0],
+            )
+
+        # the values of a scalar variable are the same as the processed variable
+        values = pybamm.solvers.solution._evaluate_scalar_variable(
+            sol, "Battery voltage [V]"
+        )
+        np.testing.assert_array_equal(values, sol["Battery voltage [V]"].data)
+        with self.assertRaisesRegex(ValueError, "not a scalar variable"):
+            pybamm.solvers.solution._evaluate_scalar_variable(
+                sol, "Negative particle concentration [mol.m-3]"
+            )
+
     def test_total_time(self):
         sol = pybamm.Solution(np.array([0]), np.array([[1, 2]]), pybamm.BaseModel(), {})
         sol.set_up_time = 0.5
@@ -220,6 +304,99 @@ class TestSolution(TestCase):
         np.testing.assert_array_equal(twoc_sol.entries, twoc_sol(solution.t))
         np.testing.assert_array_equal(twoc_sol.entries, 2 * c_sol.entries)
 
+    def test_output_variables(self):
+        model = pybamm.BaseModel()
+        c = pybamm.Variable("c")
+        model.rhs = {c: -c}
+        model.initial_conditions = {c: 1}
+        model.variables["c"] = c
+        model.variables["2c"] = 2 * c
+        model.variables["3c"] = 3 * c
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        # solution storing only "2c" and "3c", plus the final state
+        t = np.linspace(0, 1)
+        y = np.vstack([2 * np.exp(-t), 3 * np.exp(-t)])
+        output_variables = {"2c": slice(0, 1), "3c": slice(1, 2)}
+        y_event = np.array([[np.exp(-1)]])
+        solution = pybamm.Solution(
+            t, y, model, {}, t[-1:], y_event, output_variables=output_variables
+        )
+        np.testing.assert_array_equal(solution["2c"].entries, y[0])
+        np.testing.assert_array_equal(solution["3c"].entries, y[1])
+        with self.assertRaisesRegex(KeyError, "was not returned by the solver"):
+            solution["c"]
+
+        # the last state holds the full state, so any variable can be read
+        last_state = solution.last_state
+        self.assertIsNone(last_state.output_variables)
+        np.testing.assert_array_equal(last_state.all_ys[0], y_event)
+        np.testing.assert_allclose(last_state["c"].entries, np.exp(-1))
+
+        # the first state and copies keep the output variables
+        self.assertEqual(solution.first_state.output_variables, output_variables)
+        np.testing.assert_array_equal(solution.first_state["2c"].entries, 2)
+        self.assertEqual(solution.copy().output_variables, output_variables)
+
+        # add solutions
+        solution.solve_time = 0
+        solution.integration_time = 0
+        t2 = np.linspace(1, 2)
+        y2 = np.vstack([2 * np.exp(-t2), 3 * np.exp(-t2)])
+        solution2 = pybamm.Solution(
+            t2, y2, model, {}, t2[-1:], y_event, output_variables=output_variables
+        )
+        solution2.solve_time = 0
+        solution2.integration_time = 0
+        sum_sol = solution + solution2
+        self.assertEqual(sum_sol.output_variables, output_variables)
+        np.testing.assert_array_equal(
+            sum_sol["3c"].entries, 3 * np.exp(-np.concatenate([t, t2[1:]]))
+        )
+        full_solution = pybamm.Solution(t2, np.exp(-t2)[np.newaxis], model, {})
+        with self.assertRaisesRegex(pybamm.SolverError, "different output variables"):
+            solution + full_solution
+
+    def test_resample(self):
+        model = pybamm.BaseModel()
+        c = pybamm.Variable("c")
+        model.rhs = {c: -c}
+        model.initial_conditions = {c: 1}
+        model.variables["2c"] = 2 * c
+        disc = pybamm.Discretisation()
+        disc.process_model(model)
+
+        def exact(t):
+            return np.exp(-t)[np.newaxis]
+
+        # two sub-solutions, both with dense output
+        t1 = np.linspace(0, 1, 3)
+        t2 = np.linspace(1 + 1e-9, 2, 3)
+        sol1 = pybamm.Solution(t1, exact(t1), model, {})
+        sol2 = pybamm.Solution(t2, exact(t2), model, {})
+        for sol in [sol1, sol2]:
+            sol.dense_output = exact
+            sol.solve_time = 0
+            sol.integration_time = 0
+        solution = sol1 + sol2
+
+        t = np.linspace(0, 2, 101)
+        resampled = solution.resample(t)
+        np.testing.assert_array_equal(resampled.t, t)
+        np.testing.assert_allclose(resampled["2c"].entries, 2 * np.exp(-t))
+        self.assertEqual(len(resampled.all_ts), 2)
+        self.assertEqual(resampled.termination, solution.termination)
+
+        # errors
+        with self.assertRaisesRegex(ValueError, "strictly increasing"):
+            solution.resample([1, 0.5])
+        with self.assertRaisesRegex(ValueError, "must be between"):
+            solution.resample([0, 3])
+        sol2.dense_output = None
+        with self.assertRaisesRegex(pybamm.SolverError, "no dense output"):
+            solution.resample(t)
+
     def test_plot(self):
         model = pybamm.BaseModel()
         c = pybamm.Variable("c")
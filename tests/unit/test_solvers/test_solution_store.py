@@ -0,0 +1,117 @@
+#
+# Tests for the SolutionStore class
+#
+import pybamm
+from tests import TestCase
+import casadi
+import os
+import tempfile
+import unittest
+import numpy as np
+
+
+def get_solution(t, y):
+    model = pybamm.BaseModel()
+    a = pybamm.StateVector(slice(0, 1))
+    b = pybamm.StateVector(slice(1, 2))
+    model.variables = {"a": a, "sum": a + b}
+    for var in model.variables.values():
+        var.mesh = None
+    solution = pybamm.Solution(t, y, model, {})
+    solution.solve_time = 0
+    solution.integration_time = 0
+    return solution
+
+
+class TestSolutionStore(TestCase):
+    def test_append(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = pybamm.SolutionStore(directory)
+            t1 = np.linspace(0, 1, 5)
+            t2 = np.linspace(1, 2, 5)
+            sol1 = get_solution(t1, np.vstack([t1, 2 * t1]))
+            sol2 = get_solution(t2, casadi.DM(np.vstack([t2, 2 * t2])))
+            sol = sol1 + sol2
+            # cached arrays are dropped when the solution is stored
+            sol.y
+            sol.last_state
+
+            self.assertIs(store.append(sol), sol)
+            # the repeated first time of the second solution is read from the same
+            # chunk as the second solution
+            self.assertEqual(store.number_of_chunks, 2)
+            self.assertEqual(len(os.listdir(directory)), 4)
+            for s in [sol, sol1, sol2]:
+                for ts, ys in zip(s.all_ts, s.all_ys):
+                    self.assertIsInstance(ts, np.memmap)
+                    self.assertIsInstance(ys, np.memmap)
+            self.assertEqual(sol.all_ys[1].shape, (2, 4))
+            self.assertNotIn("_y", sol.__dict__)
+
+            t = np.concatenate([t1, t2[1:]])
+            np.testing.assert_array_equal(sol.t, t)
+            np.testing.assert_array_equal(sol["a"].entries, t)
+            np.testing.assert_array_equal(sol["sum"].entries, 3 * t)
+            np.testing.assert_array_equal(sol.last_state.y, [[2], [4]])
+
+            # stored solutions are skipped
+            store.append(sol)
+            self.assertEqual(store.number_of_chunks, 2)
+
+            # a new store in the same directory does not overwrite the chunks
+            new_store = pybamm.SolutionStore(directory)
+            self.assertEqual(new_store.number_of_chunks, 2)
+            new_store.append(get_solution(t1, np.vstack([t1, t1])))
+            self.assertEqual(new_store.number_of_chunks, 3)
+            np.testing.assert_array_equal(sol["sum"].entries, 3 * t)
+
+            # empty solutions are ignored
+            empty = pybamm.EmptySolution()
+            self.assertIs(store.append(empty), empty)
+
+            # release the memory maps before the directory is removed
+            del sol, sol1, sol2, new_store
+
+    def test_temporary_directory(self):
+        store = pybamm.SolutionStore()
+        directory = store.directory
+        self.assertTrue(os.path.isdir(directory))
+        self.assertEqual(store.number_of_chunks, 0)
+        t = np.linspace(0, 1, 5)
+        store.append(get_solution(t, np.vstack([t, t])))
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+        # the temporary directory is removed when the store is closed
+        store.close()
+        self.assertFalse(os.path.exists(directory))
+        store.close()
+
+        # ... or when it is used as a context manager
+        with pybamm.SolutionStore() as store:
+            directory = store.directory
+            self.assertTrue(os.path.isdir(directory))
+        self.assertFalse(os.path.exists(directory))
+
+        # ... or when it is garbage collected
+        store = pybamm.SolutionStore()
+        directory = store.directory
+        del store
+        self.assertFalse(os.path.exists(directory))
+
+    def test_close_user_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with pybamm.SolutionStore(directory) as store:
+                t = np.linspace(0, 1, 5)
+                store.append(get_solution(t, np.vstack([t, t])))
+            # directories given by the user are not removed
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -0,0 +1,114 @@
+#
+# Tests for the SolverPool class
+#
+import pybamm
+from tests import TestCase
+import unittest
+import numpy as np
+import pickle
+from tests import get_mesh_for_testing
+
+
+def get_model(convert_to_format="casadi"):
+    model = pybamm.BaseModel()
+    model.convert_to_format = convert_to_format
+    domain = ["negative electrode", "separator", "positive electrode"]
+    var = pybamm.Variable("var", domain=domain)
+    model.rhs = {var: -pybamm.InputParameter("rate") * var}
+    model.initial_conditions = {var: 1}
+    model.variables = {"var": var}
+    mesh = get_mesh_for_testing()
+    spatial_methods = {"macroscale": pybamm.FiniteVolume()}
+    disc = pybamm.Discretisation(mesh, spatial_methods)
+    disc.process_model(model)
+    return model
+
+
+class TestSolverPool(TestCase):
+    def test_solve_with_pool(self):
+        for convert_to_format in ["python", "casadi"]:
+            model = get_model(convert_to_format)
+            solver = pybamm.ScipySolver(rtol=1e-8, atol=1e-8, method="RK45")
+            t_eval = np.linspace(0, 10, 100)
+            inputs_list = [{"rate": 0.01 * (i + 1)} for i in range(8)]
+
+            with pybamm.SolverPool(processes=2) as pool:
+                solutions = solver.solve(model, t_eval, inputs=inputs_list, pool=pool)
+                for i, solution in enumerate(solutions):
+                    with self.subTest(i=i):
+                        self.assertIs(solution.all_models[0], model)
+                        np.testing.assert_array_equal(solution.t, t_eval)
+                        np.testing.assert_allclose(
+                            solution.y[0], np.exp(-0.01 * (i + 1) * solution.t)
+                        )
+                        self.assertEqual(solution.termination, "final time")
+                        self.assertEqual(
+                            solution["var"].data.shape, (solution.y.shape[0], 100)
+                        )
+                workers = pool._pool
+
+                # Workers are kept warm between calls with the same model
+                solutions = solver.solve(model, t_eval, inputs=inputs_list, pool=pool)
+                self.assertIs(pool._pool, workers)
+                np.testing.assert_allclose(
+                    solutions[-1].y[0], np.exp(-0.08 * solutions[-1].t)
+                )
+            self.assertIsNone(pool._pool)
+
+    def test_pool_attached_to_solver(self):
+        model = get_model()
+        solver = pybamm.ScipySolver(rtol=1e-8, atol=1e-8, method="RK45")
+        solver.pool = pybamm.SolverPool(processes=2, chunksize=3)
+        t_eval = np.linspace(0, 10, 20)
+        inputs_list = [{"rate": 0.1 * (i + 1)} for i in range(7)]
+        solutions = solver.solve(model, t_eval, inputs=inputs_list)
+        self.assertEqual(len(solutions), 7)
+        np.testing.assert_allclose(
+            solutions[3].y[0], np.exp(-0.4 * solutions[3].t), rtol=1e-6
+        )
+
+        # A different model restarts the workers
+        workers = solver.pool._pool
+        new_model = get_model()
+        new_solver = solver.copy()
+        new_solver.solve(new_model, t_eval, inputs=inputs_list)
+        self.assertIsNot(solver.pool._pool, workers)
+        solver.pool.close()
+
+    def test_pool_with_events(self):
+        model = get_model()
+        var = model.variables["var"]
+        model.events = [pybamm.Event("var=0.5", pybamm.min(var) - 0.5)]
+        solver = pybamm.CasadiSolver(mode="safe", rtol=1e-8, atol=1e-8)
+        t_eval = np.linspace(0, 10, 100)
+        inputs_list = [{"rate": 0.05 * (i + 1)} for i in range(4)]
+        with pybamm.SolverPool(processes=2) as pool:
+            solutions = solver.solve(model, t_eval, inputs=inputs_list, pool=pool)
+        for i, solution in enumerate(solutions):
+            if i == 0:
+                self.assertEqual(solution.termination, "final time")
+            else:
+                self.assertEqual(solution.termination, "event: var=0.5")
+                np.testing.assert_allclose(solution.y[0, -1], 0.5, rtol=1e-4)
+
+    def test_pickle(self):
+        pool = pybamm.SolverPool(processes=2)
+        model = get_model()
+        solver = pybamm.ScipySolver()
+        solver.pool = pool
+        solver.solve(model, [0, 1], inputs=[{"rate": 1}, {"rate": 2}])
+        self.assertIsNotNone(pool._pool)
+        new_solver = pickle.loads(pickle.dumps(solver))
+        self.assertIsNone(new_solver.pool._pool)
+        self.assertEqual(new_solver.pool.processes, 2)
+        pool.close()
+
+
+if __name__ == "__main__":
+    print("Add -v for more debug output")
+    import sys
+
+    if "-v" in sys.argv:
+        debug = True
+    pybamm.settings.debug_mode = True
+    unittest.main()
@@ -78,6 +78,28 @@ class TestUtil(TestCase):
         self.assertTrue(pybamm.get_parameters_filepath(tempfile_obj.name) == path)
         tempfile_obj.close()
 
+    def test_get_cache_directory(self):
+        with tempfile.TemporaryDirectory() as cache_home:
+            # the default directory is in the user's cache directory
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+                directory = pybamm.get_cache_directory("test")
+            self.assertEqual(directory, os.path.join(cache_home, "pybamm", "test"))
+            self.assertTrue(os.path.isdir(directory))
+
+            directory = os.path.join(cache_home, "other")
+            self.assertEqual(pybamm.get_cache_directory("test", directory), directory)
+            if hasattr(os, "getuid"):
+                # only the user can read or write the created directory
+                self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+
+                # directories that other users can write are refused
+                os.chmod(directory, 0o777)
+                with self.assertRaisesRegex(PermissionError, "cache directory"):
+                    pybamm.get_cache_directory("test", directory)
+                os.chmod(directory, 0o720)
+                with self.assertRaisesRegex(PermissionError, "cache directory"):
+                    pybamm.get_cache_directory("test", directory)
+
     def test_is_jax_compatible(self):
         if pybamm.have_jax():
             compatible = pybamm.is_jax_compatible()